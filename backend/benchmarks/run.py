@@ -0,0 +1,296 @@
+"""Stage-level benchmarks for the forecast pipeline.
+
+Times each stage of a forecast separately on synthetic uploads and records the
+peak traced memory of each stage. Results are compared against a stored
+baseline, and the run fails when a stage regresses past the thresholds.
+
+    cd backend
+    python -m benchmarks.run                      # compare with benchmarks/baseline.json
+    python -m benchmarks.run --sizes 100,10000 --formats csv
+    python -m benchmarks.run --update-baseline    # record this machine's numbers
+
+Peak memory comes from tracemalloc in a separate, untimed pass. It covers
+Python, NumPy and pandas allocations but not the cmdstan fit subprocess.
+Baselines are machine-specific: record them on the machine that checks them.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from functools import cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_upload
+from models.schemas import ForecastRequest
+from services.holidays_service import HolidayIndex, HolidaysService
+from services.prophet_service import ProphetService
+from services.response_formats import encode_arrow, encode_columnar_json
+
+STAGES = (
+    "read_file",
+    "read_excel_pandas",
+    "validate_and_process_data",
+    "aggregate_to_frequency",
+    "prepare_data",
+    "holidays",
+    "train_prophet",
+    "predict",
+    "serialize_json",
+    "serialize_columnar",
+    "serialize_arrow"
+)
+
+HORIZONS = {"D": 30, "W": 12, "M": 6}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+Stage = Tuple[str, Callable[[], Any]]
+
+
+def build_request(freq: str) -> ForecastRequest:
+    return ForecastRequest(
+        industry="retail",
+        country="US",
+        freq=freq,
+        horizon=HORIZONS[freq],
+        date_col="date",
+        target_col="sales",
+        apply_ai_adjustment=False
+    )
+
+
+def case_stages(service: ProphetService, content: bytes, filename: str,
+                request: ForecastRequest, selected: Iterable[str] = STAGES) -> List[Stage]:
+    """Stage callables for one case, limited to the `selected` stages.
+
+    Each stage's input is produced by running the earlier stages once, so a
+    stage is timed on its own. Only the inputs of the selected stages are
+    built, so a run limited to the read stages never fits a model.
+    """
+    columns = [request.date_col, request.target_col]
+
+    @cache
+    def df():
+        return service.read_file(content, filename, columns=columns)
+
+    @cache
+    def cleaned():
+        return service.validate_and_process_data(df(), request)
+
+    @cache
+    def parsed():
+        return pd.DataFrame({
+            "ds": pd.to_datetime(df()[request.date_col]),
+            "y": pd.to_numeric(df()[request.target_col])
+        })
+
+    @cache
+    def holidays_df():
+        return service._build_holidays(cleaned()[0]["ds"], request)
+
+    @cache
+    def model():
+        return service._train_prophet_model(cleaned()[0], holidays_df(), request.freq)
+
+    @cache
+    def frames():
+        df_clean, meta = cleaned()
+        forecast = service._predict_horizon(model(), request.horizon, request.freq)
+        return df_clean, meta, forecast, None, 1.0
+
+    def cold_holidays():
+        # A fresh index, so the per-year holiday tables are rebuilt as on a cold worker
+        ds = cleaned()[0]["ds"]
+        start, end = ds.min(), ds.max() + timedelta(days=request.horizon * 30)
+        return HolidaysService(index=HolidayIndex()).get_holidays_dataframe(
+            request.country, request.state, start, end
+        )
+
+    inputs = {
+        "validate_and_process_data": (df,),
+        "aggregate_to_frequency": (parsed,),
+        "holidays": (cleaned,),
+        "train_prophet": (cleaned, holidays_df),
+        "predict": (model,),
+        "serialize_json": (frames,),
+        "serialize_columnar": (frames,),
+        "serialize_arrow": (frames,)
+    }
+    stages = [
+        ("read_file", lambda: service.read_file(content, filename, columns=columns)),
+        ("validate_and_process_data", lambda: service.validate_and_process_data(df(), request)),
+        ("aggregate_to_frequency", lambda: service._aggregate_to_frequency(parsed(), request.freq)),
+        ("prepare_data", lambda: service.prepare_data(content, filename, request)),
+        ("holidays", cold_holidays),
+        ("train_prophet", lambda: service._train_prophet_model(cleaned()[0], holidays_df(), request.freq)),
+        ("predict", lambda: service._predict_horizon(model(), request.horizon, request.freq)),
+        ("serialize_json", lambda: service.build_response(*frames()).model_dump_json()),
+        ("serialize_columnar", lambda: encode_columnar_json(*frames())),
+        ("serialize_arrow", lambda: encode_arrow(*frames()))
+    ]
+    if filename.endswith(".xlsx"):
+        # Plain pandas/openpyxl parse of the whole sheet, as a reference for read_file
+        stages.insert(1, ("read_excel_pandas", lambda: pd.read_excel(io.BytesIO(content))))
+    stages = [stage for stage in stages if stage[0] in selected]
+    for name, _ in stages:
+        for build in inputs.get(name, ()):
+            build()
+    return stages
+
+
+def measure(stages: List[Stage], repeat: int, trace_memory: bool) -> Dict[str, Dict[str, float]]:
+    """Median seconds per stage over `repeat` runs, plus peak traced MB from one more run."""
+    results: Dict[str, Dict[str, float]] = {}
+    for name, stage in stages:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            stage()
+            timings.append(time.perf_counter() - started)
+        results[name] = {"seconds": round(statistics.median(timings), 5)}
+
+        if trace_memory:
+            tracemalloc.start()
+            try:
+                stage()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            results[name]["peak_mb"] = round(peak / (1024 * 1024), 3)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Dict[str, float]]], baseline: Dict[str, Any],
+            threshold: float, memory_threshold: float, min_delta: float) -> List[str]:
+    """Describe each stage that is slower or uses more memory than its baseline allows."""
+    regressions = []
+    for case, stages in results.items():
+        for stage, current in stages.items():
+            reference = baseline.get(case, {}).get(stage)
+            if not reference:
+                continue
+            slower = current["seconds"] - reference["seconds"]
+            if slower > min_delta and current["seconds"] > reference["seconds"] * (1 + threshold):
+                regressions.append(
+                    f"{case} {stage}: {current['seconds'] * 1000:.1f}ms vs "
+                    f"baseline {reference['seconds'] * 1000:.1f}ms"
+                )
+            if "peak_mb" in current and "peak_mb" in reference and \
+                    current["peak_mb"] > max(reference["peak_mb"] * (1 + memory_threshold),
+                                             reference["peak_mb"] + 1):
+                regressions.append(
+                    f"{case} {stage}: peak {current['peak_mb']:.1f}MB vs "
+                    f"baseline {reference['peak_mb']:.1f}MB"
+                )
+    return regressions
+
+
+def print_case(case: str, stages: Dict[str, Dict[str, float]], baseline: Dict[str, Any]):
+    print(f"\n{case}")
+    print(f"  {'stage':<28}{'ms':>10}{'baseline':>10}{'change':>9}{'peak MB':>10}")
+    for stage, current in stages.items():
+        reference = baseline.get(case, {}).get(stage)
+        ms = current["seconds"] * 1000
+        base = f"{reference['seconds'] * 1000:.1f}" if reference else "-"
+        change = f"{(current['seconds'] / reference['seconds'] - 1) * 100:+.0f}%" \
+            if reference and reference["seconds"] > 0 else "-"
+        peak = f"{current['peak_mb']:.1f}" if "peak_mb" in current else "-"
+        print(f"  {stage:<28}{ms:>10.1f}{base:>10}{change:>9}{peak:>10}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stage-level forecast pipeline benchmarks")
+    parser.add_argument("--sizes", default="100,10000,100000,1000000",
+                        help="comma-separated row counts")
+    parser.add_argument("--freqs", default="D,W,M", help="comma-separated frequencies")
+    parser.add_argument("--formats", default="csv,xlsx", help="comma-separated formats (csv, xlsx)")
+    parser.add_argument("--excel-max-rows", type=int, default=100000,
+                        help="skip workbooks larger than this (Excel caps sheets near 1M rows)")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages to run")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (median is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="merge these results into the baseline instead of checking them")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown per stage, as a fraction of the baseline")
+    parser.add_argument("--memory-threshold", type=float, default=0.25,
+                        help="allowed peak memory growth per stage, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="slowdowns smaller than this are treated as noise")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    # cmdstanpy resets its logger to DEBUG the first time it is used
+    from cmdstanpy.utils import get_logger
+    get_logger()
+    for name in ("cmdstanpy", "prophet", "services"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    baseline_doc = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as handle:
+            baseline_doc = json.load(handle)
+    baseline = baseline_doc.get("results", {})
+
+    selected = [stage for stage in args.stages.split(",") if stage]
+    unknown = set(selected) - set(STAGES)
+    if unknown:
+        print(f"Unknown stages: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    service = ProphetService()
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for fmt in args.formats.split(","):
+        for size in (int(size) for size in args.sizes.split(",")):
+            if fmt == "xlsx" and size > args.excel_max_rows:
+                continue
+            for freq in args.freqs.split(","):
+                case = f"{fmt}-{freq}-{size}"
+                content = synthetic_upload(size, freq, fmt)
+                stages = case_stages(service, content, f"bench.{fmt}", build_request(freq), selected)
+                results[case] = measure(stages, args.repeat, not args.no_memory)
+                print_case(case, results[case], baseline)
+
+    if args.update_baseline:
+        for case, stages in results.items():
+            baseline.setdefault(case, {}).update(stages)
+        baseline_doc = {
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "pandas": pd.__version__
+            },
+            "results": dict(sorted(baseline.items()))
+        }
+        with open(args.baseline, "w") as handle:
+            json.dump(baseline_doc, handle, indent=2)
+            handle.write("\n")
+        print(f"\nBaseline updated: {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, args.memory_threshold,
+                          args.min_delta_ms / 1000)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nNo regressions" if baseline else "\nNo baseline to compare against (use --update-baseline)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
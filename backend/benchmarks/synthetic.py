@@ -0,0 +1,76 @@
+"""Synthetic sales uploads for the benchmarks.
+
+Rows are transactions: one per period for small sizes, then several per day
+once the date span reaches its cap, so large files aggregate to a realistic
+number of periods instead of running past pandas' date range.
+"""
+import io
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Days per row until the span cap, and the longest history generated per frequency
+PERIOD_DAYS = {"D": 1, "W": 7, "M": 30}
+MAX_SPAN_DAYS = {"D": 4 * 365, "W": 8 * 365, "M": 15 * 365}
+
+START_DATE = np.datetime64("2010-01-01")
+REGIONS = np.array(["north", "south", "east", "west"])
+
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "forecast-benchmarks")
+
+
+def synthetic_frame(rows: int, freq: str, seed: int = 0) -> pd.DataFrame:
+    """Sorted transactions with trend, weekly and yearly seasonality and noise.
+
+    Besides the `date`/`sales` columns used by the forecast there are two extra
+    columns, so readers that skip unused columns have something to skip.
+    """
+    rng = np.random.default_rng(seed)
+    span_days = min(rows * PERIOD_DAYS[freq], MAX_SPAN_DAYS[freq])
+    offsets = np.linspace(0, span_days - 1, rows).astype(np.int64)
+    dates = START_DATE + offsets.astype("timedelta64[D]")
+
+    day = offsets.astype(np.float64)
+    level = 1000 + 0.2 * day
+    yearly = 1 + 0.2 * np.sin(2 * np.pi * day / 365.25)
+    weekly = 1 + 0.1 * np.sin(2 * np.pi * day / 7)
+    per_row = rows / max(span_days, 1)
+    sales = level * yearly * weekly / per_row * rng.normal(1.0, 0.05, rows)
+
+    return pd.DataFrame({
+        "date": dates,
+        "sales": np.round(sales, 2),
+        "region": REGIONS[rng.integers(0, len(REGIONS), rows)],
+        "units": rng.integers(1, 50, rows)
+    })
+
+
+def synthetic_upload(rows: int, freq: str, fmt: str, seed: int = 0) -> bytes:
+    """File bytes for a synthetic upload in `fmt` ('csv' or 'xlsx').
+
+    Files are cached on disk, since writing large workbooks takes much longer
+    than reading them.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"{fmt}-{freq}-{rows}-{seed}.{fmt}")
+    if os.path.exists(path):
+        with open(path, "rb") as handle:
+            return handle.read()
+
+    df = synthetic_frame(rows, freq, seed)
+    buffer = io.BytesIO()
+    if fmt == "csv":
+        df.to_csv(buffer, index=False, date_format="%Y-%m-%d")
+    elif fmt == "xlsx":
+        df.to_excel(buffer, index=False)
+    else:
+        raise ValueError(f"Unsupported benchmark format: {fmt}")
+
+    data = buffer.getvalue()
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(data)
+    os.replace(temp_path, path)
+    return data
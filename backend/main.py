@@ -1,20 +1,130 @@
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-from routers import forecast, ai_adjust, geo_data
+from routers import geo_data, profiles
 from models.schemas import ErrorResponse
+from services.executor import get_forecast_executor
+from services.geo_index import get_geo_index
+from services.metrics import POOL_IN_FLIGHT
+from services.profiling import ProfilingError, get_request_profiler, profile_token
+from services.warmup import Warmup
 
 load_dotenv()
 
+# Allowance for multipart boundaries and form fields on top of the file itself
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+# Routers that import the forecasting stack (pandas, prophet, httpx): loaded
+# by the warm-up after the app is serving, as (module, tag)
+FORECAST_ROUTERS = (
+    ("routers.forecast", "forecast"),
+    ("routers.jobs", "forecast-jobs"),
+    ("routers.models", "models"),
+    ("routers.ai_adjust", "ai-adjustment")
+)
+FORECAST_PATH_PREFIXES = ("/api/forecast", "/api/models", "/api/ai-adjust")
+
+
+def include_forecast_routers(loaded):
+    # Runs on the event loop once the warm-up has imported the routers
+    from services.job_queue import get_job_queue
+    from services.perplexity_client import open_http_client
+
+    for module, tag in FORECAST_ROUTERS:
+        app.include_router(loaded[module].router, prefix="/api", tags=[tag])
+    app.openapi_schema = None
+    open_http_client()
+    get_job_queue().start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve cheap endpoints at once; the forecasting stack, warm workers and
+    # the shared Perplexity connection pool come up in the background
+    # (see /ready) and are torn down on exit
+    get_geo_index()
+    executor = get_forecast_executor()
+    POOL_IN_FLIGHT.set_function(lambda: executor.in_flight)
+    app.state.warmup = warmup = Warmup()
+    warmup_task = asyncio.create_task(warmup.run(
+        [module for module, _ in FORECAST_ROUTERS], include_forecast_routers, executor
+    ))
+    yield
+    warmup_task.cancel()
+    await asyncio.gather(warmup_task, return_exceptions=True)
+    if warmup.stack_loaded:
+        from services.job_queue import get_job_queue
+        from services.perplexity_client import close_http_client
+
+        await get_job_queue().stop()
+        await close_http_client()
+    executor.shutdown()
+
+
 app = FastAPI(
     title="AI Forecasting API",
     description="B2B Sales Forecasting with Prophet and AI Adjustment",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    # Refuse uploads by their declared size before the body is read;
+    # parse_forecast_upload also counts bytes for chunked requests.
+    content_length = request.headers.get("content-length")
+    if (request.method == "POST" and request.url.path.startswith("/api/forecast")
+            and content_length and content_length.isdigit()):
+        # Loaded by now: wait_for_forecast_stack runs before this middleware
+        from routers import forecast
+
+        if int(content_length) > forecast.MAX_FILE_SIZE + UPLOAD_FORM_OVERHEAD:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File size exceeds {forecast.MAX_FILE_SIZE // (1024 * 1024)}MB limit"}
+            )
+    return await call_next(request)
+
+@app.middleware("http")
+async def profile_forecast_requests(request: Request, call_next):
+    # Admins can profile a single forecast with the X-Profile-Token header
+    # or ?profile_token=...; the profile id comes back in X-Profile-Id
+    token = profile_token(request)
+    if token is None or request.method != "POST" or not request.url.path.startswith("/api/forecast"):
+        return await call_next(request)
+
+    info = {"path": request.url.path, "content_length": request.headers.get("content-length")}
+    try:
+        async with get_request_profiler().profile(token, info):
+            response = await call_next(request)
+            # Streaming bodies are produced after call_next returns
+            # and are not part of the profile
+            info["status_code"] = response.status_code
+    except ProfilingError as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": str(e)})
+    if "id" in info:
+        response.headers["X-Profile-Id"] = info["id"]
+    return response
+
+@app.middleware("http")
+async def wait_for_forecast_stack(request: Request, call_next):
+    # Forecast routes exist once the warm-up has imported them; until then
+    # their requests wait here instead of getting a 404
+    warmup = request.app.state.warmup
+    if not warmup.stack_loaded and request.url.path.startswith(FORECAST_PATH_PREFIXES):
+        if not await warmup.wait_for_stack():
+            return JSONResponse(
+                status_code=503,
+                content={"detail": f"Forecasting is unavailable: {warmup.error}"}
+            )
+    return await call_next(request)
+
 # --- ✅ RECOMMENDED CORS MIDDLEWARE ---
 # Replaced the custom middleware with FastAPI's built-in CORSMiddleware
 # for better reliability.
@@ -33,10 +143,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
-app.include_router(forecast.router, prefix="/api", tags=["forecast"])
-app.include_router(ai_adjust.router, prefix="/api", tags=["ai-adjustment"])
+# Include routers (forecast routers are added by include_forecast_routers)
 app.include_router(geo_data.router, prefix="/api", tags=["geo-data"])
+app.include_router(profiles.router, prefix="/api", tags=["profiles"])
 
 
 @app.get("/")
@@ -46,8 +155,22 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    # Liveness: answers as soon as the process serves, before the warm-up
     return {"status": "healthy"}
 
+
+@app.get("/ready")
+async def readiness_check(request: Request):
+    # Readiness: 200 once the forecasting stack, pool workers and Stan model are warm
+    warmup = request.app.state.warmup
+    return JSONResponse(status_code=200 if warmup.ready else 503, content=warmup.describe())
+
+
+@app.get("/metrics")
+async def metrics():
+    # Prometheus scrape endpoint (see services.metrics)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     return JSONResponse(
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 
@@ -37,6 +37,35 @@ class ForecastRequest(BaseModel):
     target_col: str
     apply_holidays: bool = True
     apply_ai_adjustment: bool = True
+    max_points: Optional[int] = None
+    engine: Literal["prophet", "ets", "seasonal_naive", "theta", "auto"] = "prophet"
+    incremental: bool = False
+    series_key: Optional[str] = None
+    include_fitted: bool = False
+    interval_mode: Literal["none", "fast", "full"] = "full"
+    interval_samples: int = 100
+    tune: bool = False
+    # Excel only: sheet name or 0-based index, and the 0-based header row
+    sheet: Optional[str] = None
+    header_row: int = Field(0, ge=0)
+
+
+class ModelPredictRequest(BaseModel):
+    horizon: int = Field(..., ge=1, le=365)
+    interval_width: Optional[float] = Field(None, gt=0, lt=1)
+    apply_ai_adjustment: bool = False
+    # Override the industry/city used for the AI adjustment at fit time
+    industry: Optional[str] = None
+    city: Optional[str] = None
+    max_points: Optional[int] = Field(None, ge=3)
+    interval_mode: Optional[Literal["none", "fast", "full"]] = None
+    interval_samples: Optional[int] = Field(None, ge=10, le=2000)
+
+
+class BatchForecastRequest(ForecastRequest):
+    series_cols: List[str]
+    # Keep each series' fitted model in the model store (off: batches would evict single forecasts)
+    store_models: bool = False
 
 
 class DataPoint(BaseModel):
@@ -49,6 +78,9 @@ class DataPoint(BaseModel):
 
 
 class ForecastMeta(BaseModel):
+    # Allow the model_id field name
+    model_config = ConfigDict(protected_namespaces=())
+
     freq: str
     train_start: str
     train_end: str
@@ -58,6 +90,19 @@ class ForecastMeta(BaseModel):
     processed_rows: int
     null_dates: int
     null_targets: int
+    cache_status: Optional[str] = None
+    engine: Optional[str] = None
+    model_id: Optional[str] = None
+    warm_start: Optional[bool] = None
+    fit_seconds: Optional[float] = None
+    tuning: Optional[Literal["searched", "remembered", "skipped"]] = None
+    tuned_params: Optional[Dict[str, Any]] = None
+    # Seconds per pipeline stage (read, clean, holidays, fit, predict, ai_adjustment)
+    timings: Optional[Dict[str, float]] = None
+    # Largest pool-stage memory high-water mark above the worker's baseline (MB)
+    peak_memory_mb: Optional[float] = None
+    history_points: Optional[int] = None
+    history_points_returned: Optional[int] = None
 
 
 class ForecastResponse(BaseModel):
@@ -68,6 +113,57 @@ class ForecastResponse(BaseModel):
     forecast_final: List[DataPoint]
 
 
+class SeriesForecastResult(BaseModel):
+    key: Dict[str, str]
+    status: Literal["succeeded", "failed"]
+    error: Optional[str] = None
+    forecast: Optional[ForecastResponse] = None
+
+
+class BatchForecastResponse(BaseModel):
+    total_series: int
+    succeeded: int
+    failed: int
+    series: List[SeriesForecastResult]
+
+
+class BacktestMetrics(BaseModel):
+    step: Optional[int] = None  # Horizon step (1-based); None for the overall row
+    count: int
+    mape: Optional[float] = None
+    rmse: Optional[float] = None
+    mae: Optional[float] = None
+    coverage: Optional[float] = None
+
+
+class BacktestMeta(BaseModel):
+    freq: str
+    engine: str
+    horizon: int
+    initial: int
+    period: int
+    cutoffs: List[str]
+    processed_rows: int
+    elapsed_seconds: float
+    cache_status: Optional[str] = None
+
+
+class BacktestResponse(BaseModel):
+    meta: BacktestMeta
+    steps: List[BacktestMetrics]
+    overall: BacktestMetrics
+
+
+class ForecastJobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    stage: Optional[str] = None
+    stages: List[str] = []
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+
 class ErrorResponse(BaseModel):
     error: str
     detail: Optional[str] = None
\ No newline at end of file
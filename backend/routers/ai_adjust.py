@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from models.schemas import AIAdjustmentRequest, AIAdjustmentResponse, ErrorResponse
 from services.perplexity_client import PerplexityClient
 import logging
@@ -6,8 +6,13 @@ import logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+def get_perplexity_client():
+    # Cheap to build: the HTTP connection pool itself is shared app-wide
+    return PerplexityClient()
+
 @router.post("/ai-adjust", response_model=AIAdjustmentResponse)
-async def get_ai_adjustment(request: AIAdjustmentRequest):
+async def get_ai_adjustment(request: AIAdjustmentRequest,
+                            client: PerplexityClient = Depends(get_perplexity_client)):
     """
     Get AI-powered forecast adjustment based on macro factors.
     
@@ -25,10 +30,9 @@ async def get_ai_adjustment(request: AIAdjustmentRequest):
             raise HTTPException(status_code=400, detail="Frequency must be D, W, or M")
         
         # Call Perplexity service
-        client = PerplexityClient()
-        adjustment = await client.get_adjustment(request)
+        adjustment, cache_status = await client.get_adjustment_cached(request)
         
-        logger.info(f"AI adjustment: {adjustment.adjustment_pct}% - {adjustment.rationale}")
+        logger.info(f"AI adjustment ({cache_status}): {adjustment.adjustment_pct}% - {adjustment.rationale}")
         return adjustment
         
     except HTTPException:
@@ -1,19 +1,37 @@
 from fastapi import APIRouter, HTTPException, File, UploadFile, Form, Depends
-from fastapi.responses import JSONResponse
-from typing import Optional
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import AsyncIterator, Optional, Tuple
 import logging
+import os
 
-from models.schemas import ForecastResponse, ForecastRequest, ErrorResponse
-from services.prophet_service import ProphetService
+from models.schemas import (
+    ForecastResponse, ForecastRequest, ErrorResponse,
+    BatchForecastRequest, BatchForecastResponse, BacktestResponse
+)
+from services.prophet_service import (
+    INTERVAL_MODES, MAX_INTERVAL_SAMPLES, MIN_INTERVAL_SAMPLES, ProphetService, get_prophet_service
+)
+from services.executor import StageTimeoutError, WorkerCrashedError
+from services.decimation import MIN_DECIMATED_POINTS
+from services.engines import ENGINES
+from services.metrics import SERIALIZE_SECONDS
+from services.memory import MemoryBudgetExceededError
+from services.ingest import COLUMNAR_EXTENSIONS, UploadSource, UploadTooLargeError, spool_upload
+from services.response_formats import (
+    ARROW_STREAM_MEDIA_TYPE, RESPONSE_FORMATS, encode_arrow, encode_columnar_json
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-def get_prophet_service():
-    return ProphetService()
+# Upload size limits: streamed CSVs and column-projected Parquet/Arrow files
+# can be much larger than formats that are parsed in memory in one go
+MAX_FILE_SIZE = int(float(os.getenv("FORECAST_MAX_UPLOAD_MB", "500")) * 1024 * 1024)
+MAX_BUFFERED_FILE_SIZE = int(float(os.getenv("FORECAST_MAX_BUFFERED_UPLOAD_MB", "10")) * 1024 * 1024)
+STREAMABLE_EXTENSIONS = ('.csv',) + COLUMNAR_EXTENSIONS
+ALLOWED_EXTENSIONS = ('.csv', '.xlsx', '.xls') + COLUMNAR_EXTENSIONS
 
-@router.post("/forecast", response_model=ForecastResponse)
-async def generate_forecast(
+async def parse_forecast_upload(
     file: UploadFile = File(...),
     industry: str = Form(...),
     country: str = Form(...),
@@ -25,71 +43,148 @@ async def generate_forecast(
     city: Optional[str] = Form(None),
     apply_holidays: bool = Form(True),
     apply_ai_adjustment: bool = Form(True),
+    max_points: Optional[int] = Form(None),
+    engine: str = Form("prophet"),
+    incremental: bool = Form(False),
+    series_key: Optional[str] = Form(None),
+    include_fitted: bool = Form(False),
+    interval_mode: str = Form("full"),
+    interval_samples: int = Form(100),
+    tune: bool = Form(False),
+    sheet: Optional[str] = Form(None),
+    header_row: int = Form(0)
+) -> AsyncIterator[Tuple[UploadSource, str, ForecastRequest]]:
+    """Validate the multipart forecast form shared by the sync, batch and job endpoints.
+
+    The upload is copied in chunks (hashed and size-checked as it streams) and
+    its temp file is removed once the response has been sent.
+    """
+    # Validate inputs
+    if freq not in ["D", "W", "M"]:
+        raise HTTPException(status_code=400, detail="Frequency must be 'D', 'W', or 'M'")
+
+    if horizon <= 0 or horizon > 365:
+        raise HTTPException(status_code=400, detail="Horizon must be between 1 and 365")
+
+    if not industry or not country:
+        raise HTTPException(status_code=400, detail="Industry and country are required")
+
+    if engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Engine must be one of: {', '.join(ENGINES)}")
+
+    if max_points is not None and max_points < MIN_DECIMATED_POINTS:
+        raise HTTPException(status_code=400, detail=f"max_points must be at least {MIN_DECIMATED_POINTS}")
+
+    if interval_mode not in INTERVAL_MODES:
+        raise HTTPException(status_code=400, detail=f"interval_mode must be one of: {', '.join(INTERVAL_MODES)}")
+
+    if interval_samples < MIN_INTERVAL_SAMPLES or interval_samples > MAX_INTERVAL_SAMPLES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"interval_samples must be between {MIN_INTERVAL_SAMPLES} and {MAX_INTERVAL_SAMPLES}"
+        )
+
+    if header_row < 0:
+        raise HTTPException(status_code=400, detail="header_row must be 0 or greater")
+
+    # Validate file type
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="File name is required")
+
+    if not file.filename.lower().endswith(ALLOWED_EXTENSIONS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"File must have one of these extensions: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+
+    # CSV and columnar formats are read in bounded memory; Excel is loaded whole
+    streamable = file.filename.lower().endswith(STREAMABLE_EXTENSIONS)
+    max_file_size = MAX_FILE_SIZE if streamable else MAX_BUFFERED_FILE_SIZE
+
+    # Read file content
+    try:
+        source = await spool_upload(file, max_file_size)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Create request object
+    request = ForecastRequest(
+        industry=industry,
+        country=country,
+        state=state,
+        city=city,
+        freq=freq,
+        horizon=horizon,
+        date_col=date_col,
+        target_col=target_col,
+        apply_holidays=apply_holidays,
+        apply_ai_adjustment=apply_ai_adjustment,
+        max_points=max_points,
+        engine=engine,
+        incremental=incremental,
+        series_key=series_key,
+        include_fitted=include_fitted,
+        interval_mode=interval_mode,
+        interval_samples=interval_samples,
+        tune=tune,
+        sheet=sheet or None,
+        header_row=header_row
+    )
+
+    logger.warning(f"DEBUG: Forecast request: {industry} in {country} (state={state}, city={city}), {freq}-frequency, {horizon} periods, holidays={apply_holidays}, ai_adj={apply_ai_adjustment}")
+
+    try:
+        yield source, file.filename, request
+    finally:
+        source.cleanup()
+
+@router.post("/forecast", response_model=ForecastResponse)
+async def generate_forecast(
+    upload: Tuple[UploadSource, str, ForecastRequest] = Depends(parse_forecast_upload),
+    response_format: str = Form("json"),
     service: ProphetService = Depends(get_prophet_service)
 ):
     """
     Generate sales forecast using Prophet with optional AI adjustment.
-    
+
     Upload a CSV or Excel file with historical sales data and get back
     a forecast with baseline and AI-adjusted predictions.
+
+    `response_format` selects the encoding: `json` (ForecastResponse, default),
+    `columnar` (parallel arrays per field) or `arrow` (Arrow IPC stream).
     """
-    try:
-        # Validate file size (10MB limit)
-        MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-        
-        # Read file content
-        file_content = await file.read()
-        if len(file_content) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File size exceeds 10MB limit. Got {len(file_content) / 1024 / 1024:.1f}MB"
-            )
-        
-        # Validate inputs
-        if freq not in ["D", "W", "M"]:
-            raise HTTPException(status_code=400, detail="Frequency must be 'D', 'W', or 'M'")
-        
-        if horizon <= 0 or horizon > 365:
-            raise HTTPException(status_code=400, detail="Horizon must be between 1 and 365")
-        
-        if not industry or not country:
-            raise HTTPException(status_code=400, detail="Industry and country are required")
-        
-        # Validate file type
-        if not file.filename:
-            raise HTTPException(status_code=400, detail="File name is required")
-        
-        allowed_extensions = ['.csv', '.xlsx', '.xls']
-        if not any(file.filename.lower().endswith(ext) for ext in allowed_extensions):
-            raise HTTPException(
-                status_code=400,
-                detail=f"File must have one of these extensions: {', '.join(allowed_extensions)}"
-            )
-        
-        # Create request object
-        request = ForecastRequest(
-            industry=industry,
-            country=country,
-            state=state,
-            city=city,
-            freq=freq,
-            horizon=horizon,
-            date_col=date_col,
-            target_col=target_col,
-            apply_holidays=apply_holidays,
-            apply_ai_adjustment=apply_ai_adjustment
+    if response_format not in RESPONSE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"response_format must be one of: {', '.join(RESPONSE_FORMATS)}"
         )
-        
-        logger.warning(f"DEBUG: Forecast request: {industry} in {country} (state={state}, city={city}), {freq}-frequency, {horizon} periods, holidays={apply_holidays}, ai_adj={apply_ai_adjustment}")
-        
+
+    try:
+        file_content, filename, request = upload
+
         # Generate forecast
-        result = await service.generate_forecast(file_content, file.filename, request)
-        
-        logger.info(f"Forecast generated successfully: {len(result.forecast_base)} periods")
-        return result
-        
+        frames = await service.generate_forecast_frames(file_content, filename, request)
+        logger.info(f"Forecast generated successfully: {len(frames[2])} periods")
+
+        # For json this times building the response model; FastAPI encodes it afterwards
+        with SERIALIZE_SECONDS.labels(response_format).time():
+            if response_format == "columnar":
+                return Response(encode_columnar_json(*frames), media_type="application/json")
+            if response_format == "arrow":
+                return Response(encode_arrow(*frames), media_type=ARROW_STREAM_MEDIA_TYPE)
+            return service.build_response(*frames)
+
     except HTTPException:
         raise
+    except StageTimeoutError as e:
+        logger.error(f"Forecast timed out: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except WorkerCrashedError as e:
+        logger.error(f"Forecast worker crashed: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except MemoryBudgetExceededError as e:
+        logger.error(f"Memory budget exceeded: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
     except ValueError as e:
         logger.error(f"Validation error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -100,7 +195,122 @@ async def generate_forecast(
             detail=f"Internal server error: {str(e)}"
         )
 
+@router.post("/forecast/batch", response_model=BatchForecastResponse)
+async def generate_batch_forecast(
+    upload: Tuple[UploadSource, str, ForecastRequest] = Depends(parse_forecast_upload),
+    series_col: str = Form(...),
+    stream: bool = Form(False),
+    store_models: bool = Form(False),
+    service: ProphetService = Depends(get_prophet_service)
+):
+    """
+    Forecast many series (SKUs, stores, ...) from a single upload.
+
+    `series_col` names the key column, or several comma-separated key columns.
+    Each series is fitted in parallel and failures are reported per series.
+    With `stream=true` the response is NDJSON, one SeriesForecastResult per
+    line as each series finishes. `store_models=true` keeps each series'
+    Prophet model in the model store (with a model_id) for re-prediction.
+    """
+    try:
+        file_content, filename, request = upload
+        series_cols = [col.strip() for col in series_col.split(',') if col.strip()]
+        if not series_cols:
+            raise HTTPException(status_code=400, detail="At least one series column is required")
+
+        batch_request = BatchForecastRequest(
+            **request.model_dump(), series_cols=series_cols, store_models=store_models
+        )
+        total, results = await service.generate_batch_forecast(file_content, filename, batch_request)
+        logger.info(f"Batch forecast started for {total} series")
+
+        if stream:
+            async def ndjson():
+                async for result in results:
+                    yield result.model_dump_json() + "\n"
+
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+        series = [result async for result in results]
+        succeeded = sum(1 for result in series if result.status == "succeeded")
+        return BatchForecastResponse(
+            total_series=total,
+            succeeded=succeeded,
+            failed=len(series) - succeeded,
+            series=series
+        )
+
+    except HTTPException:
+        raise
+    except StageTimeoutError as e:
+        logger.error(f"Batch forecast timed out: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except WorkerCrashedError as e:
+        logger.error(f"Batch forecast worker crashed: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except MemoryBudgetExceededError as e:
+        logger.error(f"Memory budget exceeded: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        logger.error(f"Batch validation error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Batch forecast failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@router.post("/forecast/backtest", response_model=BacktestResponse)
+async def backtest_forecast(
+    upload: Tuple[UploadSource, str, ForecastRequest] = Depends(parse_forecast_upload),
+    initial: Optional[int] = Form(None),
+    period: Optional[int] = Form(None),
+    service: ProphetService = Depends(get_prophet_service)
+):
+    """
+    Rolling-origin cross-validation of the forecast settings on an upload.
+
+    Each cutoff is fitted on the history before it and scored on the next
+    `horizon` periods. `initial` (training periods before the first cutoff,
+    default 3 x horizon) and `period` (periods between cutoffs, default
+    horizon / 2) are in units of `freq`. Returns MAPE, RMSE, MAE and interval
+    coverage per horizon step and overall.
+    """
+    if initial is not None and initial < 2:
+        raise HTTPException(status_code=400, detail="initial must be at least 2 periods")
+
+    if period is not None and period < 1:
+        raise HTTPException(status_code=400, detail="period must be at least 1")
+
+    try:
+        file_content, filename, request = upload
+        result = await service.backtest(file_content, filename, request, initial, period)
+        logger.info(f"Backtest finished: {len(result.meta.cutoffs)} cutoffs ({result.meta.cache_status})")
+        return result
+
+    except HTTPException:
+        raise
+    except StageTimeoutError as e:
+        logger.error(f"Backtest timed out: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except WorkerCrashedError as e:
+        logger.error(f"Backtest worker crashed: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except MemoryBudgetExceededError as e:
+        logger.error(f"Memory budget exceeded: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        logger.error(f"Backtest validation error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Backtest failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint for the forecast service."""
-    return {"status": "healthy", "service": "forecast"}
\ No newline at end of file
+    return {"status": "healthy", "service": "forecast"}
@@ -1,44 +1,57 @@
-from fastapi import APIRouter
-import pycountry
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import Response
+from typing import Literal, Optional
+
+from services.geo_index import GeoIndex, GeoPayload, MAX_SEARCH_RESULTS, get_geo_index
 
 router = APIRouter()
 
+# Geo data only changes with a pycountry upgrade (i.e. a redeploy); ETags
+# let clients revalidate cheaply after max-age
+GEO_CACHE_CONTROL = "public, max-age=86400"
+
+
+def _payload_response(request: Request, payload: GeoPayload) -> Response:
+    """Serve a pre-serialised payload, gzipped when accepted, with 304 revalidation."""
+    use_gzip = "gzip" in request.headers.get("accept-encoding", "").lower()
+    etag = payload.gzip_etag if use_gzip else payload.etag
+    headers = {"ETag": etag, "Cache-Control": GEO_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(payload.gzip_body, media_type="application/json", headers=headers)
+    return Response(payload.body, media_type="application/json", headers=headers)
+
 @router.get("/countries")
-async def get_countries():
+async def get_countries(request: Request, index: GeoIndex = Depends(get_geo_index)):
     """Get list of all countries"""
-    countries = []
-    for country in pycountry.countries:
-        countries.append({
-            "value": country.alpha_2,
-            "label": country.name,
-            "code": country.alpha_2
-        })
-    
-    # Sort by name for better UX
-    countries.sort(key=lambda x: x["label"])
-    return {"countries": countries}
+    return _payload_response(request, index.countries)
 
 @router.get("/subdivisions/{country_code}")
-async def get_subdivisions(country_code: str):
+async def get_subdivisions(country_code: str, request: Request,
+                           index: GeoIndex = Depends(get_geo_index)):
     """Get states/provinces for a specific country"""
-    subdivisions = []
-    
-    try:
-        for subdivision in pycountry.subdivisions:
-            if subdivision.country_code == country_code.upper():
-                subdivisions.append({
-                    "value": subdivision.code,
-                    "label": subdivision.name,
-                    "code": subdivision.code,
-                    "type": subdivision.type
-                })
-        
-        # Sort by name
-        subdivisions.sort(key=lambda x: x["label"])
-        return {"subdivisions": subdivisions}
-    
-    except Exception as e:
-        return {"subdivisions": [], "error": str(e)}
+    return _payload_response(request, index.subdivisions_for(country_code))
+
+@router.get("/geo/search")
+async def search_locations(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_RESULTS),
+    kind: Optional[Literal["country", "subdivision"]] = None,
+    country: Optional[str] = None,
+    index: GeoIndex = Depends(get_geo_index)
+):
+    """Typeahead over country and subdivision names and codes.
+
+    Matches name prefixes, word prefixes ('york' finds 'New York') and codes
+    ('US-CA', 'CA'); falls back to fuzzy matching when nothing matches a prefix.
+    `country` restricts results to one country's subdivisions.
+    """
+    return {"results": index.search(q, limit=limit, kind=kind, country_code=country)}
 
 # For cities, we'll use a simple approach since pycountry doesn't have city data
 # You could integrate with other APIs like GeoNames, but for now we'll keep it simple
@@ -47,4 +60,4 @@ async def get_cities(subdivision_code: str):
     """Get cities for a specific subdivision (placeholder implementation)"""
     # This is a placeholder - in a real app you'd integrate with a proper city database
     # For now, we'll return an empty list and let users type city names
-    return {"cities": [], "message": "City selection not implemented - please type city name"}
\ No newline at end of file
+    return {"cities": [], "message": "City selection not implemented - please type city name"}
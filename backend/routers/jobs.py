@@ -0,0 +1,80 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from typing import Tuple
+import logging
+
+from models.schemas import ForecastJobStatus, ForecastRequest, ForecastResponse
+from routers.forecast import parse_forecast_upload
+from services.ingest import UploadSource
+from services.job_queue import ForecastJob, ForecastJobQueue, QueueFullError, get_job_queue
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+def _get_job(queue: ForecastJobQueue, job_id: str) -> ForecastJob:
+    job = queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Forecast job '{job_id}' not found")
+    return job
+
+@router.post("/forecast/jobs", response_model=ForecastJobStatus, status_code=202)
+async def submit_forecast_job(
+    upload: Tuple[UploadSource, str, ForecastRequest] = Depends(parse_forecast_upload),
+    queue: ForecastJobQueue = Depends(get_job_queue)
+):
+    """
+    Queue a forecast and return immediately with a job id.
+
+    Takes the same form fields as `POST /forecast`. Poll the status endpoint
+    or subscribe to the events stream, then fetch the result.
+    """
+    source, filename, request = upload
+    try:
+        # The job outlives this request, so it takes over the spooled upload
+        job = queue.submit(source.detach(), filename, request)
+    except QueueFullError as e:
+        logger.warning(f"Rejected forecast job: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+    logger.info(f"Queued forecast job {job.job_id}")
+    return job.to_status()
+
+@router.get("/forecast/jobs/{job_id}", response_model=ForecastJobStatus)
+async def get_forecast_job(job_id: str, queue: ForecastJobQueue = Depends(get_job_queue)):
+    """Get the status and completed stages of a forecast job."""
+    return _get_job(queue, job_id).to_status()
+
+@router.get("/forecast/jobs/{job_id}/result", response_model=ForecastResponse)
+async def get_forecast_job_result(job_id: str, queue: ForecastJobQueue = Depends(get_job_queue)):
+    """Get the forecast produced by a finished job."""
+    job = _get_job(queue, job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=job.error_code or 500, detail=job.error)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Forecast job is still {job.status}")
+    return job.result
+
+@router.get("/forecast/jobs/{job_id}/events")
+async def stream_forecast_job_events(job_id: str, queue: ForecastJobQueue = Depends(get_job_queue)):
+    """
+    Server-sent events stream of job progress.
+
+    Emits a `status` event (ForecastJobStatus JSON) whenever the job moves to
+    a new stage (parsed, cleaned, fitted, predicted, ai_adjusted) and closes
+    once it has succeeded or failed.
+    """
+    _get_job(queue, job_id)
+
+    async def event_stream():
+        async for status in queue.events(job_id):
+            if status is None:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: status\ndata: {status.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
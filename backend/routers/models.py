@@ -0,0 +1,46 @@
+from fastapi import APIRouter, HTTPException, Depends
+import logging
+
+from models.schemas import ForecastResponse, ModelPredictRequest
+from services.prophet_service import ProphetService, get_prophet_service
+from services.executor import StageTimeoutError, WorkerCrashedError
+from services.model_store import ModelNotFoundError
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.post("/models/{model_id}/predict", response_model=ForecastResponse)
+async def predict_from_model(
+    model_id: str,
+    predict_request: ModelPredictRequest,
+    service: ProphetService = Depends(get_prophet_service)
+):
+    """
+    Predict a new horizon from a previously fitted Prophet model.
+
+    `model_id` comes from `meta.model_id` of a forecast response. Nothing is
+    uploaded or refitted: the stored model predicts the requested horizon,
+    optionally with a different interval width and a fresh AI adjustment.
+    """
+    try:
+        result = await service.predict_from_model(model_id, predict_request)
+        logger.info(f"Predicted {predict_request.horizon} periods from stored model {model_id}")
+        return result
+
+    except ModelNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Model '{model_id}' not found or expired")
+    except StageTimeoutError as e:
+        logger.error(f"Model prediction timed out: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except WorkerCrashedError as e:
+        logger.error(f"Model prediction worker crashed: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        logger.error(f"Model prediction error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Model prediction failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
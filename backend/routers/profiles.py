@@ -0,0 +1,57 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import FileResponse, PlainTextResponse
+from typing import Any, Dict, List
+import logging
+
+from services.profiling import (
+    ProfileNotFoundError, ProfilingError, RequestProfiler, get_request_profiler, profile_token
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls", "time")
+
+def require_profiling_token(request: Request) -> RequestProfiler:
+    """Admin gate: the same token that enables profiling reads the profiles."""
+    profiler = get_request_profiler()
+    try:
+        profiler.authorize(profile_token(request))
+    except ProfilingError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return profiler
+
+@router.get("/profiles")
+async def list_profiles(
+    profiler: RequestProfiler = Depends(require_profiling_token)
+) -> List[Dict[str, Any]]:
+    """Stored request profiles, newest first."""
+    return profiler.store.list()
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("text", pattern="^(text|pstats)$"),
+    sort: str = Query("cumulative"),
+    limit: int = Query(50, ge=1, le=1000),
+    profiler: RequestProfiler = Depends(require_profiling_token)
+):
+    """
+    A stored profile: a text report of the top functions by `sort`, or the
+    raw pstats file (`format=pstats`) for snakeviz, pstats or similar tools.
+    """
+    if sort not in PROFILE_SORT_KEYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"sort must be one of: {', '.join(PROFILE_SORT_KEYS)}"
+        )
+    try:
+        if format == "pstats":
+            return FileResponse(
+                profiler.store.pstats_path(profile_id),
+                media_type="application/octet-stream",
+                filename=f"{profile_id}.prof"
+            )
+        return PlainTextResponse(profiler.store.report(profile_id, sort, limit))
+    except ProfileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found or expired")
@@ -0,0 +1,90 @@
+"""Rolling-origin backtesting: cutoff placement and per-step accuracy metrics."""
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.schemas import BacktestMetrics
+
+# Newest cutoffs kept per backtest; each cutoff is one full fit
+BACKTEST_MAX_CUTOFFS = int(os.getenv("BACKTEST_MAX_CUTOFFS", "20"))
+
+
+def backtest_window(horizon: int, initial: Optional[int] = None,
+                    period: Optional[int] = None) -> Tuple[int, int]:
+    """(initial, period) in periods, defaulting like Prophet to 3 * horizon and horizon / 2."""
+    return initial or 3 * horizon, period or max(1, horizon // 2)
+
+
+def rolling_cutoffs(n_rows: int, horizon: int, initial: int, period: int,
+                    max_cutoffs: int = BACKTEST_MAX_CUTOFFS) -> List[int]:
+    """Training lengths (rows before each cutoff), oldest first.
+
+    Like Prophet's cross_validation, cutoffs step back `period` rows from the
+    last one that still leaves a full `horizon` to score, and the first needs
+    `initial` training rows. Only the newest `max_cutoffs` are kept.
+    """
+    last = n_rows - horizon
+    if last < initial:
+        raise ValueError(
+            f"Backtest needs at least initial + horizon = {initial + horizon} periods, "
+            f"the series has {n_rows}"
+        )
+    cutoffs = list(range(last, initial - 1, -period))[:max_cutoffs]
+    return cutoffs[::-1]
+
+
+def align_forecasts(df_clean: pd.DataFrame, cutoffs: Sequence[int],
+                    forecasts: Sequence[pd.DataFrame]) -> Tuple[np.ndarray, ...]:
+    """Stack actuals and forecasts into (cutoff, step) arrays.
+
+    Step k of the forecast from `cutoff` is scored against history row
+    cutoff + k. Matching by position rather than date keeps weekly series
+    working: history weeks are labelled by their first day, forecast weeks by
+    Prophet's W-MON dates. Steps past the end of the history are NaN and left
+    out of the metrics.
+    """
+    y = df_clean['y'].to_numpy(dtype=np.float64)
+    actual, yhat, lower, upper = [], [], [], []
+    for cutoff, forecast in zip(cutoffs, forecasts):
+        steps = np.full(len(forecast), np.nan)
+        observed = y[cutoff:cutoff + len(forecast)]
+        steps[:len(observed)] = observed
+        actual.append(steps)
+        yhat.append(forecast['yhat'].to_numpy(dtype=np.float64))
+        lower.append(forecast['yhat_lower'].to_numpy(dtype=np.float64))
+        upper.append(forecast['yhat_upper'].to_numpy(dtype=np.float64))
+    return np.vstack(actual), np.vstack(yhat), np.vstack(lower), np.vstack(upper)
+
+
+def accuracy_metrics(actual: np.ndarray, yhat: np.ndarray, lower: np.ndarray,
+                     upper: np.ndarray) -> Tuple[List[BacktestMetrics], BacktestMetrics]:
+    """MAPE, RMSE, MAE and interval coverage per horizon step and overall.
+
+    Inputs are (cutoff, step) arrays; MAPE skips zero actuals.
+    """
+    steps = [
+        _metrics(actual[:, step], yhat[:, step], lower[:, step], upper[:, step], step + 1)
+        for step in range(actual.shape[1])
+    ]
+    return steps, _metrics(actual.ravel(), yhat.ravel(), lower.ravel(), upper.ravel())
+
+
+def _metrics(actual: np.ndarray, yhat: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+             step: Optional[int] = None) -> BacktestMetrics:
+    scored = ~np.isnan(actual)
+    if not scored.any():
+        return BacktestMetrics(step=step, count=0)
+    actual, yhat, lower, upper = actual[scored], yhat[scored], lower[scored], upper[scored]
+    errors = actual - yhat
+    nonzero = actual != 0
+    mape = float(np.mean(np.abs(errors[nonzero] / actual[nonzero]))) if nonzero.any() else None
+    return BacktestMetrics(
+        step=step,
+        count=int(scored.sum()),
+        mape=round(mape, 4) if mape is not None else None,
+        rmse=round(float(np.sqrt(np.mean(errors ** 2))), 4),
+        mae=round(float(np.mean(np.abs(errors))), 4),
+        coverage=round(float(np.mean((actual >= lower) & (actual <= upper))), 4)
+    )
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """In-memory LRU cache with per-entry TTL, a byte budget and single-flight loading.
+
+    Not thread-safe: use it from the event loop only.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: Optional[float] = 3600,
+                 max_bytes: Optional[int] = None,
+                 sizeof: Optional[Callable[[Any], int]] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        # key -> (expires_at, size, value), oldest first
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry (refreshing its LRU position) or `default`."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._evict(key)
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting least recently used entries to stay within bounds."""
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            logger.info(f"Cache entry of {size} bytes exceeds budget, not caching")
+            return
+
+        if key in self._entries:
+            self._evict(key)
+
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else float("inf")
+        self._entries[key] = (expires_at, size, value)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            self._evict(next(iter(self._entries)))
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def _evict(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    async def get_or_compute(self, key: Hashable, factory: Callable[[], Awaitable[Any]],
+                             cacheable: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, str]:
+        """Return (value, status) where status is 'hit', 'coalesced' or 'miss'.
+
+        Concurrent callers asking for a key that is still being computed wait
+        for the same result instead of running `factory` again. A result for
+        which `cacheable` returns False is shared with those callers but not stored.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value, "hit"
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight), "coalesced"
+
+        # The shared computation runs as its own task so a caller that goes away
+        # (client disconnect) does not cancel it for everyone else waiting.
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done, cacheable))
+        return await asyncio.shield(task), "miss"
+
+    def _finish(self, key: Hashable, task: asyncio.Future,
+                cacheable: Optional[Callable[[Any], bool]] = None):
+        self._inflight.pop(key, None)
+        # exception() also marks failures as retrieved when nobody awaited them
+        if not task.cancelled() and task.exception() is None:
+            if cacheable is None or cacheable(task.result()):
+                self.set(key, task.result())
+
+
+def _frame_bytes(value: Any) -> int:
+    """Approximate memory held by a cached pipeline result (tuple of frames and models)."""
+    items = value if isinstance(value, (tuple, list)) else (value,)
+    total = 0
+    for item in items:
+        memory_usage = getattr(item, "memory_usage", None)
+        if callable(memory_usage):
+            total += int(memory_usage(index=True, deep=True).sum())
+        else:
+            total += 1024
+    return total
+
+
+_forecast_cache: Optional[TTLCache] = None
+
+
+def get_forecast_cache() -> TTLCache:
+    """Return the process-wide cache of fitted forecast results."""
+    global _forecast_cache
+    if _forecast_cache is None:
+        _forecast_cache = TTLCache(
+            max_entries=int(os.getenv("FORECAST_CACHE_MAX_ENTRIES", "256")),
+            ttl_seconds=float(os.getenv("FORECAST_CACHE_TTL", "3600")),
+            max_bytes=int(float(os.getenv("FORECAST_CACHE_MAX_MB", "256")) * 1024 * 1024),
+            sizeof=_frame_bytes
+        )
+    return _forecast_cache
+
+
+_adjustment_cache: Optional[TTLCache] = None
+
+
+def get_adjustment_cache() -> TTLCache:
+    """Return the process-wide cache of AI macro adjustments."""
+    global _adjustment_cache
+    if _adjustment_cache is None:
+        _adjustment_cache = TTLCache(
+            max_entries=int(os.getenv("AI_ADJUSTMENT_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=float(os.getenv("AI_ADJUSTMENT_CACHE_TTL", "21600"))
+        )
+    return _adjustment_cache
+
+
+_backtest_cache: Optional[TTLCache] = None
+
+
+def get_backtest_cache() -> TTLCache:
+    """Return the process-wide cache of backtest results."""
+    global _backtest_cache
+    if _backtest_cache is None:
+        _backtest_cache = TTLCache(
+            max_entries=int(os.getenv("BACKTEST_CACHE_MAX_ENTRIES", "256")),
+            ttl_seconds=float(os.getenv("BACKTEST_CACHE_TTL", "86400"))
+        )
+    return _backtest_cache
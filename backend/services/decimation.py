@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+# Smallest useful max_points: LTTB always keeps the first and last points
+MIN_DECIMATED_POINTS = 3
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+    
+    Keeps the first and last points and, from each of the `n_out - 2` equal
+    buckets in between, the point forming the largest triangle with the point
+    kept from the previous bucket and the mean of the next one. Bucket means and
+    per-bucket areas are NumPy operations; only the walk across buckets (which
+    depends on the previous choice) is a Python loop over `n_out` steps.
+    """
+    n = len(x)
+    if n_out >= n or n_out < MIN_DECIMATED_POINTS:
+        return np.arange(n)
+    
+    # Bucket boundaries over the interior points [1, n - 1)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    
+    # Mean of every bucket at once via cumulative sums; the final "next bucket"
+    # is the last point itself
+    cx = np.cumsum(np.concatenate(([0.0], x)))
+    cy = np.cumsum(np.concatenate(([0.0], y)))
+    counts = ends - starts
+    mean_x = np.append((cx[ends] - cx[starts]) / counts, x[-1])
+    mean_y = np.append((cy[ends] - cy[starts]) / counts, y[-1])
+    
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        ax, ay = x[a], y[a]
+        nx, ny = mean_x[bucket + 1], mean_y[bucket + 1]
+        # Twice the triangle area, linear in the candidate point (px, py)
+        area = np.abs((ax - nx) * (y[start:end] - ay) - (ax - x[start:end]) * (ny - ay))
+        a = start + int(np.argmax(area))
+        kept[bucket + 1] = a
+    return kept
+
+
+def decimate_series(df: pd.DataFrame, max_points: int, value_col: str = 'y') -> pd.DataFrame:
+    """Downsample a ds/value frame to at most `max_points` rows with LTTB."""
+    if max_points is None or len(df) <= max_points:
+        return df
+    
+    x = df['ds'].to_numpy(dtype='datetime64[s]').astype(np.float64)
+    y = df[value_col].to_numpy(dtype=np.float64)
+    return df.iloc[lttb_indices(x, y, max_points)].reset_index(drop=True)
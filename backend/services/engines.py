@@ -0,0 +1,258 @@
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ('prophet', 'ets', 'seasonal_naive', 'theta', 'auto')
+
+# Season length per frequency. Daily data uses the weekly cycle; only Prophet
+# also models yearly seasonality on daily data.
+SEASON_LENGTHS = {'D': 7, 'W': 52, 'M': 12}
+
+# Prophet's default interval_width is 0.8; the NumPy engines match it
+INTERVAL_Z = 1.2815515655446004
+
+EngineResult = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def season_length(freq: str, n: int) -> int:
+    """Season length for `freq`, or 1 (no seasonality) without two full cycles."""
+    m = SEASON_LENGTHS.get(freq, 1)
+    return m if n >= 2 * m else 1
+
+
+def choose_engine(n: int, freq: str, busy: bool) -> str:
+    """Pick an engine for `engine=auto` from series length, frequency and pool load.
+    
+    Series without two full seasonal cycles get Theta, which is robust on short
+    data. Otherwise Prophet is used unless every pool worker is already busy,
+    in which case Holt-Winters answers in milliseconds instead of queueing a Stan fit.
+    """
+    if n < 2 * SEASON_LENGTHS.get(freq, 1):
+        return 'theta'
+    if busy:
+        return 'ets'
+    return 'prophet'
+
+
+def _intervals(yhat: np.ndarray, sigma_h: np.ndarray) -> EngineResult:
+    return yhat, yhat - INTERVAL_Z * sigma_h, yhat + INTERVAL_Z * sigma_h
+
+
+def seasonal_naive(y: np.ndarray, freq: str, horizon: int) -> EngineResult:
+    """Repeat the last observed season (the last value when there is no full season)."""
+    n = len(y)
+    m = SEASON_LENGTHS.get(freq, 1)
+    if n <= m:
+        m = 1
+    
+    steps = np.arange(horizon)
+    yhat = y[n - m + steps % m]
+    
+    residuals = y[m:] - y[:-m]
+    sigma = np.sqrt(np.mean(residuals ** 2)) if len(residuals) else 0.0
+    # Each additional season ahead adds one more seasonal-difference error
+    return _intervals(yhat, sigma * np.sqrt(steps // m + 1))
+
+
+def seasonal_naive_fitted(y: np.ndarray, freq: str) -> np.ndarray:
+    """One-step-ahead in-sample fit: the value one season earlier (NaN for the first season)."""
+    n = len(y)
+    m = SEASON_LENGTHS.get(freq, 1)
+    if n <= m:
+        m = 1
+    fitted = np.full(n, np.nan)
+    fitted[m:] = y[:-m]
+    return fitted
+
+
+def _ses_filter(y: np.ndarray, alphas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Simple exponential smoothing for every alpha at once: (final levels, SSE)."""
+    level = np.full(len(alphas), y[0])
+    sse = np.zeros(len(alphas))
+    for value in y[1:]:
+        error = value - level
+        sse += error * error
+        level = level + alphas * error
+    return level, sse
+
+
+def _seasonal_indices(y: np.ndarray, m: int) -> np.ndarray:
+    """Multiplicative seasonal indices from a classical (centred moving average) decomposition."""
+    if m % 2 == 0:
+        weights = np.r_[0.5, np.ones(m - 1), 0.5] / m
+    else:
+        weights = np.ones(m) / m
+    trend = np.convolve(y, weights, mode='valid')
+    offset = (len(weights) - 1) // 2
+    ratios = y[offset:offset + len(trend)] / trend
+    positions = np.arange(offset, offset + len(trend)) % m
+    indices = np.bincount(positions, weights=ratios, minlength=m) / np.bincount(positions, minlength=m)
+    return indices / indices.mean()
+
+
+def _is_seasonal(y: np.ndarray, m: int) -> bool:
+    """90% autocorrelation test at lag m, as in the classical Theta method.
+    
+    Run on first differences so a strong trend does not mask the seasonal lag.
+    """
+    diffs = np.diff(y)
+    n = len(diffs)
+    centred = diffs - diffs.mean()
+    denominator = np.dot(centred, centred)
+    if denominator == 0:
+        return False
+    acf = np.array([np.dot(centred[k:], centred[:n - k]) for k in range(1, m + 1)]) / denominator
+    limit = 1.645 * np.sqrt((1 + 2 * np.sum(acf[:-1] ** 2)) / n)
+    return abs(acf[-1]) > limit
+
+
+def _theta_model(y: np.ndarray, freq: str) -> Tuple[np.ndarray, np.ndarray, float, float, float, float]:
+    """(seasonal indices, adjusted series, alpha, final level, sigma, slope) of the Theta fit."""
+    n = len(y)
+    m = season_length(freq, n)
+    
+    indices = np.ones(max(m, 1))
+    if m > 1 and y.min() > 0 and _is_seasonal(y, m):
+        indices = _seasonal_indices(y, m)
+    adjusted = y / indices[np.arange(n) % len(indices)]
+    
+    alphas = np.linspace(0.01, 0.99, 99)
+    levels, sse = _ses_filter(adjusted, alphas)
+    best = int(np.argmin(sse))
+    sigma = np.sqrt(sse[best] / max(n - 1, 1))
+    slope = np.polyfit(np.arange(n), adjusted, 1)[0] if n > 1 else 0.0
+    return indices, adjusted, alphas[best], levels[best], sigma, slope
+
+
+def theta(y: np.ndarray, freq: str, horizon: int) -> EngineResult:
+    """Theta method: SES plus half the linear-trend drift, on seasonally adjusted data."""
+    n = len(y)
+    indices, _, alpha, level, sigma, slope = _theta_model(y, freq)
+    steps = np.arange(horizon)
+    drift = slope / 2 * (steps + (1 - (1 - alpha) ** n) / alpha)
+    
+    season = indices[(n + steps) % len(indices)]
+    yhat = (level + drift) * season
+    sigma_h = sigma * np.sqrt(1 + alpha ** 2 * steps) * season
+    return _intervals(yhat, sigma_h)
+
+
+def theta_fitted(y: np.ndarray, freq: str) -> np.ndarray:
+    """One-step-ahead in-sample fit of the Theta model (NaN for the first row)."""
+    n = len(y)
+    indices, adjusted, alpha, _, _, slope = _theta_model(y, freq)
+    fitted = np.full(n, np.nan)
+    level = adjusted[0]
+    for t in range(1, n):
+        # One step ahead from t rows, as theta() forecasts from the full series
+        fitted[t] = level + slope / 2 * (1 - (1 - alpha) ** t) / alpha
+        level += alpha * (adjusted[t] - level)
+    return fitted * indices[np.arange(n) % len(indices)]
+
+
+def _ets_grid(seasonal: bool) -> Tuple[np.ndarray, ...]:
+    alpha, beta_star, gamma, phi = np.meshgrid(
+        [0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9],
+        [0.0, 0.05, 0.1, 0.3],
+        [0.01, 0.05, 0.1, 0.3] if seasonal else [0.0],
+        [0.9, 0.98],
+        indexing='ij'
+    )
+    alpha, beta, gamma, phi = (
+        alpha.ravel(), (alpha * beta_star).ravel(), gamma.ravel(), phi.ravel()
+    )
+    # Usual admissibility restriction for additive seasonality
+    keep = gamma <= 1 - alpha
+    return alpha[keep], beta[keep], gamma[keep], phi[keep]
+
+
+def _hw_filter(y: np.ndarray, m: int, alpha: np.ndarray, beta: np.ndarray, gamma: np.ndarray,
+               phi: np.ndarray, fitted: Optional[np.ndarray] = None
+               ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Run ETS(A,Ad,A) for every parameter candidate: final (level, trend, season, SSE).
+    
+    With `fitted` (single candidate only), one-step-ahead predictions are written into it.
+    """
+    n = len(y)
+    seasonal = m > 1
+    size = len(alpha)
+    
+    if seasonal:
+        # Classical start-up: the first-season mean sits mid-season, so step it
+        # back to t = -1, and detrend the first season for the seasonal states
+        trend0 = (y[m:2 * m].mean() - y[:m].mean()) / m
+        level0 = y[:m].mean() - trend0 * (m + 1) / 2
+        season = np.tile(y[:m] - (level0 + trend0 * np.arange(1, m + 1)), (size, 1))
+    else:
+        trend0 = y[1] - y[0] if n > 1 else 0.0
+        level0 = y[0] - trend0
+        season = np.zeros((size, 1))
+    
+    level = np.full(size, level0)
+    trend = np.full(size, trend0)
+    sse = np.zeros(size)
+    for t, value in enumerate(y):
+        slot = t % m
+        forecast = level + phi * trend + season[:, slot]
+        if fitted is not None:
+            fitted[t] = forecast[0]
+        error = value - forecast
+        sse += error * error
+        level = level + phi * trend + alpha * error
+        trend = phi * trend + beta * error
+        season[:, slot] += gamma * error
+    return level, trend, season, sse
+
+
+def holt_winters(y: np.ndarray, freq: str, horizon: int) -> EngineResult:
+    """Additive Holt-Winters with damped trend, i.e. ETS(A,Ad,A).
+    
+    The whole parameter grid is filtered in one pass over the series (each step
+    is a NumPy operation over all candidates) and the lowest one-step SSE wins.
+    Without two full seasons it reduces to damped Holt.
+    """
+    n = len(y)
+    m = season_length(freq, n)
+    seasonal = m > 1
+    alpha, beta, gamma, phi = _ets_grid(seasonal)
+    level, trend, season, sse = _hw_filter(y, m, alpha, beta, gamma, phi)
+    
+    best = int(np.argmin(sse))
+    a, b, g, p = alpha[best], beta[best], gamma[best], phi[best]
+    sigma = np.sqrt(sse[best] / n)
+    
+    steps = np.arange(1, horizon + 1)
+    damped = np.cumsum(p ** steps)  # phi + phi^2 + ... + phi^h
+    yhat = level[best] + damped * trend[best] + season[best, (n + steps - 1) % m]
+    
+    # Forecast variance for the additive ETS class: sigma^2 (1 + sum c_j^2)
+    c = a + b * damped[:-1] + (g * (steps[:-1] % m == 0) if seasonal else 0.0)
+    sigma_h = sigma * np.sqrt(1 + np.concatenate(([0.0], np.cumsum(c ** 2))))
+    return _intervals(yhat, sigma_h)
+
+
+def holt_winters_fitted(y: np.ndarray, freq: str) -> np.ndarray:
+    """One-step-ahead in-sample fit of the selected Holt-Winters model."""
+    m = season_length(freq, len(y))
+    grid = _ets_grid(m > 1)
+    best = int(np.argmin(_hw_filter(y, m, *grid)[3]))
+    fitted = np.empty(len(y))
+    _hw_filter(y, m, *(values[best:best + 1] for values in grid), fitted=fitted)
+    return fitted
+
+
+LIGHT_ENGINES: Dict[str, Callable[[np.ndarray, str, int], EngineResult]] = {
+    'ets': holt_winters,
+    'seasonal_naive': seasonal_naive,
+    'theta': theta
+}
+
+# One-step-ahead in-sample fits, for include_fitted
+LIGHT_ENGINE_FITS: Dict[str, Callable[[np.ndarray, str], np.ndarray]] = {
+    'ets': holt_winters_fitted,
+    'seasonal_naive': seasonal_naive_fitted,
+    'theta': theta_fitted
+}
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from services.profiling import active_profile, profiled_call
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("process", "thread", "inline")
+
+# Seconds past the task timeout before a worker that ignored its deadline is
+# considered stuck and the pool is recycled
+STAGE_TIMEOUT_GRACE = 10.0
+
+
+class StageTimeoutError(TimeoutError):
+    """Raised when a forecast stage runs longer than the configured timeout."""
+
+
+class WorkerCrashedError(RuntimeError):
+    """Raised when a pool worker dies while running a forecast stage."""
+
+
+def _on_deadline(signum, frame):
+    raise StageTimeoutError("Forecast stage exceeded its deadline")
+
+
+def _call_with_deadline(timeout: Optional[float], fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a stage in a pool worker, raising StageTimeoutError after `timeout` seconds.
+
+    The deadline is counted from when the worker starts the stage and raises
+    inside the worker, so only this stage fails and the worker stays in the pool.
+    Native code (e.g. a Stan fit) sees the signal once it returns to Python.
+    """
+    if not timeout:
+        return fn(*args)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _warm_worker():
+    """Pool initializer: import the forecasting stack once per worker process."""
+    signal.signal(signal.SIGALRM, _on_deadline)
+    try:
+        import cmdstanpy  # noqa: F401
+        from prophet.models import CmdStanPyBackend
+
+        # Loading the backend resolves and validates the compiled Stan model,
+        # which is the slowest part of the first fit in a fresh process.
+        CmdStanPyBackend()
+        logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    except Exception as e:
+        logger.error(f"Forecast worker warm-up failed: {e}")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class ForecastExecutor:
+    """Runs CPU-bound forecast stages off the event loop.
+
+    At most `max_workers` stages are handed to the pool at once; the rest wait
+    here, so a stage's timeout only counts while it runs. In process mode the
+    timeout fires inside the worker and fails just that stage. A worker that
+    is still busy `STAGE_TIMEOUT_GRACE` seconds later is stuck: the whole pool
+    is then terminated, failing every stage running in it with
+    WorkerCrashedError, because a process pool cannot lose one worker without
+    breaking. Thread mode cannot stop a stage; it only stops waiting for it.
+    """
+
+    def __init__(self, mode: str = "process", max_workers: Optional[int] = None,
+                 task_timeout: Optional[float] = 120.0):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Execution mode must be one of {', '.join(EXECUTION_MODES)}")
+
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.task_timeout = task_timeout
+        self._pool: Optional[Executor] = None
+        self._in_flight = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_env(cls) -> "ForecastExecutor":
+        """Build an executor from FORECAST_* environment variables."""
+        timeout = float(os.getenv("FORECAST_TASK_TIMEOUT", "120"))
+        return cls(
+            mode=os.getenv("FORECAST_EXECUTION_MODE", "process").lower(),
+            max_workers=int(os.getenv("FORECAST_POOL_SIZE", "0")) or None,
+            task_timeout=timeout if timeout > 0 else None
+        )
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                # 'spawn' keeps workers independent of the event loop's threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="forecast"
+                )
+            logger.info(f"Started {self.mode} forecast pool with {self.max_workers} workers")
+        return self._pool
+
+    async def start(self):
+        """Create the pool and spin up warm workers ahead of the first request."""
+        if self.mode != "process":
+            return
+
+        pool = self._get_pool()
+        loop = asyncio.get_running_loop()
+        # Submitting one task per worker before any is idle makes the pool
+        # spawn all of them; each runs the warm-up initializer first.
+        pids = await asyncio.gather(
+            *[loop.run_in_executor(pool, _ping) for _ in range(self.max_workers)],
+            return_exceptions=True
+        )
+        logger.info(f"Forecast pool warm: {len(set(p for p in pids if isinstance(p, int)))} workers ready")
+
+    @property
+    def in_flight(self) -> int:
+        """Stages submitted and not yet finished, running or queued."""
+        return self._in_flight
+
+    @property
+    def busy(self) -> bool:
+        """True when a new stage would have to wait for a free worker."""
+        return self._in_flight >= self.max_workers
+
+    def _get_slots(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        """One slot per worker; semaphores belong to one event loop."""
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._slots_loop = loop
+        return self._slots
+
+    def shutdown(self):
+        """Stop the pool, cancelling queued stages."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _recycle_pool(self, pool: Executor):
+        """Tear down a pool whose workers are stuck or dead so the next task gets fresh ones."""
+        if self._pool is not pool:
+            # Already replaced by a task that failed on the same pool
+            return
+        self._pool = None
+        if isinstance(pool, ProcessPoolExecutor):
+            for process in list((getattr(pool, "_processes", None) or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a picklable stage function in the configured pool with a timeout.
+
+        While a request is being profiled (services.profiling) the stage is
+        profiled in its worker and the stats are added to the request's profile.
+        """
+        if self.mode == "inline":
+            return fn(*args)
+
+        loop = asyncio.get_running_loop()
+        profile = active_profile()
+        call = (fn, *args) if profile is None else (profiled_call, fn, *args)
+        wait_timeout = self.task_timeout
+        if self.mode == "process" and self.task_timeout:
+            # The worker enforces the deadline; waiting here is the backstop
+            call = (_call_with_deadline, self.task_timeout, *call)
+            wait_timeout = self.task_timeout + STAGE_TIMEOUT_GRACE
+
+        self._in_flight += 1
+        pool = None
+        try:
+            async with self._get_slots(loop):
+                pool = self._get_pool()
+                result = await asyncio.wait_for(loop.run_in_executor(pool, *call), timeout=wait_timeout)
+            if profile is None:
+                return result
+            result, stats = result
+            profile.add_worker_stats(fn.__name__, stats)
+            return result
+        except StageTimeoutError:
+            # Raised in the worker, which is still healthy
+            logger.error(f"Forecast stage {fn.__name__} exceeded {self.task_timeout}s timeout")
+            raise StageTimeoutError(f"Forecast stage timed out after {self.task_timeout:g}s")
+        except asyncio.TimeoutError:
+            logger.error(f"Forecast stage {fn.__name__} exceeded {self.task_timeout}s timeout")
+            if self.mode == "process":
+                # The worker ignored its deadline and cannot be cancelled; replace the pool
+                logger.error("Forecast worker is stuck, recycling the pool")
+                self._recycle_pool(pool)
+            raise StageTimeoutError(f"Forecast stage timed out after {self.task_timeout:g}s")
+        except BrokenProcessPool as e:
+            logger.error(f"Forecast worker pool broke during {fn.__name__}: {e}")
+            self._recycle_pool(pool)
+            raise WorkerCrashedError("Forecast worker crashed, please retry")
+        finally:
+            self._in_flight -= 1
+
+
+_executor: Optional[ForecastExecutor] = None
+
+
+def get_forecast_executor() -> ForecastExecutor:
+    """Return the process-wide forecast executor."""
+    global _executor
+    if _executor is None:
+        _executor = ForecastExecutor.from_env()
+    return _executor
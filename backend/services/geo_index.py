@@ -0,0 +1,165 @@
+import bisect
+import difflib
+import gzip
+import hashlib
+import json
+import logging
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+import pycountry
+
+logger = logging.getLogger(__name__)
+
+MAX_SEARCH_RESULTS = 50
+
+
+def fold_name(text: str) -> str:
+    """Case- and accent-insensitive form used to match names ('Mahārāshtra' == 'maharashtra')."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return " ".join(
+        "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower().split()
+    )
+
+
+class GeoPayload:
+    """A pre-serialised JSON response with its gzip encoding and ETags."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        # Each representation gets its own validator, as required for strong ETags
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gz"'
+
+
+class GeoIndex:
+    """Immutable country/subdivision lookups built once from pycountry.
+
+    Country and per-country subdivision lists are served as ready-made
+    payloads; typeahead search bisects a sorted list of name/word/code tokens.
+    """
+
+    def __init__(self):
+        countries = sorted(
+            ({"value": country.alpha_2, "label": country.name, "code": country.alpha_2}
+             for country in pycountry.countries),
+            key=lambda x: x["label"]
+        )
+
+        by_country: Dict[str, List[Dict[str, Any]]] = {}
+        for subdivision in pycountry.subdivisions:
+            by_country.setdefault(subdivision.country_code, []).append({
+                "value": subdivision.code,
+                "label": subdivision.name,
+                "code": subdivision.code,
+                "type": subdivision.type
+            })
+
+        self.countries = GeoPayload({"countries": countries})
+        self.subdivisions = {
+            code: GeoPayload({"subdivisions": sorted(items, key=lambda x: x["label"])})
+            for code, items in by_country.items()
+        }
+        self.empty_subdivisions = GeoPayload({"subdivisions": []})
+
+        self._entries: List[Dict[str, Any]] = []
+        tokens: List[Tuple[str, int, int]] = []
+        country_names = {country["code"]: country["label"] for country in countries}
+        for country in countries:
+            self._add_entry(tokens, {
+                "kind": "country", "value": country["code"], "label": country["label"],
+                "country_code": country["code"]
+            }, country["code"])
+        for code, items in by_country.items():
+            for item in items:
+                self._add_entry(tokens, {
+                    "kind": "subdivision", "value": item["code"], "label": item["label"],
+                    "country_code": code, "country": country_names.get(code),
+                    "type": item["type"]
+                }, item["code"])
+
+        # (token, rank, entry) sorted so prefix matches are one contiguous slice;
+        # rank 0 is a full-name match, 1 a later word or code
+        tokens.sort()
+        self._tokens = [token for token, _, _ in tokens]
+        self._postings = [(rank, entry) for _, rank, entry in tokens]
+        self._vocabulary = sorted(set(self._tokens))
+        logger.info(f"Geo index built: {len(countries)} countries, {len(self._entries)} entries")
+
+    def _add_entry(self, tokens: List[Tuple[str, int, int]], entry: Dict[str, Any], code: str):
+        entry_id = len(self._entries)
+        self._entries.append(entry)
+        name = fold_name(entry["label"])
+        tokens.append((name, 0, entry_id))
+        words = name.replace("-", " ").replace("(", " ").replace(")", " ").split()
+        for word in set(words[1:]) - {words[0]}:
+            tokens.append((word, 1, entry_id))
+        tokens.append((code.lower(), 1, entry_id))
+        if "-" in code:
+            # 'US-CA' is also findable as 'ca'
+            tokens.append((code.split("-", 1)[1].lower(), 1, entry_id))
+
+    def subdivisions_for(self, country_code: str) -> GeoPayload:
+        return self.subdivisions.get(country_code.upper(), self.empty_subdivisions)
+
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None,
+               country_code: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Prefix search over names, name words and codes, with a fuzzy fallback for typos."""
+        prefix = fold_name(query)
+        if not prefix:
+            return []
+        country_code = country_code.upper() if country_code else None
+
+        matches = self._prefix_matches(prefix)
+        if not matches:
+            matches = self._fuzzy_matches(prefix)
+
+        results: List[Dict[str, Any]] = []
+        seen = set()
+        for _, _, entry_id in sorted(matches):
+            entry = self._entries[entry_id]
+            if entry_id in seen or (kind and entry["kind"] != kind) or (
+                country_code and entry["country_code"] != country_code
+            ):
+                continue
+            seen.add(entry_id)
+            results.append(entry)
+            if len(results) >= limit:
+                break
+        return results
+
+    def _prefix_matches(self, prefix: str) -> List[Tuple[int, int, int]]:
+        lo = bisect.bisect_left(self._tokens, prefix)
+        hi = bisect.bisect_left(self._tokens, prefix + "\uffff", lo)
+        # Sort key: full names before words and codes, countries before subdivisions,
+        # exact tokens first, then entry order (alphabetical within each kind)
+        return [
+            (rank + 2 * (self._entries[entry]["kind"] != "country"), self._tokens[i] != prefix, entry)
+            for i in range(lo, hi)
+            for rank, entry in (self._postings[i],)
+        ]
+
+    def _fuzzy_matches(self, prefix: str) -> List[Tuple[int, int, int]]:
+        # Only tokens sharing the first letter are compared, which keeps the
+        # candidate set small; typos in the first letter are not corrected.
+        lo = bisect.bisect_left(self._vocabulary, prefix[0])
+        hi = bisect.bisect_left(self._vocabulary, prefix[0] + "\uffff", lo)
+        candidates = [token[:len(prefix)] for token in self._vocabulary[lo:hi]]
+        close = set(difflib.get_close_matches(prefix, set(candidates), n=10, cutoff=0.75))
+        matches = []
+        for token_prefix in close:
+            matches.extend(self._prefix_matches(token_prefix))
+        return matches
+
+
+_geo_index: Optional[GeoIndex] = None
+
+
+def get_geo_index() -> GeoIndex:
+    """Return the process-wide geo index, building it on first use."""
+    global _geo_index
+    if _geo_index is None:
+        _geo_index = GeoIndex()
+    return _geo_index
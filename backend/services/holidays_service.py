@@ -1,56 +1,142 @@
 import holidays
+import numpy as np
 import pandas as pd
+import pycountry
+import threading
 from datetime import datetime, timedelta
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import logging
 
+from services.geo_index import fold_name
+
 logger = logging.getLogger(__name__)
 
-class HolidaysService:
-    """Service for handling country and state-specific holidays."""
+# Common names that are neither ISO codes nor pycountry names
+COUNTRY_ALIASES = {
+    'usa': 'US',
+    'america': 'US',
+    'uk': 'GB',
+    'britain': 'GB'
+}
+
+
+class HolidayIndex:
+    """Process-wide holiday calendar keyed by (country, subdivision, year).
+    
+    Each year is built once from the `holidays` package and kept as sorted
+    datetime64/name arrays, so any date range is a binary-search slice.
+    Countries and subdivisions use the ISO/pycountry codes that geo_data serves.
+    """
     
     def __init__(self):
-        self.supported_countries = {
-            'US': 'United States',
-            'IN': 'India', 
-            'GB': 'United Kingdom',
-            'CA': 'Canada',
-            'AU': 'Australia',
-            'DE': 'Germany',
-            'FR': 'France',
-            'JP': 'Japan',
-            'BR': 'Brazil',
-            'MX': 'Mexico'
-        }
+        self.supported = holidays.list_supported_countries()
+        # (country, subdiv, year) -> (dates, names), both sorted by date
+        self._years: Dict[Tuple[str, Optional[str], int], Tuple[np.ndarray, np.ndarray]] = {}
+        self._subdiv_names: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
     
-    def get_country_code(self, country_input: str) -> Optional[str]:
-        """Convert country name/code to ISO code."""
-        country_upper = country_input.upper()
+    def country_code(self, country: str) -> Optional[str]:
+        """Resolve an ISO alpha-2/alpha-3 code or country name to a supported alpha-2 code."""
+        value = country.strip()
+        code = COUNTRY_ALIASES.get(value.lower())
+        if code is None:
+            try:
+                code = pycountry.countries.lookup(value).alpha_2
+            except LookupError:
+                return None
+        return code if code in self.supported else None
+    
+    def subdivision_code(self, country_code: str, state: Optional[str]) -> Optional[str]:
+        """Resolve 'US-CA', 'CA' or 'California' to the subdivision code `holidays` expects.
         
-        # If it's already a 2-letter country code and supported, return it
-        if len(country_upper) == 2 and country_upper in self.supported_countries:
-            return country_upper
+        Returns None (national holidays) when the subdivision has no calendar of its own.
+        """
+        if not state or not state.strip():
+            return None
+        
+        value = state.strip()
+        supported = self.supported[country_code]
+        prefix = f"{country_code}-"
+        if value.upper().startswith(prefix):
+            value = value[len(prefix):]
+        if value.upper() in supported:
+            return value.upper()
         
-        # Otherwise try to map from name to code
-        country_lower = country_input.lower()
-        name_to_code = {
-            'united states': 'US',
-            'usa': 'US',
-            'america': 'US',
-            'india': 'IN',
-            'united kingdom': 'GB',
-            'uk': 'GB',
-            'britain': 'GB',
-            'canada': 'CA',
-            'australia': 'AU',
-            'germany': 'DE',
-            'france': 'FR',
-            'japan': 'JP',
-            'brazil': 'BR',
-            'mexico': 'MX'
-        }
+        code = self._subdivision_names(country_code).get(fold_name(value))
+        if code in supported:
+            return code
         
-        return name_to_code.get(country_lower)
+        logger.info(f"No subdivision holidays for '{state}' in {country_code}, using national holidays")
+        return None
+    
+    def _subdivision_names(self, country_code: str) -> Dict[str, str]:
+        names = self._subdiv_names.get(country_code)
+        if names is None:
+            prefix = f"{country_code}-"
+            names = {
+                fold_name(subdivision.name): subdivision.code[len(prefix):]
+                for subdivision in pycountry.subdivisions.get(country_code=country_code) or []
+            }
+            self._subdiv_names[country_code] = names
+        return names
+    
+    def _year(self, country_code: str, subdiv: Optional[str], year: int) -> Tuple[np.ndarray, np.ndarray]:
+        key = (country_code, subdiv, year)
+        entry = self._years.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._years.get(key)
+                if entry is None:
+                    calendar = holidays.country_holidays(country_code, subdiv=subdiv, years=year)
+                    items = sorted(calendar.items())
+                    entry = (
+                        np.array([date for date, _ in items], dtype='datetime64[D]'),
+                        np.array([name for _, name in items], dtype=object)
+                    )
+                    self._years[key] = entry
+        return entry
+    
+    def frame(self, country_code: str, subdiv: Optional[str],
+              start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """Prophet holidays frame ('ds', 'holiday') for an inclusive date range."""
+        years = [self._year(country_code, subdiv, year)
+                 for year in range(start_date.year, end_date.year + 1)]
+        dates = np.concatenate([dates for dates, _ in years])
+        names = np.concatenate([names for _, names in years])
+        
+        lo = np.searchsorted(dates, np.datetime64(start_date.date(), 'D'), side='left')
+        hi = np.searchsorted(dates, np.datetime64(end_date.date(), 'D'), side='right')
+        return pd.DataFrame({
+            'ds': dates[lo:hi].astype('datetime64[ns]'),
+            'holiday': names[lo:hi]
+        })
+
+
+_holiday_index: Optional[HolidayIndex] = None
+
+
+def get_holiday_index() -> HolidayIndex:
+    """Return the process-wide holiday index."""
+    global _holiday_index
+    if _holiday_index is None:
+        _holiday_index = HolidayIndex()
+    return _holiday_index
+
+
+class HolidaysService:
+    """Service for handling country and state-specific holidays."""
+    
+    def __init__(self, index: Optional[HolidayIndex] = None):
+        self.index = index or get_holiday_index()
+    
+    @property
+    def supported_countries(self) -> Dict[str, List[str]]:
+        """Supported ISO alpha-2 country codes and their subdivision codes."""
+        return self.index.supported
+    
+    def get_country_code(self, country_input: str) -> Optional[str]:
+        """Convert country name/code to ISO code."""
+        return self.index.country_code(country_input)
     
     def get_holidays_dataframe(self, country: str, state: Optional[str] = None, 
                              start_date: datetime = None, end_date: datetime = None) -> pd.DataFrame:
@@ -59,7 +145,7 @@ class HolidaysService:
         
         Args:
             country: Country name or ISO code
-            state: State/province name (if supported)
+            state: State/province code ('US-CA' or 'CA') or name (if supported)
             start_date: Start date for holiday range
             end_date: End date for holiday range
             
@@ -78,27 +164,15 @@ class HolidaysService:
                 logger.warning(f"Country '{country}' not supported for holidays")
                 return pd.DataFrame(columns=['ds', 'holiday'])
             
-            years = list(range(start_date.year, end_date.year + 1))
-            
-            # Get holidays based on country and state
-            holiday_dict = self._get_holidays_dict(country_code, state, years)
+            subdiv = self.index.subdivision_code(country_code, state)
+            df = self.index.frame(country_code, subdiv, start_date, end_date)
             
-            if not holiday_dict:
+            if df.empty:
                 logger.warning(f"No holidays found for {country_code}")
                 return pd.DataFrame(columns=['ds', 'holiday'])
             
-            # Convert to DataFrame
-            holiday_data = []
-            for date, name in holiday_dict.items():
-                if start_date.date() <= date <= end_date.date():
-                    holiday_data.append({
-                        'ds': date,
-                        'holiday': name
-                    })
-            
-            df = pd.DataFrame(holiday_data)
             logger.warning(f"HOLIDAYS DEBUG: Found {len(df)} holidays for {country_code}" + 
-                       (f"/{state}" if state else ""))
+                       (f"/{subdiv}" if subdiv else ""))
             
             return df
             
@@ -106,75 +180,6 @@ class HolidaysService:
             logger.error(f"Error getting holidays: {e}")
             return pd.DataFrame(columns=['ds', 'holiday'])
     
-    def _get_holidays_dict(self, country_code: str, state: Optional[str], years: List[int]) -> dict:
-        """Get holidays dictionary from holidays library."""
-        try:
-            if country_code == 'US' and state:
-                # US supports state-level holidays
-                return holidays.US(state=state, years=years)
-            elif country_code == 'IN' and state:
-                # India supports some state-level holidays
-                state_mapping = {
-                    'maharashtra': 'MH',
-                    'karnataka': 'KA', 
-                    'tamil nadu': 'TN',
-                    'gujarat': 'GJ',
-                    'west bengal': 'WB',
-                    'rajasthan': 'RJ',
-                    'uttar pradesh': 'UP',
-                    'madhya pradesh': 'MP',
-                    'bihar': 'BR',
-                    'odisha': 'OR'
-                }
-                state_code = state_mapping.get(state.lower())
-                if state_code:
-                    return holidays.India(state=state_code, years=years)
-                else:
-                    return holidays.India(years=years)
-            elif country_code == 'CA' and state:
-                # Canada supports province-level holidays
-                province_mapping = {
-                    'ontario': 'ON',
-                    'quebec': 'QC',
-                    'british columbia': 'BC',
-                    'alberta': 'AB',
-                    'manitoba': 'MB',
-                    'saskatchewan': 'SK',
-                    'nova scotia': 'NS',
-                    'new brunswick': 'NB',
-                    'newfoundland and labrador': 'NL',
-                    'prince edward island': 'PE'
-                }
-                province_code = province_mapping.get(state.lower())
-                if province_code:
-                    return holidays.Canada(state=province_code, years=years)
-                else:
-                    return holidays.Canada(years=years)
-            else:
-                # Use national holidays
-                country_classes = {
-                    'US': holidays.US,
-                    'IN': holidays.India,
-                    'GB': holidays.UK,
-                    'CA': holidays.Canada,
-                    'AU': holidays.Australia,
-                    'DE': holidays.Germany,
-                    'FR': holidays.France,
-                    'JP': holidays.Japan,
-                    'BR': holidays.Brazil,
-                    'MX': holidays.Mexico
-                }
-                
-                holiday_class = country_classes.get(country_code)
-                if holiday_class:
-                    return holiday_class(years=years)
-                
-            return {}
-            
-        except Exception as e:
-            logger.error(f"Error creating holidays object: {e}")
-            return {}
-    
     def get_upcoming_holidays(self, country: str, state: Optional[str] = None, 
                             weeks_ahead: int = 8) -> List[str]:
         """Get list of upcoming holiday names for AI context."""
@@ -192,4 +197,4 @@ class HolidaysService:
             
         except Exception as e:
             logger.error(f"Error getting upcoming holidays: {e}")
-            return []
\ No newline at end of file
+            return []
@@ -0,0 +1,318 @@
+import codecs
+import hashlib
+import io
+import itertools
+import logging
+import os
+import tempfile
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+from fastapi import UploadFile
+
+logger = logging.getLogger(__name__)
+
+# Uploads up to this size stay in memory; larger ones are spooled to disk so
+# pool workers read them from a path instead of receiving a pickled copy.
+SPOOL_MEMORY_BYTES = int(float(os.getenv("FORECAST_UPLOAD_SPOOL_MB", "8")) * 1024 * 1024)
+READ_CHUNK_BYTES = 1024 * 1024
+ENCODING_PREFIX_BYTES = 64 * 1024
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+ARROW_FILE_EXTENSIONS = ('.feather', '.arrow')
+ARROW_STREAM_EXTENSIONS = ('.arrows', '.ipc')
+COLUMNAR_EXTENSIONS = PARQUET_EXTENSIONS + ARROW_FILE_EXTENSIONS + ARROW_STREAM_EXTENSIONS
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds its size limit while being read."""
+
+
+class UploadSource:
+    """An uploaded file held in memory or in a temp file, with its size and SHA-256.
+
+    Instances are picklable, so they can be handed to pool workers directly.
+    """
+
+    def __init__(self, filename: str, content: Optional[bytes] = None,
+                 path: Optional[str] = None, size: int = 0, sha256: Optional[str] = None):
+        self.filename = filename
+        self.content = content
+        self.path = path
+        self.size = size if content is None else len(content)
+        self.sha256 = sha256 or (hashlib.sha256(content).hexdigest() if content is not None else None)
+        self._owns_path = path is not None
+
+    @property
+    def extension(self) -> str:
+        return os.path.splitext(self.filename.lower())[1]
+
+    def open(self) -> BinaryIO:
+        """Open a fresh binary reader positioned at the start of the file."""
+        if self.content is not None:
+            return io.BytesIO(self.content)
+        return open(self.path, "rb")
+
+    def read_prefix(self, size: int = ENCODING_PREFIX_BYTES) -> bytes:
+        with self.open() as handle:
+            return handle.read(size)
+
+    def read_bytes(self) -> bytes:
+        if self.content is not None:
+            return self.content
+        with self.open() as handle:
+            return handle.read()
+
+    def detach(self) -> "UploadSource":
+        """Hand the temp file to a new owner that outlives the request (e.g. a queued job)."""
+        detached = UploadSource(self.filename, self.content, self.path, self.size, self.sha256)
+        detached._owns_path = self._owns_path
+        self._owns_path = False
+        return detached
+
+    def cleanup(self):
+        """Delete the spooled temp file, if this instance owns one."""
+        if self._owns_path and self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self._owns_path = False
+
+
+def as_upload_source(file_content: Union[bytes, UploadSource], filename: str) -> UploadSource:
+    """Accept raw bytes (as older callers pass) or an already spooled upload."""
+    if isinstance(file_content, UploadSource):
+        return file_content
+    return UploadSource(filename, content=file_content)
+
+
+def _arrow_input(source: UploadSource):
+    """Zero-copy Arrow input: a memory map for spooled files, a buffer view for bytes."""
+    import pyarrow as pa
+
+    if source.content is not None:
+        return pa.BufferReader(source.content)
+    return pa.memory_map(source.path, "r")
+
+
+def _present(columns: Optional[List[str]], names: List[str]) -> Optional[List[str]]:
+    # Missing columns are left for validation to report with its usual message
+    if columns is None:
+        return None
+    return [col for col in columns if col in names]
+
+
+def _project(table, columns: Optional[List[str]]):
+    if columns is None:
+        return table
+    return table.select(_present(columns, table.column_names))
+
+
+def read_columnar_frame(source: UploadSource, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a Parquet, Feather/Arrow IPC file or Arrow IPC stream into a DataFrame.
+
+    Only `columns` are read (projection pushdown for Parquet and Arrow files),
+    and typed timestamp/date columns arrive as datetime64 without any parsing.
+    """
+    # pyarrow is only needed for columnar uploads, so keep it off the import path
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    extension = source.extension
+    with _arrow_input(source) as handle:
+        if extension in PARQUET_EXTENSIONS:
+            parquet_file = pq.ParquetFile(handle)
+            table = parquet_file.read(columns=_present(columns, parquet_file.schema_arrow.names))
+        elif extension in ARROW_FILE_EXTENSIONS:
+            try:
+                table = _project(feather.read_table(handle, memory_map=True), columns)
+            except pa.ArrowInvalid:
+                # '.arrow' is also used for the streaming format
+                handle.seek(0)
+                table = _project(pa.ipc.open_stream(handle).read_all(), columns)
+        elif extension in ARROW_STREAM_EXTENSIONS:
+            reader = pa.ipc.open_stream(handle)
+            # Project each record batch as it arrives so unused columns are dropped early
+            batches = [_project(pa.Table.from_batches([batch]), columns) for batch in reader]
+            table = (pa.concat_tables(batches) if batches
+                     else _project(reader.schema.empty_table(), columns))
+        else:
+            raise ValueError(f"Unsupported columnar format: {extension}")
+
+        # split_blocks/self_destruct let pandas adopt Arrow buffers without an
+        # extra consolidated copy; date32 columns become datetime64 directly
+        return table.to_pandas(split_blocks=True, self_destruct=True, date_as_object=False)
+
+
+def _select_sheet(names: List[str], sheet: Optional[str]) -> Union[str, int]:
+    """Resolve `sheet` to a sheet name, or a 0-based index given as digits."""
+    if sheet is None:
+        return 0
+    if sheet in names:
+        return sheet
+    if sheet.isdigit() and int(sheet) < len(names):
+        return int(sheet)
+    raise ValueError(f"Sheet '{sheet}' not found; available sheets: {', '.join(names)}")
+
+
+def _rows_to_frame(rows: Iterator[Sequence], columns: Optional[List[str]],
+                   n_rows: Optional[int] = None) -> pd.DataFrame:
+    """Build a frame from a header row and data rows, keeping only `columns`.
+
+    Rows are consumed one at a time, so only the kept cells are held. With
+    `n_rows` (rows after the header, when the reader knows it) the kept cells
+    are checked against the per-request memory budget before any are read.
+    """
+    # Imported here: services.memory builds its estimates from this module's extensions
+    from services.memory import check_cells_budget
+
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame()
+    names = ["" if name is None else str(name) for name in header]
+    # The first occurrence of a repeated header wins
+    positions = {}
+    for position, name in enumerate(names):
+        if name and (columns is None or name in columns):
+            positions.setdefault(name, position)
+    if n_rows is not None:
+        check_cells_budget(n_rows * len(positions))
+
+    values: Dict[str, list] = {name: [] for name in positions}
+    for row in rows:
+        width = len(row)
+        for name, position in positions.items():
+            value = row[position] if position < width else None
+            # calamine returns empty cells as ''
+            values[name].append(None if value == "" else value)
+    return pd.DataFrame(values)
+
+
+def _read_calamine(source: UploadSource, columns: Optional[List[str]],
+                   sheet: Optional[str], header_row: int) -> pd.DataFrame:
+    from python_calamine import CalamineWorkbook
+
+    if source.content is None:
+        workbook = CalamineWorkbook.from_path(source.path)
+    else:
+        workbook = CalamineWorkbook.from_filelike(io.BytesIO(source.content))
+    selected = _select_sheet(workbook.sheet_names, sheet)
+    worksheet = (workbook.get_sheet_by_index(selected) if isinstance(selected, int)
+                 else workbook.get_sheet_by_name(selected))
+    # Rows are yielded one at a time from the first spreadsheet row, so
+    # header_row counts rows as the spreadsheet shows them
+    rows = itertools.islice(worksheet.iter_rows(), header_row, None)
+    return _rows_to_frame(rows, columns, max(0, worksheet.total_height - header_row - 1))
+
+
+def _read_openpyxl(source: UploadSource, columns: Optional[List[str]],
+                   sheet: Optional[str], header_row: int) -> pd.DataFrame:
+    import openpyxl
+
+    with source.open() as handle:
+        # Read-only mode streams rows from the sheet XML instead of building the cell tree
+        workbook = openpyxl.load_workbook(handle, read_only=True, data_only=True)
+        try:
+            selected = _select_sheet(workbook.sheetnames, sheet)
+            worksheet = (workbook.worksheets[selected] if isinstance(selected, int)
+                         else workbook[selected])
+            rows = worksheet.iter_rows(min_row=header_row + 1, values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return pd.DataFrame()
+            if columns is not None:
+                # Stop each row after the last needed column
+                wanted = [position for position, name in enumerate(header)
+                          if name is not None and str(name) in columns]
+                rows = worksheet.iter_rows(min_row=header_row + 2, values_only=True,
+                                           max_col=max(wanted) + 1 if wanted else 1)
+            # max_row comes from the sheet's dimension tag and may be missing
+            n_rows = worksheet.max_row - header_row - 1 if worksheet.max_row else None
+            return _rows_to_frame(itertools.chain([header], rows), columns, n_rows)
+        finally:
+            workbook.close()
+
+
+def read_excel_frame(source: UploadSource, columns: Optional[List[str]] = None,
+                     sheet: Optional[str] = None, header_row: int = 0) -> pd.DataFrame:
+    """Read one worksheet of an Excel upload, keeping only `columns`.
+
+    `sheet` is a sheet name or 0-based index (the first sheet by default) and
+    `header_row` the 0-based row holding the column names. The Rust-backed
+    calamine reader is used when installed; otherwise .xlsx files are streamed
+    with openpyxl in read-only mode and .xls files go through pandas/xlrd.
+    """
+    try:
+        return _read_calamine(source, columns, sheet, header_row)
+    except ImportError:
+        pass
+
+    if source.extension == '.xlsx':
+        return _read_openpyxl(source, columns, sheet, header_row)
+
+    with source.open() as handle:
+        excel = pd.ExcelFile(handle)
+        selected = _select_sheet(excel.sheet_names, sheet)
+        return excel.parse(
+            selected, header=header_row,
+            usecols=(lambda column: str(column) in columns) if columns is not None else None
+        )
+
+
+def detect_encoding(prefix: bytes) -> str:
+    """Pick the CSV encoding from a prefix instead of re-parsing per candidate."""
+    try:
+        # Incremental decode tolerates a multi-byte character cut off at the end
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        # latin-1 maps every byte, so it is the terminal fallback
+        return "latin-1"
+
+
+async def spool_upload(file: UploadFile, max_bytes: int,
+                       memory_bytes: int = SPOOL_MEMORY_BYTES) -> UploadSource:
+    """Copy an upload in chunks, hashing it and enforcing `max_bytes` as it goes."""
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    handle = None
+    size = 0
+
+    try:
+        while True:
+            chunk = await file.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(
+                    f"File size exceeds {max_bytes / 1024 / 1024:.0f}MB limit. "
+                    f"Got more than {size / 1024 / 1024:.1f}MB"
+                )
+            digest.update(chunk)
+
+            if handle is None and size <= memory_bytes:
+                buffer += chunk
+                continue
+            if handle is None:
+                suffix = os.path.splitext(file.filename or "")[1]
+                handle = tempfile.NamedTemporaryFile(prefix="upload-", suffix=suffix, delete=False)
+                handle.write(buffer)
+                buffer = bytearray()
+            handle.write(chunk)
+    except BaseException:
+        if handle is not None:
+            handle.close()
+            os.unlink(handle.name)
+        raise
+
+    if handle is None:
+        return UploadSource(file.filename, content=bytes(buffer), sha256=digest.hexdigest())
+
+    handle.close()
+    logger.info(f"Spooled {size / 1024 / 1024:.1f}MB upload to disk")
+    return UploadSource(file.filename, path=handle.name, size=size, sha256=digest.hexdigest())
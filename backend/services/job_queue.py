@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional
+
+from models.schemas import ForecastJobStatus, ForecastRequest, ForecastResponse
+from services.executor import WorkerCrashedError, get_forecast_executor
+from services.ingest import UploadSource
+from services.memory import MemoryBudgetExceededError
+from services.prophet_service import ProphetService, get_prophet_service
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue cannot accept more work."""
+
+
+class ForecastJob:
+    """A queued forecast and its progress history."""
+
+    def __init__(self, file_content: UploadSource, filename: str, request: ForecastRequest):
+        self.job_id = uuid.uuid4().hex
+        self.file_content: Optional[UploadSource] = file_content
+        self.filename = filename
+        self.request = request
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        self.stages: List[str] = []
+        self.error: Optional[str] = None
+        self.error_code: Optional[int] = None
+        self.result: Optional[ForecastResponse] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def _touch(self):
+        self.updated_at = time.time()
+        # Wake every current listener, then re-arm for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def mark_stage(self, stage: str):
+        self.stage = stage
+        self.stages.append(stage)
+        self._touch()
+
+    def mark_running(self):
+        self.status = "running"
+        self._touch()
+
+    def release_upload(self):
+        if self.file_content is not None:
+            self.file_content.cleanup()
+            self.file_content = None
+
+    def mark_succeeded(self, result: ForecastResponse):
+        self.status = "succeeded"
+        self.result = result
+        self.release_upload()
+        self._touch()
+
+    def mark_failed(self, error: str, error_code: int):
+        self.status = "failed"
+        self.error = error
+        self.error_code = error_code
+        self.release_upload()
+        self._touch()
+
+    async def wait_for_change(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def to_status(self) -> ForecastJobStatus:
+        return ForecastJobStatus(
+            job_id=self.job_id,
+            status=self.status,
+            stage=self.stage,
+            stages=list(self.stages),
+            error=self.error,
+            created_at=self.created_at,
+            updated_at=self.updated_at
+        )
+
+
+class ForecastJobQueue:
+    """Bounded queue of forecast jobs drained by a fixed set of worker tasks."""
+
+    def __init__(self, max_queued: int = 100, workers: int = 2,
+                 result_ttl: float = 3600, max_jobs: int = 1000,
+                 service: Optional[ProphetService] = None):
+        self.max_queued = max_queued
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self.service = service
+        self._queue: Optional[asyncio.Queue] = None
+        self._jobs: "OrderedDict[str, ForecastJob]" = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def from_env(cls) -> "ForecastJobQueue":
+        """Build a queue from FORECAST_JOB_* environment variables."""
+        return cls(
+            max_queued=int(os.getenv("FORECAST_JOB_QUEUE_SIZE", "100")),
+            workers=int(os.getenv("FORECAST_JOB_WORKERS", "0")) or get_forecast_executor().max_workers,
+            result_ttl=float(os.getenv("FORECAST_JOB_RESULT_TTL", "3600")),
+            max_jobs=int(os.getenv("FORECAST_JOB_MAX_RETAINED", "1000"))
+        )
+
+    def start(self):
+        if self._tasks:
+            return
+        self.service = self.service or get_prophet_service()
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"forecast-job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Forecast job queue started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs that never ran still hold spooled uploads on disk
+        for job in self._jobs.values():
+            job.release_upload()
+
+    def submit(self, file_content: UploadSource, filename: str, request: ForecastRequest) -> ForecastJob:
+        """Enqueue a forecast, raising QueueFullError when the backlog is at capacity."""
+        if self._queue is None:
+            self.start()
+
+        self._purge()
+        job = ForecastJob(file_content, filename, request)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            job.release_upload()
+            raise QueueFullError(f"Forecast queue is full ({self.max_queued} jobs waiting)")
+
+        self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ForecastJob]:
+        return self._jobs.get(job_id)
+
+    async def events(self, job_id: str, keepalive: float = 15.0) -> AsyncIterator[Optional[ForecastJobStatus]]:
+        """Yield the job status on every change until it finishes; None means keep-alive."""
+        job = self._jobs[job_id]
+        last_seen = None
+        while True:
+            if job.updated_at != last_seen:
+                last_seen = job.updated_at
+                yield job.to_status()
+            else:
+                yield None
+            if job.done:
+                return
+            await job.wait_for_change(keepalive)
+
+    def _purge(self):
+        """Drop finished jobs past their TTL, and the oldest finished ones beyond the cap."""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.done]
+        overflow = max(0, len(self._jobs) - self.max_jobs + 1)
+        for index, job in enumerate(finished):
+            if index < overflow or now - job.updated_at > self.result_ttl:
+                del self._jobs[job.job_id]
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: ForecastJob):
+        job.mark_running()
+        try:
+            result = await self.service.generate_forecast(
+                job.file_content, job.filename, job.request, progress=job.mark_stage
+            )
+            job.mark_succeeded(result)
+        except TimeoutError as e:
+            job.mark_failed(str(e), 504)
+        except WorkerCrashedError as e:
+            job.mark_failed(str(e), 503)
+        except MemoryBudgetExceededError as e:
+            job.mark_failed(str(e), 413)
+        except ValueError as e:
+            job.mark_failed(str(e), 400)
+        except Exception as e:
+            logger.error(f"Forecast job {job.job_id} failed: {e}")
+            job.mark_failed(f"Internal server error: {str(e)}", 500)
+
+
+_job_queue: Optional[ForecastJobQueue] = None
+
+
+def get_job_queue() -> ForecastJobQueue:
+    """Return the process-wide forecast job queue."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = ForecastJobQueue.from_env()
+    return _job_queue
@@ -0,0 +1,95 @@
+"""Per-request memory budget and peak memory measurement for forecast stages.
+
+Uploads that are parsed whole are checked against the budget from their size
+before they are read. Peak memory is the high-water mark of the process
+running a stage (a forecast worker, in process mode) above its memory when the
+stage started. It comes from Linux's /proc, is unavailable elsewhere, and in
+thread mode it also counts other requests' stages running at the same time.
+"""
+import logging
+import os
+import re
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from services.ingest import (
+    ARROW_FILE_EXTENSIONS, ARROW_STREAM_EXTENSIONS, EXCEL_EXTENSIONS, PARQUET_EXTENSIONS
+)
+
+logger = logging.getLogger(__name__)
+
+# Working memory one request may need, in MB; 0 disables the check
+FORECAST_MEMORY_BUDGET_MB = float(os.getenv("FORECAST_MEMORY_BUDGET_MB", "1024"))
+
+# Peak parse memory per uploaded byte when a file is read whole, measured on
+# the benchmark uploads (benchmarks/) and rounded up
+PARSE_EXPANSION = {
+    '.csv': 5,
+    **{extension: 30 for extension in EXCEL_EXTENSIONS},
+    **{extension: 8 for extension in PARQUET_EXTENSIONS},
+    **{extension: 3 for extension in ARROW_FILE_EXTENSIONS + ARROW_STREAM_EXTENSIONS}
+}
+
+# Python memory per spreadsheet cell kept while reading (object plus list slot)
+BYTES_PER_CELL = 64
+
+_STATUS_KB = re.compile(r"^(VmHWM|VmRSS):\s+(\d+)\s+kB", re.MULTILINE)
+
+
+class MemoryBudgetExceededError(ValueError):
+    """Raised before reading an upload whose estimated memory exceeds the budget."""
+
+
+def check_memory_budget(size: int, extension: str, budget_mb: float = FORECAST_MEMORY_BUDGET_MB):
+    """Reject an upload of `size` bytes that is read whole if it would not fit the budget."""
+    if budget_mb <= 0:
+        return
+    estimate_mb = size * PARSE_EXPANSION.get(extension, 1) / (1024 * 1024)
+    if estimate_mb > budget_mb:
+        raise MemoryBudgetExceededError(
+            f"File needs about {estimate_mb:.0f}MB to process, over the {budget_mb:.0f}MB "
+            f"per-request memory budget"
+        )
+
+
+def check_cells_budget(cells: int, budget_mb: float = FORECAST_MEMORY_BUDGET_MB):
+    """Reject a read that would hold `cells` Python cell values over the budget."""
+    if budget_mb <= 0:
+        return
+    estimate_mb = cells * BYTES_PER_CELL / (1024 * 1024)
+    if estimate_mb > budget_mb:
+        raise MemoryBudgetExceededError(
+            f"Sheet needs about {estimate_mb:.0f}MB to read, over the {budget_mb:.0f}MB "
+            f"per-request memory budget"
+        )
+
+
+def _memory_status() -> Optional[Dict[str, int]]:
+    """VmHWM/VmRSS of this process in kB, or None off Linux."""
+    try:
+        with open("/proc/self/status") as handle:
+            return {name: int(kb) for name, kb in _STATUS_KB.findall(handle.read())}
+    except OSError:
+        return None
+
+
+def _reset_peak() -> bool:
+    """Reset the process's VmHWM to its current RSS (Linux 4.0+)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as handle:
+            handle.write("5")
+        return True
+    except OSError:
+        return False
+
+
+@contextmanager
+def peak_memory(peaks: Dict[str, float], stage: str) -> Iterator[None]:
+    """Record the block's peak memory above its starting RSS (MB) in `peaks[stage]`."""
+    start = _memory_status() if _reset_peak() else None
+    try:
+        yield
+    finally:
+        end = _memory_status() if start else None
+        if end and "VmHWM" in end and "VmRSS" in start:
+            peaks[stage] = round(max(0, end["VmHWM"] - start["VmRSS"]) / 1024, 1)
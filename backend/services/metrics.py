@@ -0,0 +1,88 @@
+"""Prometheus metrics for the forecast pipeline, served by main.py at /metrics.
+
+Stage timings are measured where the stage runs (often a forecast worker
+process) and travel back in `ForecastMeta.timings`; they are recorded here,
+in the API process, so one registry sees every request.
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from models.schemas import ForecastMeta
+
+# Upper bounds of the row-count label buckets (original upload rows)
+ROW_BUCKETS = ((1_000, "<1k"), (10_000, "1k-10k"), (100_000, "10k-100k"), (1_000_000, "100k-1M"))
+
+STAGE_SECONDS = Histogram(
+    "forecast_stage_seconds",
+    "Time spent in each forecast pipeline stage",
+    ["stage", "freq", "engine", "rows"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+REQUEST_SECONDS = Histogram(
+    "forecast_request_seconds",
+    "End-to-end forecast time, excluding response serialization",
+    ["freq", "engine", "rows", "cache"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+REQUESTS = Counter(
+    "forecast_requests_total",
+    "Forecast requests by outcome",
+    ["freq", "engine", "rows", "cache", "status"]
+)
+IN_FLIGHT = Gauge("forecast_requests_in_flight", "Forecast requests being processed")
+POOL_IN_FLIGHT = Gauge("forecast_pool_tasks_in_flight", "Stages submitted to the forecast pool and not finished")
+SERIALIZE_SECONDS = Histogram(
+    "forecast_serialize_seconds",
+    "Time spent encoding forecast responses",
+    ["format"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+AI_ADJUSTMENT_SECONDS = Histogram(
+    "ai_adjustment_upstream_seconds",
+    "Perplexity call latency",
+    ["outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30)
+)
+AI_ADJUSTMENTS = Counter(
+    "ai_adjustment_requests_total",
+    "AI adjustment lookups by macro cache status",
+    ["cache"]
+)
+
+
+def row_bucket(rows: Optional[int]) -> str:
+    if rows is None:
+        return "unknown"
+    for limit, label in ROW_BUCKETS:
+        if rows < limit:
+            return label
+    return ">=1M"
+
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    """Add the block's wall time (seconds) to `timings[stage]`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(timings.get(stage, 0.0) + time.perf_counter() - started, 4)
+
+
+def record_forecast(meta: ForecastMeta, seconds: float):
+    """Record a finished forecast; stage timings only count for freshly computed results."""
+    rows = row_bucket(meta.original_rows)
+    engine = meta.engine or "unknown"
+    cache = meta.cache_status or "none"
+    REQUESTS.labels(meta.freq, engine, rows, cache, "succeeded").inc()
+    REQUEST_SECONDS.labels(meta.freq, engine, rows, cache).observe(seconds)
+    for stage, stage_seconds in (meta.timings or {}).items():
+        if cache in ("miss", "bypass") or stage == "ai_adjustment":
+            STAGE_SECONDS.labels(stage, meta.freq, engine, rows).observe(stage_seconds)
+
+
+def record_failure(freq: str, engine: str):
+    REQUESTS.labels(freq, engine, "unknown", "none", "failed").inc()
@@ -0,0 +1,241 @@
+import gzip
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.schemas import ForecastMeta, ForecastRequest
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE_SUFFIX = ".json.gz"
+SERIES_FILE_PREFIX = "series-"
+SERIES_FILE_SUFFIX = ".json"
+TUNING_FILE_PREFIX = "tuning-"
+TEMP_FILE_SUFFIX = ".tmp"
+# Temp files older than this were left by a failed write or a dead worker
+STALE_TEMP_SECONDS = 3600
+_MODEL_ID = re.compile(r"[0-9a-f]{32}")
+
+
+class ModelNotFoundError(KeyError):
+    """Raised when a model id is unknown or its model has been evicted."""
+
+
+class ModelStore:
+    """On-disk store of fitted Prophet models, shared by every worker process.
+    
+    Each model is one gzipped JSON file (prophet.serialize plus the fit request
+    and meta). The directory is the index: file mtimes are the LRU order (loads
+    touch them), and the least recently used files are deleted until the store
+    is within `max_bytes` and `max_models`. Limits are enforced after every
+    `enforce_every` saves or `max_bytes / 20` written bytes per process rather
+    than after each save, so a store may run a few percent over its limits
+    between scans instead of rescanning the directory for every model.
+    
+    A small series index (one JSON file per series id) remembers the latest fit
+    of each series so its next upload can warm-start from it, and a tuning index
+    remembers each series' best Prophet hyperparameters.
+    """
+    
+    def __init__(self, root: str, max_bytes: int, max_models: int = 1000, memory_slots: int = 8,
+                 enforce_every: Optional[int] = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_models = max_models
+        self.memory_slots = memory_slots
+        self.enforce_every = enforce_every or max(1, max_models // 20)
+        # Writes since the last limit check, per prefix: (saves, bytes)
+        self._pending: Dict[str, Tuple[int, int]] = {}
+        # Recently loaded models, so repeated predictions skip deserialisation
+        self._loaded: "OrderedDict[str, Tuple[object, ForecastRequest, ForecastMeta]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls) -> "ModelStore":
+        """Build a store from MODEL_STORE_* environment variables."""
+        return cls(
+            root=os.getenv("MODEL_STORE_DIR", os.path.join(tempfile.gettempdir(), "forecast-models")),
+            max_bytes=int(float(os.getenv("MODEL_STORE_MAX_MB", "512")) * 1024 * 1024),
+            max_models=int(os.getenv("MODEL_STORE_MAX_MODELS", "1000"))
+        )
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.max_models > 0
+    
+    def _path(self, model_id: str) -> str:
+        # Ids are generated here; anything else must not reach the filesystem
+        if not _MODEL_ID.fullmatch(model_id):
+            raise ModelNotFoundError(model_id)
+        return os.path.join(self.root, model_id + MODEL_FILE_SUFFIX)
+    
+    def save(self, model, request: ForecastRequest, meta: ForecastMeta) -> str:
+        """Persist a fitted model and return its id."""
+        from prophet.serialize import model_to_json
+        
+        model_id = uuid.uuid4().hex
+        payload = {
+            "model": model_to_json(model),
+            "request": request.model_dump(),
+            "meta": meta.model_dump(),
+            "created_at": time.time()
+        }
+        data = gzip.compress(json.dumps(payload).encode("utf-8"), compresslevel=6)
+        
+        os.makedirs(self.root, exist_ok=True)
+        # Write then rename so readers in other workers never see a partial file
+        self._write_atomic(self._path(model_id), data)
+        
+        if self._due("", len(data)):
+            self._enforce_limits()
+        return model_id
+    
+    def save_series(self, series_id: str, entry: Dict[str, Any]):
+        """Point a series at its latest fit (model id, row count, data hash, Stan params)."""
+        self._save_index(SERIES_FILE_PREFIX, series_id, entry)
+    
+    def load_series(self, series_id: str) -> Optional[Dict[str, Any]]:
+        return self._load_index(SERIES_FILE_PREFIX, series_id)
+    
+    def save_tuning(self, series_id: str, entry: Dict[str, Any]):
+        """Remember the best Prophet hyperparameters found for a series."""
+        self._save_index(TUNING_FILE_PREFIX, series_id, entry)
+    
+    def load_tuning(self, series_id: str) -> Optional[Dict[str, Any]]:
+        return self._load_index(TUNING_FILE_PREFIX, series_id)
+    
+    def _save_index(self, prefix: str, series_id: str, entry: Dict[str, Any]):
+        os.makedirs(self.root, exist_ok=True)
+        self._write_atomic(self._series_path(prefix, series_id), json.dumps(entry).encode("utf-8"))
+        if self._due(prefix, 0):
+            self._evict(self._scan(SERIES_FILE_SUFFIX, prefix=prefix), None, self.max_models)
+    
+    def _write_atomic(self, path: str, data: bytes):
+        temp_path = f"{path}.{os.getpid()}{TEMP_FILE_SUFFIX}"
+        try:
+            with open(temp_path, "wb") as handle:
+                handle.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+    
+    def _due(self, prefix: str, size: int) -> bool:
+        """Count a write and report whether the limits should be checked now."""
+        with self._lock:
+            saves, written = self._pending.get(prefix, (0, 0))
+            saves, written = saves + 1, written + size
+            due = saves >= self.enforce_every or written >= self.max_bytes // 20
+            self._pending[prefix] = (0, 0) if due else (saves, written)
+        return due
+    
+    def _load_index(self, prefix: str, series_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._series_path(prefix, series_id)) as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return None
+    
+    def _series_path(self, prefix: str, series_id: str) -> str:
+        if not _MODEL_ID.fullmatch(series_id):
+            raise ValueError(f"Invalid series id: {series_id}")
+        return os.path.join(self.root, prefix + series_id + SERIES_FILE_SUFFIX)
+    
+    def load(self, model_id: str) -> Tuple[object, ForecastRequest, ForecastMeta]:
+        """Return (model, fit request, meta), refreshing the model's LRU position."""
+        path = self._path(model_id)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._loaded.pop(model_id, None)
+            raise ModelNotFoundError(model_id)
+        
+        with self._lock:
+            entry = self._loaded.get(model_id)
+            if entry is not None:
+                self._loaded.move_to_end(model_id)
+                return entry
+        
+        from prophet.serialize import model_from_json
+        
+        try:
+            with open(path, "rb") as handle:
+                payload = json.loads(gzip.decompress(handle.read()))
+        except FileNotFoundError:
+            # Evicted by another worker between the touch and the read
+            raise ModelNotFoundError(model_id)
+        
+        entry = (
+            model_from_json(payload["model"]),
+            ForecastRequest(**payload["request"]),
+            ForecastMeta(**payload["meta"])
+        )
+        with self._lock:
+            self._loaded[model_id] = entry
+            while len(self._loaded) > self.memory_slots:
+                self._loaded.popitem(last=False)
+        return entry
+    
+    def _enforce_limits(self):
+        self._evict(self._scan(MODEL_FILE_SUFFIX), self.max_bytes, self.max_models)
+    
+    def _scan(self, suffix: str, prefix: str = "") -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of matching files, least recently used first.
+        
+        Also deletes temp files older than STALE_TEMP_SECONDS, which no writer
+        will rename any more.
+        """
+        entries = []
+        stale_before = time.time() - STALE_TEMP_SECONDS
+        with os.scandir(self.root) as scan:
+            for item in scan:
+                is_temp = item.name.endswith(TEMP_FILE_SUFFIX)
+                if not is_temp and not (item.name.startswith(prefix) and item.name.endswith(suffix)):
+                    continue
+                try:
+                    stat = item.stat()
+                    if is_temp:
+                        if stat.st_mtime < stale_before:
+                            os.unlink(item.path)
+                            logger.info(f"Removed stale temp file {item.name}")
+                        continue
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+        entries.sort()
+        return entries
+    
+    def _evict(self, entries: List[Tuple[float, int, str]], max_bytes: Optional[int], max_count: int):
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, path in entries:
+            if (max_bytes is None or total <= max_bytes) and count <= max_count:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass  # another worker evicted it first
+            total -= size
+            count -= 1
+            logger.info(f"Evicted stored model {os.path.basename(path)}")
+
+
+_model_store: Optional[ModelStore] = None
+
+
+def get_model_store() -> ModelStore:
+    """Return this process's handle on the shared model store."""
+    global _model_store
+    if _model_store is None:
+        _model_store = ModelStore.from_env()
+    return _model_store
@@ -1,19 +1,104 @@
 import httpx
 import json
 import os
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Tuple
 import logging
 from dotenv import load_dotenv
 
 from models.schemas import AIAdjustmentRequest, AIAdjustmentResponse
+from services.cache import TTLCache, get_adjustment_cache
+from services.metrics import AI_ADJUSTMENT_SECONDS, AI_ADJUSTMENTS
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Bucket sizes for the adjustment cache key: growth rates in percentage points,
+# volatility on its 0-1 scale, and horizon in periods per frequency
+ADJUSTMENT_GROWTH_BUCKET = float(os.getenv("AI_ADJUSTMENT_CACHE_GROWTH_BUCKET", "2.5"))
+ADJUSTMENT_VOLATILITY_BUCKET = float(os.getenv("AI_ADJUSTMENT_CACHE_VOLATILITY_BUCKET", "0.1"))
+ADJUSTMENT_HORIZON_BUCKETS = {"D": 7, "W": 4, "M": 3}
+
+# Application-lifetime HTTP client, opened and closed by the FastAPI lifespan
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build a pooled keep-alive client configured from PERPLEXITY_* settings."""
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("PERPLEXITY_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("PERPLEXITY_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("PERPLEXITY_KEEPALIVE_EXPIRY", "60"))
+    )
+    timeout = httpx.Timeout(float(os.getenv("PERPLEXITY_TIMEOUT", "30")))
+    http2 = os.getenv("PERPLEXITY_HTTP2", "true").lower() == "true"
+    try:
+        return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+    except ImportError:
+        logger.warning("HTTP/2 requested but the 'h2' package is missing, using HTTP/1.1")
+        return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+def open_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_http_client() -> Optional[httpx.AsyncClient]:
+    """Return the shared client, or None outside the application lifespan."""
+    return _http_client
+
+
+class AdjustmentUnavailableError(Exception):
+    """Raised when Perplexity cannot produce a usable adjustment."""
+
+
+def _bucket(value: float, step: float) -> float:
+    return round(round(value / step) * step, 6)
+
+
+def adjustment_cache_key(request: AIAdjustmentRequest) -> Tuple:
+    """Normalised, bucketed view of the prompt inputs.
+    
+    Requests that would produce practically the same prompt (same market,
+    similar recent trend, same holidays) share one cached adjustment.
+    """
+    def normalise(text: Optional[str]) -> str:
+        return " ".join((text or "").lower().split())
+    
+    summary = request.recent_summary
+    horizon_step = ADJUSTMENT_HORIZON_BUCKETS.get(request.freq, 1)
+    return (
+        normalise(request.industry),
+        normalise(request.country),
+        normalise(request.state),
+        normalise(request.city),
+        request.freq,
+        -(-request.horizon // horizon_step) * horizon_step,  # round up to the bucket
+        _bucket(summary.last4_growth_pct, ADJUSTMENT_GROWTH_BUCKET),
+        _bucket(summary.yoy_last_period_pct, ADJUSTMENT_GROWTH_BUCKET),
+        _bucket(summary.volatility_index, ADJUSTMENT_VOLATILITY_BUCKET),
+        tuple(sorted({normalise(name) for name in request.holidays_window}))
+    )
+
+
 class PerplexityClient:
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None,
+                 cache: Optional[TTLCache] = None):
+        # Resolved per call so clients built before startup still pick up the shared pool
+        self._http_client = http_client
+        self.cache = cache if cache is not None else get_adjustment_cache()
         self.api_key = os.getenv("PERPLEXITY_API_KEY")
         if not self.api_key:
             logger.warning("PERPLEXITY_API_KEY not found in environment variables")
@@ -73,6 +158,36 @@ Do not include any other text."""
                 sources=[]
             )
         
+        try:
+            return await self._fetch_adjustment(request)
+        except AdjustmentUnavailableError as e:
+            return self._fallback_response(str(e))
+    
+    async def get_adjustment_cached(self, request: AIAdjustmentRequest
+                                    ) -> Tuple[AIAdjustmentResponse, str]:
+        """Get an adjustment through the macro cache.
+        
+        Returns (adjustment, cache_status) where cache_status is 'hit', 'miss',
+        'coalesced' (shared an in-flight upstream call) or 'bypass'. Fallback
+        responses are never cached, so a transient API failure is retried on
+        the next request.
+        """
+        if not self.api_key:
+            AI_ADJUSTMENTS.labels("bypass").inc()
+            return await self.get_adjustment(request), "bypass"
+        
+        try:
+            adjustment, cache_status = await self.cache.get_or_compute(
+                adjustment_cache_key(request),
+                lambda: self._fetch_adjustment(request)
+            )
+        except AdjustmentUnavailableError as e:
+            adjustment, cache_status = self._fallback_response(str(e)), "miss"
+        AI_ADJUSTMENTS.labels(cache_status).inc()
+        return adjustment, cache_status
+    
+    async def _fetch_adjustment(self, request: AIAdjustmentRequest) -> AIAdjustmentResponse:
+        """Call Perplexity, raising AdjustmentUnavailableError instead of falling back."""
         try:
             system_prompt, user_prompt = self._build_prompt(request)
             
@@ -86,52 +201,68 @@ Do not include any other text."""
                 "max_tokens": 500
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=self.headers,
-                    json=payload
-                )
-                
-                if response.status_code != 200:
-                    logger.error(f"Perplexity API error: {response.status_code} - {response.text}")
-                    return self._fallback_response("API request failed")
+            started = time.perf_counter()
+            try:
+                response = await self._post(payload)
+            except Exception:
+                AI_ADJUSTMENT_SECONDS.labels("error").observe(time.perf_counter() - started)
+                raise
+            AI_ADJUSTMENT_SECONDS.labels("ok" if response.status_code == 200 else "http_error").observe(
+                time.perf_counter() - started
+            )
+            
+            if response.status_code != 200:
+                logger.error(f"Perplexity API error: {response.status_code} - {response.text}")
+                raise AdjustmentUnavailableError("API request failed")
+            
+            result = response.json()
+            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+            
+            if not content:
+                logger.error("Empty response from Perplexity API")
+                raise AdjustmentUnavailableError("Empty API response")
+            
+            # Parse JSON from content
+            try:
+                # Sometimes the response might have extra text, try to extract JSON
+                content = content.strip()
+                if content.startswith("```json"):
+                    content = content.replace("```json", "").replace("```", "").strip()
+                elif content.startswith("```"):
+                    content = content.replace("```", "").strip()
                 
-                result = response.json()
-                content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+                adjustment_data = json.loads(content)
                 
-                if not content:
-                    logger.error("Empty response from Perplexity API")
-                    return self._fallback_response("Empty API response")
+                # Validate and clamp adjustment percentage
+                adj_pct = float(adjustment_data.get("adjustment_pct", 0))
+                adj_pct = max(-20, min(20, adj_pct))  # Clamp to [-20, 20]
                 
-                # Parse JSON from content
-                try:
-                    # Sometimes the response might have extra text, try to extract JSON
-                    content = content.strip()
-                    if content.startswith("```json"):
-                        content = content.replace("```json", "").replace("```", "").strip()
-                    elif content.startswith("```"):
-                        content = content.replace("```", "").strip()
-                    
-                    adjustment_data = json.loads(content)
-                    
-                    # Validate and clamp adjustment percentage
-                    adj_pct = float(adjustment_data.get("adjustment_pct", 0))
-                    adj_pct = max(-20, min(20, adj_pct))  # Clamp to [-20, 20]
-                    
-                    return AIAdjustmentResponse(
-                        adjustment_pct=adj_pct,
-                        rationale=adjustment_data.get("rationale", "Macro adjustment applied"),
-                        sources=adjustment_data.get("sources", [])
-                    )
-                    
-                except (json.JSONDecodeError, ValueError, KeyError) as e:
-                    logger.error(f"Failed to parse Perplexity response: {e} - Content: {content}")
-                    return self._fallback_response("Invalid API response format")
+                return AIAdjustmentResponse(
+                    adjustment_pct=adj_pct,
+                    rationale=adjustment_data.get("rationale", "Macro adjustment applied"),
+                    sources=adjustment_data.get("sources", [])
+                )
                 
+            except (json.JSONDecodeError, ValueError, KeyError) as e:
+                logger.error(f"Failed to parse Perplexity response: {e} - Content: {content}")
+                raise AdjustmentUnavailableError("Invalid API response format")
+            
+        except AdjustmentUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Perplexity API call failed: {e}")
-            return self._fallback_response("API service unavailable")
+            raise AdjustmentUnavailableError("API service unavailable")
+    
+    async def _post(self, payload: Dict[str, Any]) -> httpx.Response:
+        """POST a chat completion over the shared connection pool when available."""
+        url = f"{self.base_url}/chat/completions"
+        client = self._http_client or get_http_client()
+        if client is not None:
+            return await client.post(url, headers=self.headers, json=payload)
+        
+        # Outside the app lifespan (scripts, tests) fall back to a one-off client
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            return await client.post(url, headers=self.headers, json=payload)
     
     def _fallback_response(self, reason: str) -> AIAdjustmentResponse:
         """Return fallback response with 0% adjustment."""
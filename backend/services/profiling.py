@@ -0,0 +1,285 @@
+"""Opt-in cProfile capture of single forecast requests, with a small on-disk store.
+
+A profiled request runs with an active `ProfileSession` in a context variable.
+The forecast executor sees it and profiles each pool stage in its worker,
+sending the stats back. The API-process profile and the worker profiles are
+merged into one pstats file per request.
+"""
+import contextvars
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_QUERY_PARAM = "profile_token"
+PROFILE_FILE_SUFFIX = ".prof"
+PROFILE_META_SUFFIX = ".json"
+_PROFILE_ID = re.compile(r"[0-9a-f]{32}")
+
+_active_profile: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar(
+    "active_profile", default=None
+)
+
+
+class ProfilingError(Exception):
+    """A profiling request that cannot be served, with the HTTP status to answer."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+
+
+class ProfileNotFoundError(KeyError):
+    """Raised when a profile id is unknown or its profile has been deleted."""
+
+
+class _RawStats:
+    """Adapter so pstats.Stats.add() accepts a worker's raw stats dict."""
+
+    def __init__(self, stats: Dict[Any, Any]):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class ProfileSession:
+    """The API-process profiler of one request plus the stats of its pool stages."""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.worker_stats: List[Dict[Any, Any]] = []
+        self.stages: List[str] = []
+
+    def add_worker_stats(self, stage: str, stats: Optional[Dict[Any, Any]]):
+        self.stages.append(stage)
+        if stats:
+            self.worker_stats.append(stats)
+
+    def merged_stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.profiler)
+        for worker_stats in self.worker_stats:
+            stats.add(_RawStats(worker_stats))
+        return stats
+
+
+def active_profile() -> Optional[ProfileSession]:
+    """The profile session of the current request, if it is being profiled."""
+    return _active_profile.get()
+
+
+def profile_token(request: Any) -> Optional[str]:
+    """The profiling token sent with a request, by header or query parameter."""
+    return request.headers.get(PROFILE_HEADER) or request.query_params.get(PROFILE_QUERY_PARAM)
+
+
+def profiled_call(fn: Callable[..., Any], *args: Any) -> Tuple[Any, Optional[Dict[Any, Any]]]:
+    """Run a pool stage under cProfile; returns (result, raw stats) for the API process."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active (thread pools on Python 3.12+)
+        return fn(*args), None
+    try:
+        result = fn(*args)
+    finally:
+        profiler.disable()
+    profiler.create_stats()
+    return result, profiler.stats
+
+
+class ProfileStore:
+    """Profiles on disk: a pstats dump and a JSON summary per profile.
+
+    The newest `max_profiles` profiles younger than `max_age` seconds are kept.
+    """
+
+    def __init__(self, root: str, max_profiles: int = 20, max_age: Optional[float] = 86400):
+        self.root = root
+        self.max_profiles = max_profiles
+        self.max_age = max_age
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        if not _PROFILE_ID.fullmatch(profile_id):
+            raise ProfileNotFoundError(profile_id)
+        return os.path.join(self.root, profile_id + suffix)
+
+    def save(self, stats: pstats.Stats, info: Dict[str, Any]) -> str:
+        """Persist a profile and return its id."""
+        profile_id = uuid.uuid4().hex
+        os.makedirs(self.root, exist_ok=True)
+        stats.dump_stats(self._path(profile_id, PROFILE_FILE_SUFFIX))
+        info = {"id": profile_id, "created_at": time.time(), **info}
+        with open(self._path(profile_id, PROFILE_META_SUFFIX), "w") as handle:
+            json.dump(info, handle)
+        self._enforce_retention()
+        return profile_id
+
+    def info(self, profile_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._path(profile_id, PROFILE_META_SUFFIX)) as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            raise ProfileNotFoundError(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries of the stored profiles, newest first."""
+        profiles = []
+        for _, profile_id in reversed(self._scan()):
+            try:
+                profiles.append(self.info(profile_id))
+            except (ProfileNotFoundError, ValueError):
+                continue
+        return profiles
+
+    def pstats_path(self, profile_id: str) -> str:
+        path = self._path(profile_id, PROFILE_FILE_SUFFIX)
+        if not os.path.exists(path):
+            raise ProfileNotFoundError(profile_id)
+        return path
+
+    def report(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> str:
+        """Text report of the top `limit` functions, as printed by pstats."""
+        output = io.StringIO()
+        stats = pstats.Stats(self.pstats_path(profile_id), stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def _scan(self) -> List[Tuple[float, str]]:
+        """(mtime, id) of stored profiles, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        with os.scandir(self.root) as scan:
+            for item in scan:
+                if not item.name.endswith(PROFILE_META_SUFFIX):
+                    continue
+                try:
+                    entries.append((item.stat().st_mtime, item.name[:-len(PROFILE_META_SUFFIX)]))
+                except FileNotFoundError:
+                    continue
+        entries.sort()
+        return entries
+
+    def _enforce_retention(self):
+        entries = self._scan()
+        cutoff = time.time() - self.max_age if self.max_age else None
+        excess = len(entries) - self.max_profiles
+        for index, (mtime, profile_id) in enumerate(entries):
+            if index >= excess and (cutoff is None or mtime >= cutoff):
+                continue
+            for suffix in (PROFILE_FILE_SUFFIX, PROFILE_META_SUFFIX):
+                try:
+                    os.unlink(self._path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass
+            logger.info(f"Deleted profile {profile_id}")
+
+
+class RequestProfiler:
+    """Admin-gated, rate-limited profiling of whole requests.
+
+    Disabled unless a token is configured. At most one request is profiled at a
+    time (cProfile allows one active profiler) and `max_per_hour` in total.
+    """
+
+    def __init__(self, token: Optional[str], store: ProfileStore, max_per_hour: int = 6):
+        self.token = token
+        self.store = store
+        self.max_per_hour = max_per_hour
+        self._started: Deque[float] = deque()
+        self._active = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        """Build a profiler from PROFILING_* / PROFILE_STORE_* environment variables."""
+        max_age = float(os.getenv("PROFILE_STORE_MAX_AGE_HOURS", "24")) * 3600
+        return cls(
+            token=os.getenv("PROFILING_TOKEN") or None,
+            store=ProfileStore(
+                root=os.getenv("PROFILE_STORE_DIR", os.path.join(tempfile.gettempdir(), "forecast-profiles")),
+                max_profiles=int(os.getenv("PROFILE_STORE_MAX_PROFILES", "20")),
+                max_age=max_age or None
+            ),
+            max_per_hour=int(os.getenv("PROFILING_MAX_PER_HOUR", "6"))
+        )
+
+    def authorize(self, token: Optional[str]):
+        """Raise ProfilingError unless `token` is the configured admin token."""
+        if not self.token:
+            raise ProfilingError(403, "Profiling is disabled")
+        if not token or not hmac.compare_digest(token.encode("utf-8"), self.token.encode("utf-8")):
+            raise ProfilingError(403, "Invalid profiling token")
+
+    def _acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            while self._started and now - self._started[0] > 3600:
+                self._started.popleft()
+            if self._active:
+                raise ProfilingError(429, "Another request is being profiled, retry shortly")
+            if len(self._started) >= self.max_per_hour:
+                raise ProfilingError(429, f"Profiling is limited to {self.max_per_hour} requests per hour")
+            self._started.append(now)
+            self._active = True
+
+    def _release(self):
+        with self._lock:
+            self._active = False
+
+    @asynccontextmanager
+    async def profile(self, token: Optional[str], info: Dict[str, Any]) -> AsyncIterator[ProfileSession]:
+        """Profile the enclosed request; the profile is stored on exit and its id set in info['id']."""
+        self.authorize(token)
+        self._acquire()
+        session = ProfileSession()
+        try:
+            session.profiler.enable()
+        except ValueError:
+            self._release()
+            raise ProfilingError(429, "Another profiler is active in this process")
+
+        context_token = _active_profile.set(session)
+        started = time.perf_counter()
+        try:
+            yield session
+        finally:
+            session.profiler.disable()
+            _active_profile.reset(context_token)
+            self._release()
+
+        info.update({
+            "duration_seconds": round(time.perf_counter() - started, 4),
+            "worker_stages": session.stages
+        })
+        try:
+            info["id"] = self.store.save(session.merged_stats(), info)
+        except Exception as e:
+            logger.error(f"Failed to store profile: {e}")
+
+
+_request_profiler: Optional[RequestProfiler] = None
+
+
+def get_request_profiler() -> RequestProfiler:
+    """Return the process-wide request profiler."""
+    global _request_profiler
+    if _request_profiler is None:
+        _request_profiler = RequestProfiler.from_env()
+    return _request_profiler
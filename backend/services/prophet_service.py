@@ -1,52 +1,137 @@
 import pandas as pd
 import numpy as np
-from prophet import Prophet
 from datetime import datetime, timedelta
-from typing import Tuple, Dict, Any, List, Optional
+from typing import TYPE_CHECKING, Tuple, Dict, Any, List, Optional, Callable, AsyncIterator, Union
 import logging
-import io
+import asyncio
+import copy
+import hashlib
+import json
+import math
+import os
+import time
+from statistics import NormalDist
 
 from services.holidays_service import HolidaysService
 from services.perplexity_client import PerplexityClient
+from services.backtest import BACKTEST_MAX_CUTOFFS, accuracy_metrics, align_forecasts, backtest_window, rolling_cutoffs
+from services.cache import TTLCache, get_backtest_cache, get_forecast_cache
+from services.decimation import decimate_series
+from services.engines import LIGHT_ENGINE_FITS, LIGHT_ENGINES, choose_engine
+from services.memory import MemoryBudgetExceededError, check_memory_budget, peak_memory
+from services.metrics import IN_FLIGHT, record_failure, record_forecast, timed
+from services.profiling import active_profile
+from services.tuning import halving_schedule, holdout_rmse, holdout_split, sample_candidates
+from services.model_store import ModelNotFoundError, ModelStore, get_model_store
+from services.ingest import (
+    COLUMNAR_EXTENSIONS, EXCEL_EXTENSIONS, UploadSource, as_upload_source, detect_encoding,
+    read_columnar_frame, read_excel_frame
+)
+from services.executor import (
+    ForecastExecutor, StageTimeoutError, WorkerCrashedError, get_forecast_executor
+)
 from models.schemas import (
     ForecastRequest, ForecastResponse, ForecastMeta, DataPoint, 
-    AIAdjustmentRequest, RecentSummary
+    AIAdjustmentRequest, RecentSummary, BatchForecastRequest, SeriesForecastResult,
+    ModelPredictRequest, BacktestMeta, BacktestResponse
 )
 
+if TYPE_CHECKING:
+    # Imported where models are built: only forecast workers need prophet
+    from prophet import Prophet
+
 logger = logging.getLogger(__name__)
 
+# Request fields that change the fitted model; everything else (AI adjustment,
+# industry, city) is applied after the fit and can reuse a cached result.
+FIT_CACHE_FIELDS = {'freq', 'horizon', 'date_col', 'target_col', 'country', 'state', 'apply_holidays', 'engine',
+                    'include_fitted', 'interval_mode', 'interval_samples', 'tune', 'sheet', 'header_row'}
+
+# Prediction interval fidelity: Prophet's sampled intervals ('full'), an
+# analytic observation-noise band ('fast') or zero-width intervals ('none')
+INTERVAL_MODES = ('none', 'fast', 'full')
+MIN_INTERVAL_SAMPLES, MAX_INTERVAL_SAMPLES = 10, 2000
+
+# Progress stages reported to `progress` callbacks, in pipeline order
+PIPELINE_STAGES = ['parsed', 'cleaned', 'fitted', 'predicted', 'ai_adjusted']
+
+ProgressCallback = Callable[[str], None]
+
+MAX_BATCH_SERIES = int(os.getenv("FORECAST_BATCH_MAX_SERIES", "5000"))
+
+# Leading rows that identify a series across uploads when no series_key is given
+SERIES_PREFIX_ROWS = 16
+
+# Rows per chunk when streaming CSV uploads
+CSV_CHUNK_ROWS = int(os.getenv("FORECAST_CSV_CHUNK_ROWS", "200000"))
+
+# Seconds the AI adjustment may take, counted from when it starts (right after
+# cleaning, alongside the fit). Past it the baseline is returned; 0 waits indefinitely.
+AI_ADJUSTMENT_BUDGET = float(os.getenv("AI_ADJUSTMENT_BUDGET", "20"))
+
+# A started AI adjustment and the loop time it must finish by
+AdjustmentTask = Tuple[asyncio.Future, Optional[float]]
+
+# (df_clean, meta, forecast_base_df, ai_adjustment_info, adjustment_factor)
+ForecastFrames = Tuple[pd.DataFrame, ForecastMeta, pd.DataFrame, Optional[Dict[str, Any]], float]
+
 class ProphetService:
     """Service for Prophet-based forecasting with AI adjustment."""
     
-    def __init__(self):
+    def __init__(self, executor: Optional[ForecastExecutor] = None,
+                 cache: Optional[TTLCache] = None,
+                 model_store: Optional[ModelStore] = None,
+                 backtest_cache: Optional[TTLCache] = None):
         self.holidays_service = HolidaysService()
         self.ai_client = PerplexityClient()
+        self.executor = executor or get_forecast_executor()
+        self.cache = cache if cache is not None else get_forecast_cache()
+        self.model_store = model_store or get_model_store()
+        self.backtest_cache = backtest_cache if backtest_cache is not None else get_backtest_cache()
     
-    def read_file(self, file_content: bytes, filename: str) -> pd.DataFrame:
-        """Read CSV or Excel file content into DataFrame."""
+    def read_file(self, file_content: Union[bytes, UploadSource], filename: str,
+                  columns: Optional[List[str]] = None, sheet: Optional[str] = None,
+                  header_row: int = 0) -> pd.DataFrame:
+        """Read CSV, Excel, Parquet or Arrow file content into DataFrame.
+        
+        `columns` limits the frame to the listed columns; missing ones are left
+        for the caller to report. `sheet` and `header_row` only apply to Excel.
+        """
         try:
+            source = as_upload_source(file_content, filename)
+            # Skipped columns are never parsed into Python objects
+            usecols = (lambda column: column in columns) if columns is not None else None
+            
             if filename.lower().endswith('.csv'):
-                # Try different encodings for CSV
-                for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                    try:
-                        df = pd.read_csv(io.BytesIO(file_content), encoding=encoding)
-                        logger.info(f"Successfully read CSV with {encoding} encoding")
-                        break
-                    except UnicodeDecodeError:
-                        continue
-                else:
-                    raise ValueError("Could not decode CSV file with any supported encoding")
-            
-            elif filename.lower().endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(io.BytesIO(file_content))
+                # Detect the encoding once from a prefix; fall back to latin-1
+                # only if an invalid byte turns up past the prefix
+                encoding = detect_encoding(source.read_prefix())
+                try:
+                    df = pd.read_csv(source.open(), encoding=encoding, usecols=usecols)
+                except UnicodeDecodeError:
+                    encoding = 'latin-1'
+                    df = pd.read_csv(source.open(), encoding=encoding, usecols=usecols)
+                logger.info(f"Successfully read CSV with {encoding} encoding")
+            
+            elif filename.lower().endswith(EXCEL_EXTENSIONS):
+                df = read_excel_frame(source, columns, sheet, header_row)
                 logger.info("Successfully read Excel file")
             
+            elif filename.lower().endswith(COLUMNAR_EXTENSIONS):
+                df = read_columnar_frame(source, columns)
+                logger.info(f"Successfully read {source.extension} file")
+            
             else:
-                raise ValueError("File must be CSV (.csv) or Excel (.xlsx, .xls)")
+                raise ValueError(
+                    "File must be CSV (.csv), Excel (.xlsx, .xls), Parquet (.parquet) "
+                    "or Arrow IPC (.feather, .arrow, .arrows)"
+                )
             
             logger.info(f"File loaded: {len(df)} rows, {len(df.columns)} columns")
             return df
             
+        except MemoryBudgetExceededError:
+            raise
         except Exception as e:
             logger.error(f"Error reading file: {e}")
             raise ValueError(f"Failed to read file: {str(e)}")
@@ -54,92 +139,202 @@ class ProphetService:
     def validate_and_process_data(self, df: pd.DataFrame, 
                                 request: ForecastRequest) -> Tuple[pd.DataFrame, ForecastMeta]:
         """Validate and process the input data for forecasting."""
+        ds, y, original_rows = self._extract_columns(df, request)
+        return self._clean_columns(ds, y, original_rows, request)
+    
+    def _extract_columns(self, df: pd.DataFrame,
+                         request: ForecastRequest) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Parse the date and target columns into (datetime64[ns], float64, row count) arrays.
+        
+        Unparseable values become NaT/NaN. The arrays are copies, so nothing
+        keeps `df` alive once the caller drops it.
+        """
         try:
-            original_rows = len(df)
-            
             # Check if columns exist
             if request.date_col not in df.columns:
                 raise ValueError(f"Date column '{request.date_col}' not found in data")
             if request.target_col not in df.columns:
                 raise ValueError(f"Target column '{request.target_col}' not found in data")
             
-            # Convert date column
-            df_clean = df[[request.date_col, request.target_col]].copy()
-            df_clean.columns = ['ds', 'y']
+            # Parse dates; typed timestamps (Parquet/Arrow) skip format inference
+            ds = df[request.date_col]
+            if pd.api.types.is_datetime64_any_dtype(ds):
+                if getattr(ds.dt, 'tz', None) is not None:
+                    # Prophet needs naive timestamps
+                    ds = ds.dt.tz_localize(None)
+            else:
+                ds = pd.to_datetime(ds, errors='coerce')
+            y = pd.to_numeric(df[request.target_col], errors='coerce')
             
-            # Parse dates
-            df_clean['ds'] = pd.to_datetime(df_clean['ds'], errors='coerce')
-            null_dates = df_clean['ds'].isnull().sum()
+            # The target stays float64: sums of float32 sales lose cents past
+            # ~100k, and Prophet converts to float64 for the fit anyway
+            return (ds.to_numpy(dtype='datetime64[ns]', copy=True),
+                    y.to_numpy(dtype=np.float64, copy=True), len(df))
+            
+        except Exception as e:
+            logger.error(f"Data validation failed: {e}")
+            raise ValueError(f"Data validation failed: {str(e)}")
+    
+    def _clean_columns(self, ds: np.ndarray, y: np.ndarray, original_rows: int,
+                       request: ForecastRequest) -> Tuple[pd.DataFrame, ForecastMeta]:
+        """Drop invalid rows and aggregate parsed columns to the requested frequency, in one pass."""
+        try:
+            # Targets are only counted as invalid on rows with a valid date
+            bad_dates = np.isnat(ds)
+            bad_targets = np.isnan(y) & ~bad_dates
+            null_dates = int(bad_dates.sum())
+            null_targets = int(bad_targets.sum())
             
             if null_dates > 0:
                 logger.warning(f"Found {null_dates} invalid dates, removing them")
-                df_clean = df_clean.dropna(subset=['ds'])
-            
-            # Convert target to numeric
-            df_clean['y'] = pd.to_numeric(df_clean['y'], errors='coerce')
-            null_targets = df_clean['y'].isnull().sum()
-            
             if null_targets > 0:
                 logger.warning(f"Found {null_targets} invalid target values, removing them")
-                df_clean = df_clean.dropna(subset=['y'])
             
-            if len(df_clean) == 0:
+            keep = ~(bad_dates | bad_targets)
+            valid_rows = int(keep.sum())
+            if valid_rows == 0:
                 raise ValueError("No valid data remaining after cleaning")
             
-            # Sort by date
-            df_clean = df_clean.sort_values('ds').reset_index(drop=True)
-            
             # Check minimum data requirements
-            if len(df_clean) < 12:
-                raise ValueError(f"Insufficient data: need at least 12 periods, got {len(df_clean)}")
+            if valid_rows < 12:
+                raise ValueError(f"Insufficient data: need at least 12 periods, got {valid_rows}")
             
-            # Aggregate to requested frequency if needed
-            df_clean = self._aggregate_to_frequency(df_clean, request.freq)
+            # Aggregate to requested frequency (also sorts by date)
+            df_clean = self._aggregate_to_frequency(
+                pd.DataFrame({'ds': ds[keep], 'y': y[keep]}), request.freq
+            )
+            return df_clean, self._history_meta(df_clean, request, original_rows, null_dates, null_targets)
             
-            processed_rows = len(df_clean)
-            train_start = df_clean['ds'].min().strftime('%Y-%m-%d')
-            train_end = df_clean['ds'].max().strftime('%Y-%m-%d')
+        except Exception as e:
+            logger.error(f"Data validation failed: {e}")
+            raise ValueError(f"Data validation failed: {str(e)}")
+    
+    def _history_meta(self, df_clean: pd.DataFrame, request: ForecastRequest, original_rows: int,
+                      null_dates: int, null_targets: int) -> ForecastMeta:
+        return ForecastMeta(
+            freq=request.freq,
+            train_start=df_clean['ds'].min().strftime('%Y-%m-%d'),
+            train_end=df_clean['ds'].max().strftime('%Y-%m-%d'),
+            horizon=request.horizon,
+            holidays_used=[],
+            original_rows=original_rows,
+            processed_rows=len(df_clean),
+            null_dates=null_dates,
+            null_targets=null_targets
+        )
+    
+    def read_csv_aggregated(self, source: UploadSource,
+                            request: ForecastRequest) -> Tuple[pd.DataFrame, ForecastMeta]:
+        """Stream a CSV in chunks, keeping only the date/target columns and
+        aggregating each chunk to the target frequency as it is read.
+        
+        Produces the same frame and meta as read_file + validate_and_process_data,
+        but peak memory is bounded by the chunk size and the number of periods
+        rather than by the file size.
+        """
+        encoding = detect_encoding(source.read_prefix())
+        try:
+            return self._read_csv_chunks(source, request, encoding)
+        except UnicodeDecodeError:
+            logger.warning("CSV is not valid UTF-8 past the sniffed prefix, retrying as latin-1")
+            return self._read_csv_chunks(source, request, 'latin-1')
+    
+    def _read_csv_chunks(self, source: UploadSource, request: ForecastRequest,
+                         encoding: str) -> Tuple[pd.DataFrame, ForecastMeta]:
+        try:
+            columns = pd.read_csv(source.open(), encoding=encoding, nrows=0).columns
+        except UnicodeDecodeError:
+            raise
+        except Exception as e:
+            logger.error(f"Error reading file: {e}")
+            raise ValueError(f"Failed to read file: {str(e)}")
+        
+        try:
+            # Check if columns exist
+            if request.date_col not in columns:
+                raise ValueError(f"Date column '{request.date_col}' not found in data")
+            if request.target_col not in columns:
+                raise ValueError(f"Target column '{request.target_col}' not found in data")
             
-            meta = ForecastMeta(
-                freq=request.freq,
-                train_start=train_start,
-                train_end=train_end,
-                horizon=request.horizon,
-                holidays_used=[],
-                original_rows=original_rows,
-                processed_rows=processed_rows,
-                null_dates=null_dates,
-                null_targets=null_targets
-            )
+            original_rows = 0
+            valid_rows = 0
+            null_dates = 0
+            null_targets = 0
+            partials = []
             
-            return df_clean, meta
+            with source.open() as handle:
+                reader = pd.read_csv(
+                    handle, encoding=encoding, usecols=[request.date_col, request.target_col],
+                    chunksize=CSV_CHUNK_ROWS
+                )
+                for chunk in reader:
+                    original_rows += len(chunk)
+                    ds = pd.to_datetime(chunk[request.date_col], errors='coerce')
+                    y = pd.to_numeric(chunk[request.target_col], errors='coerce')
+                    
+                    # Same accounting as validate_and_process_data: targets are
+                    # only counted as invalid on rows with a valid date
+                    bad_dates = ds.isnull()
+                    bad_targets = y.isnull() & ~bad_dates
+                    null_dates += int(bad_dates.sum())
+                    null_targets += int(bad_targets.sum())
+                    
+                    keep = ~(bad_dates | bad_targets)
+                    chunk = pd.DataFrame({'ds': ds[keep], 'y': y[keep]})
+                    valid_rows += len(chunk)
+                    if len(chunk):
+                        partials.append(self._aggregate_to_frequency(chunk, request.freq))
             
+            if null_dates > 0:
+                logger.warning(f"Found {null_dates} invalid dates, removing them")
+            if null_targets > 0:
+                logger.warning(f"Found {null_targets} invalid target values, removing them")
+            
+            if valid_rows == 0:
+                raise ValueError("No valid data remaining after cleaning")
+            
+            # Check minimum data requirements
+            if valid_rows < 12:
+                raise ValueError(f"Insufficient data: need at least 12 periods, got {valid_rows}")
+            
+            # Buckets can span chunk boundaries, so merge the partial sums
+            df_clean = (pd.concat(partials, ignore_index=True)
+                        .groupby('ds', as_index=False)['y'].sum()
+                        .sort_values('ds').reset_index(drop=True))
+            
+            logger.info(f"Streamed CSV: {original_rows} rows into {len(df_clean)} periods")
+            return df_clean, self._history_meta(df_clean, request, original_rows, null_dates, null_targets)
+            
+        except UnicodeDecodeError:
+            raise
         except Exception as e:
             logger.error(f"Data validation failed: {e}")
             raise ValueError(f"Data validation failed: {str(e)}")
     
     def _aggregate_to_frequency(self, df: pd.DataFrame, freq: str) -> pd.DataFrame:
-        """Aggregate data to the requested frequency."""
+        """Aggregate data to the requested frequency.
+        
+        Daily sums rows with the same timestamp. Weekly buckets are the W-MON
+        periods (Tuesday to Monday), labelled by their Tuesday; monthly ones
+        are labelled by the month start. Buckets are computed by flooring the
+        datetime64 values, without adding columns to `df`.
+        """
         try:
-            if freq == 'D':
-                # Daily - group by date
-                df_agg = df.groupby('ds').agg({'y': 'sum'}).reset_index()
-            elif freq == 'W':
-                # Weekly - group by Monday-based weeks
-                df['week'] = df['ds'].dt.to_period('W-MON')
-                df_agg = df.groupby('week').agg({'y': 'sum'}).reset_index()
-                df_agg['ds'] = df_agg['week'].dt.start_time
-                df_agg = df_agg[['ds', 'y']]
+            if freq not in ('D', 'W', 'M'):
+                return df
+            
+            ds = df['ds'].to_numpy(dtype='datetime64[ns]')
+            if freq == 'W':
+                # 1970-01-01 was a Thursday, two days after a week start
+                days = ds.astype('datetime64[D]')
+                keys = days - (days.astype(np.int64) + 2) % 7
             elif freq == 'M':
-                # Monthly - group by month start
-                df['month'] = df['ds'].dt.to_period('M')
-                df_agg = df.groupby('month').agg({'y': 'sum'}).reset_index()
-                df_agg['ds'] = df_agg['month'].dt.start_time
-                df_agg = df_agg[['ds', 'y']]
+                keys = ds.astype('datetime64[M]')
             else:
-                return df
+                keys = ds
             
-            return df_agg.sort_values('ds').reset_index(drop=True)
+            sums = df['y'].groupby(keys.astype('datetime64[ns]'), sort=True).sum()
+            return pd.DataFrame({'ds': sums.index.to_numpy(), 'y': sums.to_numpy()})
             
         except Exception as e:
             logger.error(f"Frequency aggregation failed: {e}")
@@ -186,125 +381,911 @@ class ProphetService:
                 volatility_index=0.5
             )
     
-    async def generate_forecast(self, file_content: bytes, filename: str, 
-                              request: ForecastRequest) -> ForecastResponse:
-        """Generate complete forecast with Prophet and AI adjustment."""
-        try:
-            # Read and validate data
-            df = self.read_file(file_content, filename)
-            df_clean, meta = self.validate_and_process_data(df, request)
-            
-            # Get holidays if requested
+    def prepare_data(self, file_content: Union[bytes, UploadSource], filename: str,
+                     request: ForecastRequest) -> Tuple[pd.DataFrame, ForecastMeta]:
+        """Read and clean the upload (first pipeline stage, runs in the forecast pool)."""
+        source = as_upload_source(file_content, filename)
+        timings: Dict[str, float] = {}
+        if filename.lower().endswith('.csv'):
+            # Streamed CSVs are read and cleaned in one pass
+            with timed(timings, 'read'):
+                df_clean, meta = self.read_csv_aggregated(source, request)
+        else:
+            # Other formats are parsed whole, so check they fit before reading
+            check_memory_budget(source.size, source.extension)
+            with timed(timings, 'read'):
+                df = self.read_file(source, filename, columns=[request.date_col, request.target_col],
+                                    sheet=request.sheet, header_row=request.header_row)
+            with timed(timings, 'clean'):
+                ds, y, original_rows = self._extract_columns(df, request)
+                # The raw frame is not needed past here
+                del df
+                df_clean, meta = self._clean_columns(ds, y, original_rows, request)
+        meta.timings = timings
+        return df_clean, meta
+    
+    def _build_holidays(self, ds: pd.Series, request: ForecastRequest) -> pd.DataFrame:
+        """Holidays covering the training range plus the forecast horizon."""
+        return self.holidays_service.get_holidays_dataframe(
+            request.country, request.state,
+            ds.min(), 
+            ds.max() + timedelta(days=request.horizon*30)
+        )
+    
+    def fit_and_predict(self, df_clean: pd.DataFrame, request: ForecastRequest, meta: ForecastMeta,
+                        holidays_df: Optional[pd.DataFrame] = None, store: bool = True,
+                        params: Optional[Dict[str, Any]] = None
+                        ) -> Tuple[pd.DataFrame, ForecastMeta]:
+        """Fit the requested engine and predict the horizon (second pipeline stage, runs in the forecast pool).
+        
+        A prebuilt `holidays_df` (shared by a batch) skips building one per series.
+        Only Prophet models holidays; the NumPy engines report none used.
+        Returns the horizon rows and a copy of `meta` with the fit details filled in.
+        Fitted Prophet models are kept in the model store when it is enabled, and
+        with `request.incremental` a previously fitted version of the series
+        warm-starts the fit. With `request.include_fitted` the in-sample fitted
+        rows come first (see `_split_fitted`). `store=False` (backtests, tuning)
+        keeps the model out of the store, and `params` overrides Prophet's
+        hyperparameters (see `_tune_prophet`).
+        """
+        engine = request.engine
+        if engine == 'auto':
+            # Normally resolved by the caller, which knows the pool load
+            engine = choose_engine(len(df_clean), request.freq, busy=False)
+        timings = dict(meta.timings or {})
+        if engine != 'prophet':
+            with timed(timings, 'fit'):
+                forecast_base = self._forecast_light(df_clean, request, engine)
+            return forecast_base, meta.model_copy(update={
+                "holidays_used": [], "fit_seconds": round(timings['fit'], 3), "timings": timings
+            })
+        
+        # Get holidays if requested
+        holidays_used = []
+        if not request.apply_holidays:
             holidays_df = None
-            if request.apply_holidays:
-                holidays_df = self.holidays_service.get_holidays_dataframe(
-                    request.country, request.state,
-                    df_clean['ds'].min(), 
-                    df_clean['ds'].max() + timedelta(days=request.horizon*30)
+        else:
+            if holidays_df is None:
+                with timed(timings, 'holidays'):
+                    holidays_df = self._build_holidays(df_clean['ds'], request)
+            holidays_used = holidays_df['holiday'].unique().tolist() if not holidays_df.empty else []
+        
+        series_id = self._series_id(df_clean, request) if store and self.model_store.enabled else None
+        init = self._warm_start_params(series_id, df_clean, request) if series_id and request.incremental else None
+        
+        # Train Prophet model
+        started = time.perf_counter()
+        model = None
+        if init is not None:
+            try:
+                model = self._train_prophet_model(df_clean, holidays_df, request.freq, init=init, params=params)
+            except ValueError as e:
+                logger.warning(f"Warm-started fit failed, refitting from scratch: {e}")
+                init = None
+        if model is None:
+            model = self._train_prophet_model(df_clean, holidays_df, request.freq, params=params)
+        fit_seconds = round(time.perf_counter() - started, 3)
+        timings['fit'] = fit_seconds
+        
+        # Generate base forecast (horizon rows only)
+        with timed(timings, 'predict'):
+            forecast_base = self._predict_horizon(model, request.horizon, request.freq,
+                                                  request.interval_mode, request.interval_samples)
+            if request.include_fitted:
+                forecast_base = pd.concat([self._fitted_values(model, df_clean), forecast_base],
+                                          ignore_index=True)
+        meta = meta.model_copy(update={
+            "holidays_used": holidays_used,
+            "warm_start": init is not None,
+            "fit_seconds": fit_seconds,
+            "timings": timings
+        })
+        if store:
+            meta.model_id = self._store_model(model, request, meta)
+        if meta.model_id and series_id:
+            self._register_series(series_id, model, df_clean, meta.model_id)
+        return forecast_base, meta
+    
+    def _predict_horizon(self, model: "Prophet", horizon: int, freq: str,
+                         interval_mode: str = 'full', interval_samples: int = 100) -> pd.DataFrame:
+        """Predict the horizon rows with the requested interval fidelity.
+        
+        'full' samples trend and noise uncertainty (`interval_samples` draws),
+        'fast' uses the fitted observation noise only (no sampling) and 'none'
+        returns zero-width intervals. Changes `model.uncertainty_samples`.
+        """
+        future_df = model.make_future_dataframe(periods=horizon, freq=self._get_freq_alias(freq),
+                                                include_history=False)
+        model.uncertainty_samples = interval_samples if interval_mode == 'full' else 0
+        forecast = model.predict(future_df)
+        if interval_mode == 'full':
+            return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].reset_index(drop=True)
+        
+        half_width = 0.0
+        if interval_mode == 'fast':
+            z = NormalDist().inv_cdf(0.5 + model.interval_width / 2)
+            half_width = z * float(np.ravel(model.params['sigma_obs'])[0]) * model.y_scale
+        yhat = forecast['yhat'].to_numpy()
+        return pd.DataFrame({
+            'ds': forecast['ds'].to_numpy(),
+            'yhat': yhat,
+            'yhat_lower': yhat - half_width,
+            'yhat_upper': yhat + half_width
+        })
+    
+    def _fitted_values(self, model: "Prophet", df_clean: pd.DataFrame) -> pd.DataFrame:
+        """In-sample fitted values (no uncertainty sampling), one row per history row."""
+        uncertainty_samples = model.uncertainty_samples
+        model.uncertainty_samples = 0
+        try:
+            fitted = model.predict(df_clean[['ds']])
+        finally:
+            model.uncertainty_samples = uncertainty_samples
+        return fitted[['ds', 'yhat']].reset_index(drop=True)
+    
+    def _split_fitted(self, df_clean: pd.DataFrame, forecast: pd.DataFrame,
+                      horizon: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Move leading in-sample rows of `forecast` onto the history as a `yhat` column.
+        
+        Returns (history, horizon rows); a horizon-only forecast passes through unchanged.
+        """
+        if len(forecast) <= horizon:
+            return df_clean, forecast
+        fitted = forecast.iloc[:len(forecast) - horizon]
+        history = df_clean.assign(yhat=fitted['yhat'].to_numpy())
+        return history, forecast.iloc[len(forecast) - horizon:].reset_index(drop=True)
+    
+    def _store_model(self, model: "Prophet", request: ForecastRequest,
+                     meta: ForecastMeta) -> Optional[str]:
+        """Persist a fitted model for re-prediction; storage problems never fail the forecast."""
+        if not self.model_store.enabled:
+            return None
+        try:
+            return self.model_store.save(model, request, meta.model_copy(update={"cache_status": None}))
+        except Exception as e:
+            logger.error(f"Failed to store fitted model: {e}")
+            return None
+    
+    def _data_hash(self, df: pd.DataFrame) -> str:
+        digest = hashlib.sha256(df['ds'].to_numpy(dtype='datetime64[ns]').view(np.int64).tobytes())
+        digest.update(df['y'].to_numpy(dtype=np.float64).tobytes())
+        return digest.hexdigest()
+    
+    def _series_id(self, df_clean: pd.DataFrame, request: ForecastRequest) -> str:
+        """Identify a series across uploads: the caller's series_key, or a hash of its first rows.
+        
+        Settings that change the model's parameter layout are part of the id.
+        """
+        identity = request.series_key or f"prefix:{self._data_hash(df_clean.head(SERIES_PREFIX_ROWS))}"
+        fields = json.dumps([identity, request.freq, request.country, request.state, request.apply_holidays])
+        return hashlib.sha256(fields.encode("utf-8")).hexdigest()[:32]
+    
+    def _warm_start_params(self, series_id: str, df_clean: pd.DataFrame,
+                           request: ForecastRequest) -> Optional[Dict[str, Any]]:
+        """Stan init from the last fit of this series, or None when there is none to reuse."""
+        try:
+            entry = self.model_store.load_series(series_id)
+        except Exception as e:
+            logger.error(f"Failed to read series index: {e}")
+            return None
+        if entry is None:
+            return None
+        
+        # Without a series key, only reuse a fit whose data is a prefix of this
+        # upload. Its last period may have been partial, so that row is not compared.
+        n_compared = entry["n_rows"] - 1
+        if not request.series_key and (
+            n_compared > len(df_clean) or self._data_hash(df_clean.head(n_compared)) != entry["data_hash"]
+        ):
+            return None
+        
+        # Mismatched delta/beta shapes fall back to Prophet's defaults inside the backend
+        return {name: np.asarray(value) for name, value in entry["init"].items()}
+    
+    def _register_series(self, series_id: str, model: "Prophet", df_clean: pd.DataFrame, model_id: str):
+        """Record this fit's parameters as the warm start for the series' next upload."""
+        try:
+            init = {name: float(model.params[name][0][0]) for name in ('k', 'm', 'sigma_obs')}
+            init.update({name: model.params[name][0].tolist() for name in ('delta', 'beta')})
+            self.model_store.save_series(series_id, {
+                "model_id": model_id,
+                "n_rows": len(df_clean),
+                "data_hash": self._data_hash(df_clean.head(len(df_clean) - 1)),
+                "init": init
+            })
+        except Exception as e:
+            logger.error(f"Failed to register series for warm starts: {e}")
+    
+    def predict_stored_model(self, model_id: str, horizon: int,
+                             interval_width: Optional[float] = None,
+                             interval_mode: Optional[str] = None,
+                             interval_samples: Optional[int] = None
+                             ) -> Tuple[pd.DataFrame, ForecastMeta, pd.DataFrame, ForecastRequest]:
+        """Predict a new horizon from a stored model (runs in the forecast pool).
+        
+        Returns (history, meta, forecast_base, fit request); only the horizon rows
+        are predicted and nothing is refitted.
+        """
+        model, request, meta = self.model_store.load(model_id)
+        # Shallow copy: the loaded model is shared by later predictions
+        model = copy.copy(model)
+        if interval_width is not None:
+            model.interval_width = interval_width
+        request = request.model_copy(update={
+            key: value for key, value in (("interval_mode", interval_mode), ("interval_samples", interval_samples))
+            if value is not None
+        })
+        
+        timings: Dict[str, float] = {}
+        with timed(timings, 'predict'):
+            forecast_base = self._predict_horizon(model, horizon, request.freq,
+                                                  request.interval_mode, request.interval_samples)
+        history = model.history[['ds', 'y']].reset_index(drop=True)
+        meta = meta.model_copy(update={"horizon": horizon, "model_id": model_id, "timings": timings})
+        return history, meta, forecast_base, request.model_copy(update={"horizon": horizon})
+    
+    def _forecast_light(self, df_clean: pd.DataFrame, request: ForecastRequest,
+                        engine: str) -> pd.DataFrame:
+        """Forecast with a NumPy engine, returning the same frame shape as Prophet.
+        
+        With `request.include_fitted` the engine's one-step-ahead in-sample fit
+        comes first, as for Prophet; rows it cannot fit (e.g. the first season
+        of seasonal_naive) have a NaN yhat.
+        """
+        try:
+            y = df_clean['y'].to_numpy(dtype=np.float64)
+            yhat, yhat_lower, yhat_upper = LIGHT_ENGINES[engine](y, request.freq, request.horizon)
+            fitted = LIGHT_ENGINE_FITS[engine](y, request.freq) if request.include_fitted else None
+        except Exception as e:
+            logger.error(f"{engine} forecast failed: {e}")
+            raise ValueError(f"{engine} forecast failed: {str(e)}")
+        
+        if request.interval_mode == 'none':
+            yhat_lower = yhat_upper = yhat
+        forecast = pd.DataFrame({
+            'ds': self._future_dates(df_clean['ds'], request.freq, request.horizon),
+            'yhat': yhat,
+            'yhat_lower': yhat_lower,
+            'yhat_upper': yhat_upper
+        })
+        if fitted is None:
+            return forecast
+        return pd.concat([pd.DataFrame({'ds': df_clean['ds'].to_numpy(), 'yhat': fitted}), forecast],
+                         ignore_index=True)
+    
+    def _future_dates(self, ds: pd.Series, freq: str, horizon: int) -> pd.DatetimeIndex:
+        """Horizon dates exactly as Prophet's make_future_dataframe generates them."""
+        last_date = ds.max()
+        dates = pd.date_range(start=last_date, periods=horizon + 1, freq=self._get_freq_alias(freq))
+        return dates[dates > last_date][:horizon]
+    
+    def _resolve_engine(self, df_clean: pd.DataFrame, request: ForecastRequest,
+                        busy: Optional[bool] = None) -> ForecastRequest:
+        """Replace engine='auto' with a concrete engine for this series and the current load."""
+        if request.engine != 'auto':
+            return request
+        busy = self.executor.busy if busy is None else busy
+        engine = choose_engine(len(df_clean), request.freq, busy)
+        return request.model_copy(update={"engine": engine})
+    
+    def _engine_cacheable(self, request: ForecastRequest, engine: Optional[str], n_rows: int) -> bool:
+        """Whether a result may be cached under `request`'s key.
+        
+        The key holds engine='auto', so a result is only cached when auto would
+        pick the same engine on an idle pool; load-based picks are not reused.
+        """
+        return request.engine != 'auto' or engine == choose_engine(n_rows, request.freq, busy=False)
+    
+    async def _tuned_params(self, df_clean: pd.DataFrame, request: ForecastRequest, meta: ForecastMeta,
+                            holidays_df: Optional[pd.DataFrame] = None,
+                            semaphore: Optional[asyncio.Semaphore] = None) -> Optional[Dict[str, Any]]:
+        """Prophet hyperparameters for a `tune` request, or None to use the defaults.
+        
+        The best configuration is remembered per series (model store tuning index),
+        so only the first tuned fit of a series runs the search. Series too short
+        for a holdout, or searches that score no candidate, fall back to the
+        defaults with `meta.tuning='skipped'`. Sets `meta.tuning` and `meta.tuned_params`.
+        `semaphore` bounds the search's pool stages (see `_tune_prophet`).
+        """
+        if not request.tune or request.engine != 'prophet':
+            return None
+        
+        series_id = self._series_id(df_clean, request) if self.model_store.enabled else None
+        if series_id:
+            try:
+                entry = self.model_store.load_tuning(series_id)
+            except Exception as e:
+                logger.error(f"Failed to read tuning index: {e}")
+                entry = None
+            if entry is not None:
+                meta.tuning, meta.tuned_params = 'remembered', entry["params"]
+                return entry["params"]
+        
+        try:
+            holdout_split(df_clean, request.horizon)
+        except ValueError as e:
+            # Too short to hold anything out; the defaults still forecast fine
+            logger.info(f"Skipping tuning: {e}")
+            meta.tuning = 'skipped'
+            return None
+        
+        if request.apply_holidays and holidays_df is None:
+            holidays_df = self._build_holidays(df_clean['ds'], request)
+        params, score = await self._tune_prophet(df_clean, request, meta, holidays_df, semaphore)
+        if math.isinf(score):
+            # No candidate could be scored, so the search compared nothing
+            logger.warning("Tuning scored no candidates, using default parameters")
+            meta.tuning = 'skipped'
+            return None
+        logger.info(f"Tuned Prophet parameters {params} (holdout RMSE {score:.4g})")
+        if series_id:
+            try:
+                self.model_store.save_tuning(series_id, {"params": params, "holdout_rmse": score})
+            except Exception as e:
+                logger.error(f"Failed to remember tuned parameters: {e}")
+        meta.tuning, meta.tuned_params = 'searched', params
+        return params
+    
+    async def _tune_prophet(self, df_clean: pd.DataFrame, request: ForecastRequest, meta: ForecastMeta,
+                            holidays_df: Optional[pd.DataFrame],
+                            semaphore: Optional[asyncio.Semaphore] = None) -> Tuple[Dict[str, Any], float]:
+        """Successive-halving search over Prophet hyperparameters; returns (best params, holdout RMSE).
+        
+        Candidates are fitted in parallel in the forecast pool on the most recent
+        part of the history and scored on a holdout of the last `horizon` rows.
+        Each rung keeps the best candidates and refits them on more history.
+        Callers running several searches at once (batches) pass one shared
+        `semaphore`, so all of them together stay within the pool size.
+        """
+        with_holidays = holidays_df is not None and not holidays_df.empty
+        default = {
+            'changepoint_prior_scale': 0.05,
+            'seasonality_prior_scale': 10.0,
+            'seasonality_mode': self._default_seasonality_mode(df_clean)
+        }
+        if with_holidays:
+            default['holidays_prior_scale'] = 10.0
+        candidates = sample_candidates(default, with_holidays)
+        
+        train, holdout = holdout_split(df_clean, request.horizon)
+        request = request.model_copy(update={
+            "horizon": len(holdout), "interval_mode": "none", "include_fitted": False, "incremental": False
+        })
+        semaphore = semaphore or asyncio.Semaphore(self.executor.max_workers)
+        
+        async def score(params: Dict[str, Any], rows: int) -> float:
+            try:
+                async with semaphore:
+                    forecast, _ = await self.executor.run(
+                        _forecast_stage, train.iloc[-rows:], request, meta,
+                        holidays_df if with_holidays else None, False, params
+                    )
+                return holdout_rmse(holdout, forecast)
+            except Exception as e:
+                logger.warning(f"Tuning candidate {params} failed: {e}")
+                return float('inf')
+        
+        scores = []
+        for keep, rows in halving_schedule(len(candidates), len(train)):
+            candidates = candidates[:keep]
+            scores = await asyncio.gather(*(score(params, rows) for params in candidates))
+            ranked = sorted(range(len(candidates)), key=lambda index: scores[index])
+            candidates = [candidates[index] for index in ranked]
+            scores = [scores[index] for index in ranked]
+        return candidates[0], scores[0]
+    
+    def _cache_key(self, file_content: Union[bytes, UploadSource], filename: str,
+                   request: ForecastRequest) -> str:
+        """Content-addressed key: upload hash plus the fit-relevant request fields."""
+        digest = as_upload_source(file_content, filename).sha256
+        extension = os.path.splitext(filename.lower())[1]
+        fields = json.dumps(request.model_dump(include=FIT_CACHE_FIELDS), sort_keys=True)
+        return f"{digest}:{extension}:{fields}"
+    
+    def _report(self, progress: Optional[ProgressCallback], *stages: str):
+        """Notify a progress callback, never letting it break the pipeline."""
+        if progress is None:
+            return
+        for stage in stages:
+            try:
+                progress(stage)
+            except Exception as e:
+                logger.error(f"Progress callback failed at stage {stage}: {e}")
+    
+    async def _run_pipeline(self, file_content: Union[bytes, UploadSource], filename: str,
+                            request: ForecastRequest, progress: Optional[ProgressCallback] = None,
+                            on_prepared: Optional[Callable[[pd.DataFrame], None]] = None
+                            ) -> Tuple[pd.DataFrame, ForecastMeta, pd.DataFrame]:
+        """Read, clean, fit and predict in the forecast pool so the event loop stays free.
+        
+        Stages inside one pool call are reported together when that call returns.
+        `on_prepared` receives the cleaned history before the fit starts.
+        """
+        df_clean, meta = await self.executor.run(_prepare_stage, file_content, filename, request)
+        self._report(progress, 'parsed', 'cleaned')
+        if on_prepared is not None:
+            on_prepared(df_clean)
+        request = self._resolve_engine(df_clean, request)
+        meta.engine = request.engine
+        params = await self._tuned_params(df_clean, request, meta)
+        forecast_base_df, meta = await self.executor.run(
+            _forecast_stage, df_clean, request, meta, None, True, params
+        )
+        self._report(progress, 'fitted', 'predicted')
+        df_clean, forecast_base_df = self._split_fitted(df_clean, forecast_base_df, request.horizon)
+        return df_clean, meta, forecast_base_df
+    
+    def prepare_batch(self, file_content: Union[bytes, UploadSource], filename: str,
+                      request: BatchForecastRequest
+                      ) -> Tuple[List[Tuple[Dict[str, str], pd.DataFrame, ForecastMeta]],
+                                 List[Tuple[Dict[str, str], str]], Optional[pd.DataFrame]]:
+        """Read the upload once and split it into cleaned per-series frames.
+        
+        Returns (series, errors, holidays_df): series is a list of (key, df_clean, meta),
+        errors a list of (key, message) for series that failed validation, and the
+        holidays frame covers every series so it is built once per batch.
+        """
+        source = as_upload_source(file_content, filename)
+        check_memory_budget(source.size, source.extension)
+        df = self.read_file(
+            source, filename,
+            columns=list(dict.fromkeys(request.series_cols + [request.date_col, request.target_col])),
+            sheet=request.sheet, header_row=request.header_row
+        )
+        
+        missing = [col for col in request.series_cols if col not in df.columns]
+        if missing:
+            raise ValueError(f"Series column(s) not found in data: {', '.join(missing)}")
+        for col in (request.date_col, request.target_col):
+            if col not in df.columns:
+                raise ValueError(f"Column '{col}' not found in data")
+            if col in request.series_cols:
+                raise ValueError(f"Column '{col}' cannot be both a series key and a value column")
+        
+        # Parse dates and targets once for the whole frame, not once per series
+        df = df[request.series_cols + [request.date_col, request.target_col]].assign(**{
+            request.date_col: pd.to_datetime(df[request.date_col], errors='coerce'),
+            request.target_col: pd.to_numeric(df[request.target_col], errors='coerce')
+        })
+        
+        groups = df.groupby(request.series_cols, sort=True, dropna=False)
+        if groups.ngroups > MAX_BATCH_SERIES:
+            raise ValueError(f"Too many series: {groups.ngroups} (limit {MAX_BATCH_SERIES})")
+        
+        series = []
+        errors = []
+        for values, group in groups:
+            values = values if isinstance(values, tuple) else (values,)
+            key = {col: str(value) for col, value in zip(request.series_cols, values)}
+            try:
+                df_clean, meta = self.validate_and_process_data(group, request)
+                series.append((key, df_clean, meta))
+            except ValueError as e:
+                errors.append((key, str(e)))
+        
+        holidays_df = None
+        # Only Prophet uses holidays; 'auto' may still pick it for some series
+        if request.apply_holidays and series and request.engine not in LIGHT_ENGINES:
+            all_ds = pd.concat([df_clean['ds'] for _, df_clean, _ in series])
+            holidays_df = self._build_holidays(all_ds, request)
+        
+        logger.info(f"Batch split into {len(series)} series ({len(errors)} invalid)")
+        return series, errors, holidays_df
+    
+    async def generate_batch_forecast(self, file_content: Union[bytes, UploadSource], filename: str,
+                                      request: BatchForecastRequest
+                                      ) -> Tuple[int, AsyncIterator[SeriesForecastResult]]:
+        """Forecast every series in one upload.
+        
+        Parsing, validation and the holiday frame are done once up front (errors
+        there raise immediately). Returns the series count and an iterator that
+        yields one SeriesForecastResult per series, in completion order, with
+        failures isolated to their own series. Fitted models are only stored
+        (and incremental warm starts only recorded) with `request.store_models`.
+        """
+        series, errors, holidays_df = await self.executor.run(
+            _prepare_batch_stage, file_content, filename, request
+        )
+        
+        # Macro adjustment reflects industry and location, not individual SKUs:
+        # one call on the combined series serves the whole batch, running while
+        # the series are fitted.
+        adjustment = None
+        if series and request.apply_ai_adjustment:
+            total = pd.concat([df_clean for _, df_clean, _ in series])
+            total = total.groupby('ds', as_index=False)['y'].sum()
+            adjustment = self._start_ai_adjustment(total, request)
+        
+        # Bound in-flight stages (tuning candidates and fits alike) to the pool
+        # size so per-stage timeouts do not start counting while a task waits
+        # behind thousands of others.
+        semaphore = asyncio.Semaphore(self.executor.max_workers)
+        
+        # engine=auto sees the batch as load: once it outnumbers the workers,
+        # long series go to Holt-Winters instead of queueing Stan fits
+        busy = self.executor.busy or len(series) > self.executor.max_workers
+        
+        async def forecast_series(key: Dict[str, str], df_clean: pd.DataFrame,
+                                  meta: ForecastMeta) -> SeriesForecastResult:
+            try:
+                series_request = self._resolve_engine(df_clean, request, busy)
+                if request.series_key:
+                    # One caller key names the whole batch; each series needs its own
+                    # warm-start and tuning entries
+                    series_request = series_request.model_copy(update={
+                        "series_key": json.dumps([request.series_key, key], sort_keys=True)
+                    })
+                meta.engine = series_request.engine
+                params = await self._tuned_params(df_clean, series_request, meta, holidays_df, semaphore)
+                async with semaphore:
+                    forecast_base_df, meta = await self.executor.run(
+                        _forecast_stage, df_clean, series_request, meta, holidays_df,
+                        request.store_models, params
+                    )
+                df_clean, forecast_base_df = self._split_fitted(df_clean, forecast_base_df, request.horizon)
+                ai_adjustment_info, adjustment_factor = await self._await_ai_adjustment(adjustment, meta)
+                df_clean = self._decimate_history(df_clean, meta, request)
+                forecast = self.build_response(
+                    df_clean, meta, forecast_base_df, ai_adjustment_info, adjustment_factor
                 )
-                meta.holidays_used = holidays_df['holiday'].unique().tolist() if not holidays_df.empty else []
+                return SeriesForecastResult(key=key, status="succeeded", forecast=forecast)
+            except Exception as e:
+                logger.error(f"Batch series {key} failed: {e}")
+                return SeriesForecastResult(key=key, status="failed", error=str(e))
+        
+        async def results() -> AsyncIterator[SeriesForecastResult]:
+            for key, error in errors:
+                yield SeriesForecastResult(key=key, status="failed", error=error)
             
-            # Train Prophet model
-            model = self._train_prophet_model(df_clean, holidays_df, request.freq)
+            tasks = [asyncio.create_task(forecast_series(*item)) for item in series]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    yield await next_done
+            finally:
+                for task in tasks:
+                    task.cancel()
+                if adjustment is not None:
+                    adjustment[0].cancel()
+        
+        return len(series) + len(errors), results()
+    
+    async def _get_ai_adjustment(self, df_clean: pd.DataFrame,
+                                 request: ForecastRequest) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Return the ai_adjustment block for the response and the factor to apply to yhat."""
+        if not request.apply_ai_adjustment:
+            # No AI adjustment requested
+            return None, 1.0
+        
+        try:
+            # Get recent summary and upcoming holidays
+            recent_summary = self._get_recent_summary(df_clean, request.freq)
+            upcoming_holidays = self.holidays_service.get_upcoming_holidays(
+                request.country, request.state, request.horizon
+            )
             
-            # Generate base forecast
-            future_df = model.make_future_dataframe(periods=request.horizon, 
-                                                  freq=self._get_freq_alias(request.freq))
-            forecast = model.predict(future_df)
+            # Call AI adjustment service
+            ai_request = AIAdjustmentRequest(
+                industry=request.industry,
+                country=request.country,
+                state=request.state,
+                city=request.city,
+                freq=request.freq,
+                horizon=request.horizon,
+                recent_summary=recent_summary,
+                holidays_window=upcoming_holidays[:5]  # Limit to top 5 holidays
+            )
             
-            # Split history and forecast
-            split_idx = len(df_clean)
-            history_data = df_clean.to_dict('records')
-            forecast_base_data = forecast[split_idx:][['ds', 'yhat', 'yhat_lower', 'yhat_upper']].to_dict('records')
+            adjustment, cache_status = await self.ai_client.get_adjustment_cached(ai_request)
             
-            # Apply AI adjustment if requested
-            ai_adjustment_info = None
-            forecast_final_data = forecast_base_data.copy()
+            ai_adjustment_info = {
+                "applied": True,
+                "adjustment_pct": adjustment.adjustment_pct,
+                "rationale": adjustment.rationale,
+                "sources": adjustment.sources or [],
+                "cache": cache_status
+            }
+            return ai_adjustment_info, 1 + (adjustment.adjustment_pct / 100)
             
-            if request.apply_ai_adjustment:
-                try:
-                    # Get recent summary and upcoming holidays
-                    recent_summary = self._get_recent_summary(df_clean, request.freq)
-                    upcoming_holidays = self.holidays_service.get_upcoming_holidays(
-                        request.country, request.state, request.horizon
-                    )
-                    
-                    # Call AI adjustment service
-                    ai_request = AIAdjustmentRequest(
-                        industry=request.industry,
-                        country=request.country,
-                        state=request.state,
-                        city=request.city,
-                        freq=request.freq,
-                        horizon=request.horizon,
-                        recent_summary=recent_summary,
-                        holidays_window=upcoming_holidays[:5]  # Limit to top 5 holidays
-                    )
-                    
-                    adjustment = await self.ai_client.get_adjustment(ai_request)
-                    
-                    ai_adjustment_info = {
-                        "applied": True,
-                        "adjustment_pct": adjustment.adjustment_pct,
-                        "rationale": adjustment.rationale,
-                        "sources": adjustment.sources or []
-                    }
-                    
-                    # Apply adjustment to forecast
-                    adjustment_factor = 1 + (adjustment.adjustment_pct / 100)
-                    for i, point in enumerate(forecast_final_data):
-                        point['yhat_final'] = point['yhat'] * adjustment_factor
-                        
-                except Exception as e:
-                    logger.error(f"AI adjustment failed: {e}")
-                    ai_adjustment_info = {
-                        "applied": False,
-                        "adjustment_pct": 0.0,
-                        "rationale": f"AI adjustment failed: {str(e)}",
-                        "sources": []
-                    }
-                    # Use base forecast as final
-                    for point in forecast_final_data:
-                        point['yhat_final'] = point['yhat']
+        except Exception as e:
+            logger.error(f"AI adjustment failed: {e}")
+            ai_adjustment_info = {
+                "applied": False,
+                "adjustment_pct": 0.0,
+                "rationale": f"AI adjustment failed: {str(e)}",
+                "sources": []
+            }
+            # Use base forecast as final
+            return ai_adjustment_info, 1.0
+    
+    def _start_ai_adjustment(self, df_clean: pd.DataFrame,
+                             request: ForecastRequest) -> AdjustmentTask:
+        """Start the AI adjustment in the background; returns the task and its deadline."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + AI_ADJUSTMENT_BUDGET if AI_ADJUSTMENT_BUDGET > 0 else None
+        
+        async def timed_adjustment() -> Tuple[Optional[Dict[str, Any]], float, float]:
+            started = time.perf_counter()
+            ai_adjustment_info, adjustment_factor = await self._get_ai_adjustment(df_clean, request)
+            return ai_adjustment_info, adjustment_factor, time.perf_counter() - started
+        
+        return asyncio.ensure_future(timed_adjustment()), deadline
+    
+    async def _await_ai_adjustment(self, adjustment: Optional[AdjustmentTask],
+                                   meta: Optional[ForecastMeta] = None
+                                   ) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Wait for a started adjustment until its deadline, falling back to the baseline.
+        
+        The adjustment's own duration (or the time waited, on timeout) goes to `meta.timings`.
+        """
+        if adjustment is None:
+            return None, 1.0
+        
+        task, deadline = adjustment
+        timeout = None
+        if deadline is not None:
+            timeout = max(0.0, deadline - asyncio.get_running_loop().time())
+        try:
+            # Shielded: several batch series may wait on the same task
+            ai_adjustment_info, adjustment_factor, seconds = await asyncio.wait_for(asyncio.shield(task), timeout)
+            if meta is not None:
+                meta.timings = {**(meta.timings or {}), 'ai_adjustment': round(seconds, 4)}
+            return ai_adjustment_info, adjustment_factor
+        except asyncio.TimeoutError:
+            if meta is not None:
+                meta.timings = {**(meta.timings or {}), 'ai_adjustment': AI_ADJUSTMENT_BUDGET}
+            logger.warning(f"AI adjustment exceeded {AI_ADJUSTMENT_BUDGET:g}s budget, using baseline")
+            return {
+                "applied": False,
+                "adjustment_pct": 0.0,
+                "rationale": f"AI adjustment skipped - no response within {AI_ADJUSTMENT_BUDGET:g}s latency budget",
+                "sources": []
+            }, 1.0
+    
+    def _decimate_history(self, df_clean: pd.DataFrame, meta: ForecastMeta,
+                          request: ForecastRequest) -> pd.DataFrame:
+        """Downsample history for charting (LTTB) and record point counts in meta."""
+        history = decimate_series(df_clean, request.max_points)
+        meta.history_points = len(df_clean)
+        meta.history_points_returned = len(history)
+        return history
+    
+    def build_response(self, df_clean: pd.DataFrame, meta: ForecastMeta,
+                        forecast_base_df: pd.DataFrame,
+                        ai_adjustment_info: Optional[Dict[str, Any]],
+                        adjustment_factor: float) -> ForecastResponse:
+        """Convert pipeline frames into the ForecastResponse shape."""
+        # Split history and forecast
+        history_data = df_clean.to_dict('records')
+        forecast_base_data = forecast_base_df.to_dict('records')
+        
+        # Apply adjustment to forecast
+        forecast_final_data = forecast_base_data.copy()
+        for point in forecast_final_data:
+            point['yhat_final'] = point['yhat'] * adjustment_factor
+        
+        # Convert to response format
+        history = [
+            DataPoint(ds=str(point['ds'].date()), y=point['y'],
+                      yhat=round(point['yhat'], 2) if pd.notna(point.get('yhat')) else None)
+            for point in history_data
+        ]
+        
+        forecast_base = [
+            DataPoint(
+                ds=str(point['ds'].date()) if hasattr(point['ds'], 'date') else str(point['ds'])[:10],
+                yhat=round(point['yhat'], 2),
+                yhat_lower=round(point['yhat_lower'], 2),
+                yhat_upper=round(point['yhat_upper'], 2)
+            ) for point in forecast_base_data
+        ]
+        
+        forecast_final = [
+            DataPoint(
+                ds=str(point['ds'].date()) if hasattr(point['ds'], 'date') else str(point['ds'])[:10],
+                yhat_final=round(point['yhat_final'], 2)
+            ) for point in forecast_final_data
+        ]
+        
+        return ForecastResponse(
+            meta=meta,
+            ai_adjustment=ai_adjustment_info,
+            history=history,
+            forecast_base=forecast_base,
+            forecast_final=forecast_final
+        )
+    
+    async def generate_forecast(self, file_content: Union[bytes, UploadSource], filename: str, 
+                              request: ForecastRequest,
+                              progress: Optional[ProgressCallback] = None) -> ForecastResponse:
+        """Generate complete forecast with Prophet and AI adjustment.
+        
+        `progress` is called with each name in PIPELINE_STAGES as it completes.
+        """
+        frames = await self.generate_forecast_frames(file_content, filename, request, progress)
+        return self.build_response(*frames)
+    
+    async def generate_forecast_frames(self, file_content: Union[bytes, UploadSource], filename: str,
+                                       request: ForecastRequest,
+                                       progress: Optional[ProgressCallback] = None) -> ForecastFrames:
+        """Run the forecast and return its frames instead of a ForecastResponse.
+        
+        Returns (df_clean, meta, forecast_base_df, ai_adjustment_info, adjustment_factor),
+        for encoders that serialise straight from the arrays (see services.response_formats).
+        Stage timings are in `meta.timings` and recorded in services.metrics.
+        """
+        # The AI call only needs the cleaned history, so it runs alongside the fit
+        adjustment: Optional[AdjustmentTask] = None
+        finished = False
+        started = time.perf_counter()
+        
+        def start_adjustment(df_clean: pd.DataFrame):
+            nonlocal adjustment
+            # The shared pipeline outlives a caller that disconnected mid-fit
+            if request.apply_ai_adjustment and not finished:
+                adjustment = self._start_ai_adjustment(df_clean, request)
+        
+        IN_FLIGHT.inc()
+        try:
+            def run_pipeline():
+                return self._run_pipeline(file_content, filename, request, progress,
+                                          on_prepared=start_adjustment)
+            
+            if active_profile() is not None:
+                # A profile of a cached result would show nothing, so run it for real
+                (df_clean, meta, forecast_base_df), cache_status = await run_pipeline(), 'bypass'
             else:
-                # No AI adjustment requested
-                for point in forecast_final_data:
-                    point['yhat_final'] = point['yhat']
-            
-            # Convert to response format
-            history = [DataPoint(ds=str(point['ds'].date()), y=point['y']) for point in history_data]
-            
-            forecast_base = [
-                DataPoint(
-                    ds=str(point['ds'].date()) if hasattr(point['ds'], 'date') else str(point['ds'])[:10],
-                    yhat=round(point['yhat'], 2),
-                    yhat_lower=round(point['yhat_lower'], 2),
-                    yhat_upper=round(point['yhat_upper'], 2)
-                ) for point in forecast_base_data
-            ]
-            
-            forecast_final = [
-                DataPoint(
-                    ds=str(point['ds'].date()) if hasattr(point['ds'], 'date') else str(point['ds'])[:10],
-                    yhat_final=round(point['yhat_final'], 2)
-                ) for point in forecast_final_data
-            ]
-            
-            return ForecastResponse(
-                meta=meta,
-                ai_adjustment=ai_adjustment_info,
-                history=history,
-                forecast_base=forecast_base,
-                forecast_final=forecast_final
-            )
+                # Identical uploads share one fit, whether cached or still in flight
+                (df_clean, meta, forecast_base_df), cache_status = await self.cache.get_or_compute(
+                    self._cache_key(file_content, filename, request), run_pipeline,
+                    cacheable=lambda result: self._engine_cacheable(request, result[1].engine,
+                                                                    result[1].processed_rows)
+                )
+            meta = meta.model_copy(deep=True, update={"cache_status": cache_status})
+            if cache_status not in ('miss', 'bypass'):
+                self._report(progress, 'parsed', 'cleaned', 'fitted', 'predicted')
+                # Hits and coalesced callers never ran the pipeline themselves
+                start_adjustment(df_clean)
+            
+            ai_adjustment_info, adjustment_factor = await self._await_ai_adjustment(adjustment, meta)
+            self._report(progress, 'ai_adjusted')
+            
+            df_clean = self._decimate_history(df_clean, meta, request)
+            record_forecast(meta, time.perf_counter() - started)
+            return df_clean, meta, forecast_base_df, ai_adjustment_info, adjustment_factor
             
+        except (StageTimeoutError, WorkerCrashedError, MemoryBudgetExceededError):
+            record_failure(request.freq, request.engine)
+            raise
         except Exception as e:
+            record_failure(request.freq, request.engine)
             logger.error(f"Forecast generation failed: {e}")
             raise ValueError(f"Forecast generation failed: {str(e)}")
+        finally:
+            IN_FLIGHT.dec()
+            finished = True
+            if adjustment is not None:
+                adjustment[0].cancel()
+    
+    async def backtest(self, file_content: Union[bytes, UploadSource], filename: str,
+                       request: ForecastRequest, initial: Optional[int] = None,
+                       period: Optional[int] = None) -> BacktestResponse:
+        """Rolling-origin cross-validation of the requested engine.
+        
+        `initial`, `period` and `request.horizon` are in periods of `request.freq`.
+        Cutoffs are fitted in parallel in the forecast pool; results are cached
+        by upload hash and settings.
+        """
+        try:
+            initial, period = backtest_window(request.horizon, initial, period)
+            key = f"{self._cache_key(file_content, filename, request)}:backtest:{initial}:{period}:{BACKTEST_MAX_CUTOFFS}"
+            response, cache_status = await self.backtest_cache.get_or_compute(
+                key, lambda: self._run_backtest(file_content, filename, request, initial, period),
+                cacheable=lambda result: self._engine_cacheable(request, result.meta.engine,
+                                                                result.meta.processed_rows)
+            )
+            return response.model_copy(deep=True, update={
+                "meta": response.meta.model_copy(update={"cache_status": cache_status})
+            })
+            
+        except (StageTimeoutError, WorkerCrashedError, MemoryBudgetExceededError):
+            raise
+        except Exception as e:
+            logger.error(f"Backtest failed: {e}")
+            raise ValueError(f"Backtest failed: {str(e)}")
+    
+    async def _run_backtest(self, file_content: Union[bytes, UploadSource], filename: str,
+                            request: ForecastRequest, initial: int, period: int) -> BacktestResponse:
+        """Fit every cutoff in the pool and score the horizons against the actuals."""
+        started = time.perf_counter()
+        df_clean, meta = await self.executor.run(_prepare_stage, file_content, filename, request)
+        cutoffs = rolling_cutoffs(len(df_clean), request.horizon, initial, period)
+        
+        # Every cutoff uses the same engine and holidays; nothing is stored or warm-started
+        request = self._resolve_engine(df_clean, request).model_copy(update={
+            "incremental": False, "include_fitted": False
+        })
+        holidays_df = None
+        if request.engine == 'prophet' and request.apply_holidays:
+            holidays_df = self._build_holidays(df_clean['ds'], request)
+        
+        semaphore = asyncio.Semaphore(self.executor.max_workers)
+        
+        async def fit_cutoff(cutoff: int) -> pd.DataFrame:
+            async with semaphore:
+                forecast, _ = await self.executor.run(
+                    _forecast_stage, df_clean.iloc[:cutoff], request, meta, holidays_df, False
+                )
+            return forecast
+        
+        forecasts = await asyncio.gather(*(fit_cutoff(cutoff) for cutoff in cutoffs))
+        steps, overall = accuracy_metrics(*align_forecasts(df_clean, cutoffs, forecasts))
+        logger.info(f"Backtest of {len(cutoffs)} cutoffs finished, overall MAPE {overall.mape}")
+        
+        return BacktestResponse(
+            meta=BacktestMeta(
+                freq=request.freq,
+                engine=request.engine,
+                horizon=request.horizon,
+                initial=initial,
+                period=period,
+                cutoffs=[str(ds.date()) for ds in df_clean['ds'].iloc[[cutoff - 1 for cutoff in cutoffs]]],
+                processed_rows=len(df_clean),
+                elapsed_seconds=round(time.perf_counter() - started, 3)
+            ),
+            steps=steps,
+            overall=overall
+        )
+    
+    async def predict_from_model(self, model_id: str,
+                                 predict_request: ModelPredictRequest) -> ForecastResponse:
+        """Re-predict a stored model with a new horizon, interval width or AI adjustment."""
+        adjustment: Optional[AdjustmentTask] = None
+        try:
+            df_clean, meta, forecast_base_df, request = await self.executor.run(
+                _predict_model_stage, model_id, predict_request.horizon, predict_request.interval_width,
+                predict_request.interval_mode, predict_request.interval_samples
+            )
+            overrides = {
+                "apply_ai_adjustment": predict_request.apply_ai_adjustment,
+                "max_points": predict_request.max_points
+            }
+            if predict_request.industry:
+                overrides["industry"] = predict_request.industry
+            if predict_request.city:
+                overrides["city"] = predict_request.city
+            request = request.model_copy(update=overrides)
+            
+            if request.apply_ai_adjustment:
+                adjustment = self._start_ai_adjustment(df_clean, request)
+            ai_adjustment_info, adjustment_factor = await self._await_ai_adjustment(adjustment, meta)
+            
+            df_clean = self._decimate_history(df_clean, meta, request)
+            return self.build_response(
+                df_clean, meta, forecast_base_df, ai_adjustment_info, adjustment_factor
+            )
+            
+        except (ModelNotFoundError, StageTimeoutError, WorkerCrashedError):
+            raise
+        except Exception as e:
+            logger.error(f"Model prediction failed: {e}")
+            raise ValueError(f"Model prediction failed: {str(e)}")
+        finally:
+            if adjustment is not None:
+                adjustment[0].cancel()
+    
+    def _default_seasonality_mode(self, df: pd.DataFrame) -> str:
+        """Multiplicative seasonality for highly variable series, additive otherwise."""
+        cv = df['y'].std() / df['y'].mean() if df['y'].mean() > 0 else 0
+        return 'multiplicative' if cv > 0.5 else 'additive'
     
     def _train_prophet_model(self, df: pd.DataFrame, holidays_df: Optional[pd.DataFrame], 
-                           freq: str) -> Prophet:
-        """Train Prophet model with appropriate settings."""
+                           freq: str, init: Optional[Dict[str, Any]] = None,
+                           params: Optional[Dict[str, Any]] = None) -> "Prophet":
+        """Train Prophet model with appropriate settings.
+        
+        `init` (Stan parameters from an earlier fit) warm-starts the optimiser;
+        `params` (tuned hyperparameters) override the defaults.
+        """
         try:
             # Configure seasonality based on frequency
             daily_seasonality = freq == 'D'
@@ -312,21 +1293,29 @@ class ProphetService:
             yearly_seasonality = True
             
             # Check if we should use multiplicative seasonality
-            cv = df['y'].std() / df['y'].mean() if df['y'].mean() > 0 else 0
-            seasonality_mode = 'multiplicative' if cv > 0.5 else 'additive'
+            settings = {'seasonality_mode': self._default_seasonality_mode(df)}
+            settings.update(params or {})
+            if holidays_df is None:
+                settings.pop('holidays_prior_scale', None)
+            seasonality_mode = settings['seasonality_mode']
             
             # Create Prophet model
+            from prophet import Prophet
+
             model = Prophet(
                 daily_seasonality=daily_seasonality,
                 weekly_seasonality=weekly_seasonality,
                 yearly_seasonality=yearly_seasonality,
-                seasonality_mode=seasonality_mode,
                 holidays=holidays_df,
-                uncertainty_samples=100  # Reduce for faster execution
+                uncertainty_samples=100,  # Reduce for faster execution
+                **settings
             )
             
             # Fit model
-            model.fit(df)
+            if init is not None:
+                model.fit(df, init=init)
+            else:
+                model.fit(df)
             logger.info(f"Prophet model trained with {seasonality_mode} seasonality")
             
             return model
@@ -342,4 +1331,69 @@ class ProphetService:
             'W': 'W-MON', 
             'M': 'MS'
         }
-        return freq_map.get(freq, 'D')
\ No newline at end of file
+        return freq_map.get(freq, 'D')
+
+
+_service: Optional[ProphetService] = None
+
+
+def get_prophet_service() -> ProphetService:
+    """Return the process-wide service shared by the routers and the job queue."""
+    global _service
+    if _service is None:
+        _service = ProphetService()
+    return _service
+
+
+# Stage entry points for the forecast pool. They are module-level so they can be
+# pickled into worker processes, and each worker keeps one service instance.
+_worker_service: Optional[ProphetService] = None
+
+
+def _get_worker_service() -> ProphetService:
+    global _worker_service
+    if _worker_service is None:
+        _worker_service = ProphetService()
+    return _worker_service
+
+
+def _record_peak_memory(meta: ForecastMeta, peaks: Dict[str, float]) -> ForecastMeta:
+    """Keep the largest stage peak of a request in meta.peak_memory_mb."""
+    measured = [peak for peak in [meta.peak_memory_mb, *peaks.values()] if peak is not None]
+    meta.peak_memory_mb = max(measured) if measured else None
+    return meta
+
+
+def _prepare_stage(file_content: Union[bytes, UploadSource], filename: str,
+                   request: ForecastRequest) -> Tuple[pd.DataFrame, ForecastMeta]:
+    peaks: Dict[str, float] = {}
+    with peak_memory(peaks, 'prepare'):
+        df_clean, meta = _get_worker_service().prepare_data(file_content, filename, request)
+    return df_clean, _record_peak_memory(meta, peaks)
+
+
+def _forecast_stage(df_clean: pd.DataFrame, request: ForecastRequest, meta: ForecastMeta,
+                    holidays_df: Optional[pd.DataFrame] = None, store: bool = True,
+                    params: Optional[Dict[str, Any]] = None) -> Tuple[pd.DataFrame, ForecastMeta]:
+    peaks: Dict[str, float] = {}
+    with peak_memory(peaks, 'forecast'):
+        forecast_base, meta = _get_worker_service().fit_and_predict(
+            df_clean, request, meta, holidays_df, store, params
+        )
+    return forecast_base, _record_peak_memory(meta, peaks)
+
+
+def _predict_model_stage(model_id: str, horizon: int, interval_width: Optional[float] = None,
+                         interval_mode: Optional[str] = None, interval_samples: Optional[int] = None):
+    return _get_worker_service().predict_stored_model(model_id, horizon, interval_width,
+                                                      interval_mode, interval_samples)
+
+
+def _prepare_batch_stage(file_content: Union[bytes, UploadSource], filename: str,
+                         request: BatchForecastRequest):
+    peaks: Dict[str, float] = {}
+    with peak_memory(peaks, 'prepare'):
+        series, errors, holidays_df = _get_worker_service().prepare_batch(file_content, filename, request)
+    for _, _, meta in series:
+        _record_peak_memory(meta, peaks)
+    return series, errors, holidays_df
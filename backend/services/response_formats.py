@@ -0,0 +1,102 @@
+import json
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from models.schemas import ForecastMeta
+
+logger = logging.getLogger(__name__)
+
+# Values of the `response_format` form field on POST /api/forecast
+RESPONSE_FORMATS = ("json", "columnar", "arrow")
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def _dates(values: pd.Series) -> list:
+    """ISO dates ('YYYY-MM-DD') for a datetime column, formatted in one NumPy call."""
+    return np.datetime_as_string(values.to_numpy(dtype="datetime64[D]"), unit="D").tolist()
+
+
+def _floats(values: Any, decimals: Optional[int] = None) -> np.ndarray:
+    # orjson serialises C-contiguous float64 arrays directly (NaN becomes null)
+    array = np.ascontiguousarray(values, dtype=np.float64)
+    return np.round(array, decimals) if decimals is not None else array
+
+
+def build_columnar(df_clean: pd.DataFrame, meta: ForecastMeta, forecast_base_df: pd.DataFrame,
+                   ai_adjustment_info: Optional[Dict[str, Any]],
+                   adjustment_factor: float) -> Dict[str, Any]:
+    """Forecast as parallel arrays, with the same values and rounding as ForecastResponse."""
+    yhat = forecast_base_df["yhat"].to_numpy(dtype=np.float64)
+    history = {
+        "ds": _dates(df_clean["ds"]),
+        "y": _floats(df_clean["y"])
+    }
+    if "yhat" in df_clean:
+        history["yhat"] = _floats(df_clean["yhat"], 2)
+    return {
+        "meta": meta.model_dump(),
+        "ai_adjustment": ai_adjustment_info,
+        "history": history,
+        "forecast": {
+            "ds": _dates(forecast_base_df["ds"]),
+            "yhat": _floats(yhat, 2),
+            "yhat_lower": _floats(forecast_base_df["yhat_lower"], 2),
+            "yhat_upper": _floats(forecast_base_df["yhat_upper"], 2),
+            "yhat_final": _floats(yhat * adjustment_factor, 2)
+        }
+    }
+
+
+def encode_columnar_json(df_clean: pd.DataFrame, meta: ForecastMeta, forecast_base_df: pd.DataFrame,
+                         ai_adjustment_info: Optional[Dict[str, Any]],
+                         adjustment_factor: float) -> bytes:
+    """Columnar forecast encoded with orjson."""
+    columnar = build_columnar(df_clean, meta, forecast_base_df, ai_adjustment_info, adjustment_factor)
+    return orjson.dumps(columnar, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def encode_arrow(df_clean: pd.DataFrame, meta: ForecastMeta, forecast_base_df: pd.DataFrame,
+                 ai_adjustment_info: Optional[Dict[str, Any]],
+                 adjustment_factor: float) -> bytes:
+    """History and forecast as one Arrow IPC stream.
+    
+    Rows are history followed by horizon: `y` is null on forecast rows and the
+    yhat columns are null on history rows, except `yhat` which holds the
+    in-sample fitted values when they were requested. `meta` and `ai_adjustment` are JSON
+    strings in the schema metadata.
+    """
+    import pyarrow as pa
+
+    n_history, n_forecast = len(df_clean), len(forecast_base_df)
+    history_nulls = np.full(n_history, np.nan)
+
+    def forecast_column(values: Any) -> np.ndarray:
+        return np.concatenate([history_nulls, _floats(values, 2)])
+
+    yhat = forecast_base_df["yhat"].to_numpy(dtype=np.float64)
+    fitted = _floats(df_clean["yhat"], 2) if "yhat" in df_clean else history_nulls
+    table = pa.table({
+        "ds": pa.array(np.concatenate([
+            df_clean["ds"].to_numpy(dtype="datetime64[D]"),
+            forecast_base_df["ds"].to_numpy(dtype="datetime64[D]")
+        ]), type=pa.date32()),
+        "y": pa.array(np.concatenate([_floats(df_clean["y"]), np.full(n_forecast, np.nan)]),
+                      from_pandas=True),
+        "yhat": pa.array(np.concatenate([fitted, _floats(yhat, 2)]), from_pandas=True),
+        "yhat_lower": pa.array(forecast_column(forecast_base_df["yhat_lower"]), from_pandas=True),
+        "yhat_upper": pa.array(forecast_column(forecast_base_df["yhat_upper"]), from_pandas=True),
+        "yhat_final": pa.array(forecast_column(yhat * adjustment_factor), from_pandas=True)
+    })
+    table = table.replace_schema_metadata({
+        "meta": meta.model_dump_json(),
+        "ai_adjustment": json.dumps(ai_adjustment_info)
+    })
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,86 @@
+"""Prophet hyperparameter search: candidate sampling and successive-halving schedule."""
+import math
+import os
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Candidates sampled per search and the fraction of them dropped at each rung
+TUNING_CANDIDATES = int(os.getenv("TUNING_CANDIDATES", "16"))
+TUNING_ETA = int(os.getenv("TUNING_ETA", "2"))
+
+PARAM_GRID: Dict[str, List[Any]] = {
+    'changepoint_prior_scale': [0.001, 0.01, 0.05, 0.1, 0.5],
+    'seasonality_prior_scale': [0.01, 0.1, 1.0, 10.0],
+    'seasonality_mode': ['additive', 'multiplicative'],
+    'holidays_prior_scale': [0.01, 0.1, 1.0, 10.0]
+}
+
+# Shortest training window a rung may use, and the most of the series held out
+MIN_RUNG_ROWS = 30
+MAX_HOLDOUT_FRACTION = 0.25
+
+
+def sample_candidates(default: Dict[str, Any], with_holidays: bool,
+                      n_candidates: int = TUNING_CANDIDATES, seed: int = 0) -> List[Dict[str, Any]]:
+    """`default` plus up to n_candidates - 1 distinct random grid points.
+
+    The holidays prior is only searched when holidays are modelled.
+    """
+    grid = {name: values for name, values in PARAM_GRID.items()
+            if with_holidays or name != 'holidays_prior_scale'}
+    size = math.prod(len(values) for values in grid.values())
+    rng = np.random.default_rng(seed)
+
+    candidates = [default]
+    seen = {tuple(sorted(default.items()))}
+    for flat in rng.permutation(size):
+        if len(candidates) >= n_candidates:
+            break
+        candidate = {}
+        for name, values in grid.items():
+            flat, index = divmod(int(flat), len(values))
+            candidate[name] = values[index]
+        key = tuple(sorted(candidate.items()))
+        if key not in seen:
+            seen.add(key)
+            candidates.append(candidate)
+    return candidates
+
+
+def holdout_split(df_clean: pd.DataFrame, horizon: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(train, holdout): the last `horizon` rows, capped at a quarter of the series."""
+    n_holdout = min(horizon, int(len(df_clean) * MAX_HOLDOUT_FRACTION))
+    if n_holdout < 1 or len(df_clean) - n_holdout < MIN_RUNG_ROWS:
+        raise ValueError(f"Series too short to tune: {len(df_clean)} rows")
+    return df_clean.iloc[:-n_holdout], df_clean.iloc[-n_holdout:]
+
+
+def halving_schedule(n_candidates: int, n_train: int,
+                     eta: int = TUNING_ETA) -> List[Tuple[int, int]]:
+    """(candidates evaluated, most recent training rows) per successive-halving rung.
+
+    Each rung keeps the best 1/eta of the previous one and gives the survivors
+    eta times more history; the last rung trains on everything.
+    """
+    n_rungs = max(1, int(math.log(n_candidates, eta) + 1e-9)) if n_candidates > 1 else 1
+    schedule = []
+    for rung in range(n_rungs):
+        keep = max(1, math.ceil(n_candidates / eta ** rung))
+        rows = n_train // eta ** (n_rungs - 1 - rung)
+        schedule.append((keep, min(n_train, max(MIN_RUNG_ROWS, rows))))
+    return schedule
+
+
+def holdout_rmse(holdout: pd.DataFrame, forecast: pd.DataFrame) -> float:
+    """RMSE of a forecast over the holdout rows (inf when nothing can be scored).
+
+    Forecast step k is scored against holdout row k; weekly forecast dates
+    (W-MON) do not match the history's week labels, so dates are not compared.
+    """
+    n = min(len(holdout), len(forecast))
+    errors = (holdout['y'].to_numpy(dtype=np.float64)[:n]
+              - forecast['yhat'].to_numpy(dtype=np.float64)[:n])
+    errors = errors[~np.isnan(errors)]
+    return float(np.sqrt(np.mean(errors ** 2))) if len(errors) else math.inf
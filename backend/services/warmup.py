@@ -0,0 +1,112 @@
+"""Background warm-up of the forecasting stack, reported by /ready.
+
+Importing pandas, prophet, cmdstanpy and httpx, spawning the forecast pool and
+running the first Stan fit take seconds. main.py starts serving the cheap
+endpoints (/health, geo data) straight away and runs these steps in a
+background task instead; forecast routes are registered once their imports
+have loaded, and requests for them wait until then.
+"""
+import asyncio
+import importlib
+import logging
+import os
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional
+
+from services.executor import ForecastExecutor
+from services.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Run a tiny fit on every worker after the pool starts
+WARMUP_FIT = os.getenv("FORECAST_WARMUP_FIT", "true").lower() == "true"
+WARMUP_FIT_ROWS = 60
+
+
+def warm_fit() -> int:
+    """Fit and predict a tiny Prophet model, so the first real fit starts warm."""
+    import numpy as np
+    import pandas as pd
+    from prophet import Prophet
+
+    df = pd.DataFrame({
+        "ds": pd.date_range("2020-01-01", periods=WARMUP_FIT_ROWS, freq="D"),
+        "y": 100.0 + np.arange(WARMUP_FIT_ROWS) % 7
+    })
+    model = Prophet(yearly_seasonality=False, uncertainty_samples=0)
+    model.fit(df)
+    model.predict(model.make_future_dataframe(periods=7, include_history=False))
+    return os.getpid()
+
+
+def _import_modules(names: List[str]) -> Dict[str, ModuleType]:
+    return {name: importlib.import_module(name) for name in names}
+
+
+class Warmup:
+    """Tracks the start-up steps that run after the app is already serving.
+
+    `status` is pending, warming, ready or failed.
+    """
+
+    def __init__(self):
+        self.status = "pending"
+        self.steps: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self._stack_loaded = asyncio.Event()
+        self._stack_failed = False
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    @property
+    def stack_loaded(self) -> bool:
+        return self._stack_loaded.is_set() and not self._stack_failed
+
+    async def wait_for_stack(self) -> bool:
+        """Wait until the forecasting imports are done; False if they failed."""
+        await self._stack_loaded.wait()
+        return not self._stack_failed
+
+    def describe(self) -> Dict[str, Any]:
+        return {"status": self.status, "steps": self.steps, "error": self.error}
+
+    async def run(self, modules: List[str], on_loaded: Callable[[Dict[str, ModuleType]], None],
+                  executor: ForecastExecutor):
+        """Import `modules` off the event loop, hand them to `on_loaded`, then warm the pool.
+
+        Steps (with their seconds in `steps`): `imports`, `workers` (spawn the
+        process pool) and `warm_fit` (one tiny fit per worker).
+        """
+        self.status = "warming"
+        try:
+            try:
+                with timed(self.steps, "imports"):
+                    loaded = await asyncio.to_thread(_import_modules, modules)
+                on_loaded(loaded)
+            except Exception:
+                self._stack_failed = True
+                raise
+            finally:
+                self._stack_loaded.set()
+
+            with timed(self.steps, "workers"):
+                await executor.start()
+
+            if WARMUP_FIT:
+                with timed(self.steps, "warm_fit"):
+                    if executor.mode == "inline":
+                        await asyncio.to_thread(warm_fit)
+                    else:
+                        # One fit per worker; each blocks its worker, so they spread out
+                        workers = executor.max_workers if executor.mode == "process" else 1
+                        await asyncio.gather(*[executor.run(warm_fit) for _ in range(workers)])
+
+            self.status = "ready"
+            logger.info(f"Warm-up finished: {self.steps}")
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            logger.error(f"Warm-up failed: {e}")
+
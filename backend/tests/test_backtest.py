@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.schemas import ForecastRequest
+from services.backtest import accuracy_metrics, align_forecasts, backtest_window, rolling_cutoffs
+from services.prophet_service import ProphetService
+
+
+def make_request(freq: str, horizon: int, engine: str = "seasonal_naive") -> ForecastRequest:
+    return ForecastRequest(industry="retail", country="US", freq=freq, horizon=horizon,
+                           date_col="date", target_col="sales", engine=engine,
+                           apply_ai_adjustment=False)
+
+
+def test_backtest_window_defaults():
+    assert backtest_window(8) == (24, 4)
+    assert backtest_window(1) == (3, 1)
+    assert backtest_window(8, initial=10, period=3) == (10, 3)
+
+
+def test_rolling_cutoffs_leave_a_full_horizon():
+    assert rolling_cutoffs(20, horizon=4, initial=8, period=3) == [10, 13, 16]
+    assert rolling_cutoffs(20, horizon=4, initial=8, period=3, max_cutoffs=2) == [13, 16]
+
+
+def test_rolling_cutoffs_reject_short_series():
+    with pytest.raises(ValueError, match="at least initial \\+ horizon"):
+        rolling_cutoffs(10, horizon=4, initial=8, period=1)
+
+
+def test_align_forecasts_matches_by_position():
+    df_clean = pd.DataFrame({"ds": pd.date_range("2024-01-02", periods=6, freq="7D"),
+                             "y": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]})
+    # Dated a day off the history, as Prophet's weekly forecasts are
+    forecast = pd.DataFrame({"ds": pd.date_range("2024-01-22", periods=2, freq="W-MON"),
+                             "yhat": [4.5, 5.5], "yhat_lower": [4.0, 5.0], "yhat_upper": [5.0, 6.0]})
+    actual, yhat, lower, upper = align_forecasts(df_clean, [3], [forecast])
+    assert actual.tolist() == [[4.0, 5.0]]
+    assert yhat.tolist() == [[4.5, 5.5]]
+
+
+def test_accuracy_metrics_skip_missing_actuals():
+    actual = np.array([[10.0, np.nan], [0.0, 20.0]])
+    yhat = np.array([[12.0, 1.0], [1.0, 18.0]])
+    steps, overall = accuracy_metrics(actual, yhat, yhat - 1, yhat + 1)
+    assert [step.count for step in steps] == [2, 1]
+    assert overall.count == 3
+    # The zero actual is left out of MAPE only
+    assert overall.mape == pytest.approx(0.15)
+    assert overall.mae == pytest.approx(5 / 3, abs=1e-4)
+
+
+@pytest.mark.parametrize("freq", ["D", "W", "M"])
+def test_backtest_scores_every_step(freq):
+    # Regression: weekly history is labelled Tuesday, forecasts Monday
+    service = ProphetService()
+    days = pd.date_range("2020-01-01", periods=1500, freq="D")
+    raw = pd.DataFrame({"ds": days, "y": 100 + 10 * np.sin(np.arange(len(days)) / 30.0)})
+    df_clean = service._aggregate_to_frequency(raw, freq)
+    request = make_request(freq, horizon=4)
+
+    initial, period = backtest_window(request.horizon)
+    cutoffs = rolling_cutoffs(len(df_clean), request.horizon, initial, period)
+    forecasts = [service._forecast_light(df_clean.iloc[:cutoff], request, request.engine)
+                 for cutoff in cutoffs]
+    steps, overall = accuracy_metrics(*align_forecasts(df_clean, cutoffs, forecasts))
+
+    assert overall.count == len(cutoffs) * request.horizon
+    assert all(step.count == len(cutoffs) for step in steps)
+    assert overall.rmse is not None and overall.mape is not None
@@ -0,0 +1,105 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from models.schemas import BatchForecastRequest
+from services.model_store import ModelStore
+from services.prophet_service import ProphetService
+
+
+class CountingExecutor:
+    """Runs batch preparation inline and records how many other stages overlap."""
+
+    max_workers = 2
+    busy = False
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def run(self, fn, *args):
+        if fn.__name__ == '_prepare_batch_stage':
+            return fn(*args)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            raise RuntimeError("fit failed")
+        finally:
+            self.in_flight -= 1
+
+
+def batch_upload(n_series: int, periods: int) -> bytes:
+    frames = [pd.DataFrame({"store": f"s{i}",
+                            "date": pd.date_range("2020-01-01", periods=periods, freq="MS"),
+                            "sales": np.arange(periods, dtype=np.float64) + i})
+              for i in range(n_series)]
+    return pd.concat(frames).to_csv(index=False).encode("utf-8")
+
+
+def test_tuned_batch_stays_within_pool_size(tmp_path):
+    executor = CountingExecutor()
+    service = ProphetService(executor=executor, model_store=ModelStore(str(tmp_path), max_bytes=1024 * 1024))
+    request = BatchForecastRequest(industry="retail", country="US", freq="M", horizon=3,
+                                   date_col="date", target_col="sales", series_cols=["store"],
+                                   tune=True, apply_holidays=False, apply_ai_adjustment=False)
+
+    async def run():
+        total, results = await service.generate_batch_forecast(batch_upload(6, 48), "batch.csv", request)
+        return total, [result async for result in results]
+
+    total, results = asyncio.run(run())
+    assert total == len(results) == 6
+    assert 0 < executor.max_in_flight <= executor.max_workers
+
+
+def test_batch_series_key_is_scoped_per_series(tmp_path):
+    service = ProphetService(executor=CountingExecutor(), model_store=ModelStore(str(tmp_path), max_bytes=1024 * 1024))
+    request = BatchForecastRequest(industry="retail", country="US", freq="M", horizon=3,
+                                   date_col="date", target_col="sales", series_cols=["store"],
+                                   series_key="acme", tune=True, apply_holidays=False,
+                                   apply_ai_adjustment=False)
+    seen = []
+
+    async def record(df_clean, series_request, meta, holidays_df=None, semaphore=None):
+        seen.append(service._series_id(df_clean, series_request))
+        return None
+
+    service._tuned_params = record
+
+    async def run():
+        _, results = await service.generate_batch_forecast(batch_upload(3, 48), "batch.csv", request)
+        return [result async for result in results]
+
+    asyncio.run(run())
+    assert len(seen) == 3
+    assert len(set(seen)) == 3
+
+
+class RecordingExecutor(CountingExecutor):
+    def __init__(self):
+        super().__init__()
+        self.stores = []
+
+    async def run(self, fn, *args):
+        if fn.__name__ == '_forecast_stage':
+            self.stores.append(args[4])
+        return await super().run(fn, *args)
+
+
+def test_batch_models_are_only_stored_on_request(tmp_path):
+    for store_models in (False, True):
+        executor = RecordingExecutor()
+        service = ProphetService(executor=executor, model_store=ModelStore(str(tmp_path), max_bytes=1024 * 1024))
+        request = BatchForecastRequest(industry="retail", country="US", freq="M", horizon=3,
+                                       date_col="date", target_col="sales", series_cols=["store"],
+                                       store_models=store_models, apply_holidays=False,
+                                       apply_ai_adjustment=False)
+
+        async def run():
+            _, results = await service.generate_batch_forecast(batch_upload(3, 24), "batch.csv", request)
+            return [result async for result in results]
+
+        asyncio.run(run())
+        assert executor.stores == [store_models] * 3
@@ -0,0 +1,18 @@
+from benchmarks.run import build_request, case_stages
+from benchmarks.synthetic import synthetic_upload
+from services.prophet_service import ProphetService
+
+
+def test_case_stages_only_builds_inputs_for_selected_stages(monkeypatch):
+    service = ProphetService()
+
+    def no_fit(*args, **kwargs):
+        raise AssertionError("a read-only run fitted a model")
+
+    monkeypatch.setattr(service, "_train_prophet_model", no_fit)
+    stages = case_stages(service, synthetic_upload(100, "D", "csv"), "bench.csv",
+                         build_request("D"), ["read_file", "validate_and_process_data"])
+
+    assert [name for name, _ in stages] == ["read_file", "validate_and_process_data"]
+    for _, stage in stages:
+        stage()
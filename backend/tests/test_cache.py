@@ -0,0 +1,31 @@
+import asyncio
+
+from services.cache import TTLCache
+
+
+def test_get_or_compute_caches_results():
+    cache = TTLCache(max_entries=4)
+
+    async def run():
+        first = await cache.get_or_compute("key", lambda: asyncio.sleep(0, result=1))
+        second = await cache.get_or_compute("key", lambda: asyncio.sleep(0, result=2))
+        return first, second
+
+    assert asyncio.run(run()) == ((1, "miss"), (1, "hit"))
+
+
+def test_uncacheable_results_are_shared_but_not_stored():
+    cache = TTLCache(max_entries=4)
+
+    async def run():
+        factory = lambda: asyncio.sleep(0.01, result="busy-pick")
+        concurrent = await asyncio.gather(
+            cache.get_or_compute("key", factory, cacheable=lambda value: False),
+            cache.get_or_compute("key", factory, cacheable=lambda value: False)
+        )
+        await asyncio.sleep(0)
+        return concurrent, len(cache)
+
+    concurrent, size = asyncio.run(run())
+    assert sorted(status for _, status in concurrent) == ["coalesced", "miss"]
+    assert size == 0
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.schemas import ForecastRequest
+from services.ingest import COLUMNAR_EXTENSIONS
+from services.memory import PARSE_EXPANSION, MemoryBudgetExceededError, check_memory_budget
+from services.prophet_service import ProphetService
+
+
+def period_aggregate(df: pd.DataFrame, period: str) -> pd.DataFrame:
+    # The Period-based grouping that _aggregate_to_frequency replaced
+    grouped = df.groupby(df['ds'].dt.to_period(period))['y'].sum()
+    return pd.DataFrame({'ds': grouped.index.start_time, 'y': grouped.to_numpy()})
+
+
+@pytest.mark.parametrize("freq, period", [("W", "W-MON"), ("M", "M")])
+def test_aggregate_buckets_match_periods(freq, period):
+    rng = np.random.default_rng(0)
+    ds = pd.to_datetime("2019-12-25") + pd.to_timedelta(rng.integers(0, 900, 2000), unit="D")
+    df = pd.DataFrame({"ds": ds, "y": rng.normal(100, 10, 2000)})
+
+    result = ProphetService()._aggregate_to_frequency(df, freq)
+    expected = period_aggregate(df, period)
+
+    assert result["ds"].tolist() == expected["ds"].tolist()
+    np.testing.assert_allclose(result["y"], expected["y"])
+    if freq == "W":
+        assert set(result["ds"].dt.day_name()) == {"Tuesday"}
+
+
+def test_validate_drops_invalid_rows_and_counts_them():
+    df = pd.DataFrame({
+        "date": [f"2024-01-{day:02d}" for day in range(1, 21)] + ["not a date", "2024-01-21"],
+        "sales": [float(day) for day in range(1, 21)] + [5.0, "n/a"]
+    })
+    request = ForecastRequest(industry="retail", country="US", freq="D", horizon=3,
+                              date_col="date", target_col="sales", apply_ai_adjustment=False)
+
+    df_clean, meta = ProphetService().validate_and_process_data(df, request)
+
+    assert len(df_clean) == 20
+    assert (meta.original_rows, meta.null_dates, meta.null_targets) == (22, 1, 1)
+    assert meta.train_start == "2024-01-01" and meta.train_end == "2024-01-20"
+
+
+def test_validate_reports_missing_columns():
+    request = ForecastRequest(industry="retail", country="US", freq="D", horizon=3,
+                              date_col="date", target_col="sales", apply_ai_adjustment=False)
+    with pytest.raises(ValueError, match="Target column 'sales' not found"):
+        ProphetService().validate_and_process_data(pd.DataFrame({"date": []}), request)
+
+
+@pytest.mark.parametrize("extension", COLUMNAR_EXTENSIONS + (".xlsx", ".xls"))
+def test_every_whole_read_format_has_a_memory_estimate(extension):
+    assert extension in PARSE_EXPANSION
+    with pytest.raises(MemoryBudgetExceededError):
+        check_memory_budget(100 * 1024 * 1024, extension, budget_mb=200)
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from services.decimation import decimate_series, lttb_indices
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[437] = 50.0
+    kept = lttb_indices(x, y, 20)
+    assert len(kept) == 20
+    assert kept[0] == 0 and kept[-1] == 999
+    assert np.all(np.diff(kept) > 0)
+    assert 437 in kept
+
+
+def test_lttb_returns_everything_when_not_reducing():
+    x = np.arange(10, dtype=np.float64)
+    assert lttb_indices(x, x, 10).tolist() == list(range(10))
+    assert lttb_indices(x, x, 2).tolist() == list(range(10))
+
+
+def test_decimate_series_only_shrinks_long_frames():
+    df = pd.DataFrame({"ds": pd.date_range("2020-01-01", periods=500, freq="D"),
+                       "y": np.sin(np.arange(500) / 10.0)})
+    assert decimate_series(df, None) is df
+    assert decimate_series(df, 500) is df
+    decimated = decimate_series(df, 50)
+    assert len(decimated) == 50
+    assert decimated["ds"].is_monotonic_increasing
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.schemas import ForecastMeta, ForecastRequest
+from services.engines import LIGHT_ENGINES, choose_engine, season_length
+from services.prophet_service import ProphetService
+
+
+def test_choose_engine():
+    assert choose_engine(20, 'M', busy=False) == 'theta'
+    assert choose_engine(20, 'M', busy=True) == 'theta'
+    assert choose_engine(24, 'M', busy=False) == 'prophet'
+    assert choose_engine(24, 'M', busy=True) == 'ets'
+
+
+def test_season_length_needs_two_cycles():
+    assert season_length('W', 104) == 52
+    assert season_length('W', 103) == 1
+
+
+@pytest.mark.parametrize("engine", sorted(LIGHT_ENGINES))
+def test_light_engines_return_ordered_intervals(engine):
+    y = 100 + 10 * np.sin(np.arange(60) * 2 * np.pi / 12)
+    yhat, lower, upper = LIGHT_ENGINES[engine](y, 'M', 6)
+    assert len(yhat) == len(lower) == len(upper) == 6
+    assert np.all(lower <= yhat) and np.all(yhat <= upper)
+
+
+def test_load_based_auto_picks_are_not_cacheable():
+    service = ProphetService()
+    auto = ForecastRequest(industry="retail", country="US", freq="M", horizon=3,
+                           date_col="date", target_col="sales", engine="auto")
+    assert service._engine_cacheable(auto, 'prophet', 48)
+    assert service._engine_cacheable(auto, 'theta', 12)
+    assert not service._engine_cacheable(auto, 'ets', 48)
+    assert service._engine_cacheable(auto.model_copy(update={"engine": "ets"}), 'ets', 48)
+
+
+@pytest.mark.parametrize("engine", sorted(LIGHT_ENGINES))
+def test_include_fitted_returns_in_sample_fits(engine):
+    service = ProphetService()
+    rng = np.random.default_rng(0)
+    df_clean = pd.DataFrame({
+        "ds": pd.date_range("2018-01-01", periods=60, freq="MS"),
+        "y": 200 + 20 * np.sin(np.arange(60) * 2 * np.pi / 12) + rng.normal(0, 2, 60)
+    })
+    request = ForecastRequest(industry="retail", country="US", freq="M", horizon=6,
+                              date_col="date", target_col="sales", engine=engine,
+                              include_fitted=True, apply_ai_adjustment=False)
+
+    forecast = service._forecast_light(df_clean, request, engine)
+    history, horizon_rows = service._split_fitted(df_clean, forecast, request.horizon)
+
+    assert len(horizon_rows) == 6
+    fitted = history["yhat"].to_numpy()
+    assert np.isfinite(fitted[12:]).all()
+    assert np.sqrt(np.nanmean((fitted - df_clean["y"].to_numpy()) ** 2)) < 20
+
+
+def test_unfitted_history_rows_serialise_as_null():
+    service = ProphetService()
+    df_clean = pd.DataFrame({"ds": pd.date_range("2018-01-01", periods=30, freq="MS"),
+                             "y": np.arange(30, dtype=np.float64) + 1})
+    request = ForecastRequest(industry="retail", country="US", freq="M", horizon=3,
+                              date_col="date", target_col="sales", engine="seasonal_naive",
+                              include_fitted=True, apply_ai_adjustment=False)
+    meta = ForecastMeta(freq="M", train_start="", train_end="", horizon=3, holidays_used=[],
+                        original_rows=30, processed_rows=30, null_dates=0, null_targets=0)
+    forecast = service._forecast_light(df_clean, request, request.engine)
+    history, horizon_rows = service._split_fitted(df_clean, forecast, request.horizon)
+
+    response = service.build_response(history, meta, horizon_rows, None, 1.0)
+    assert response.history[0].yhat is None
+    assert response.history[-1].yhat == 18.0
+    assert "NaN" not in response.model_dump_json()
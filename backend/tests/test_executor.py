@@ -0,0 +1,43 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from services.executor import ForecastExecutor, StageTimeoutError
+
+
+def nap(seconds: float) -> int:
+    time.sleep(seconds)
+    return os.getpid()
+
+
+@pytest.fixture
+def process_executor():
+    executor = ForecastExecutor(mode="process", max_workers=1, task_timeout=1.0)
+    yield executor
+    executor.shutdown()
+
+
+def test_queued_stages_do_not_time_out_while_waiting(process_executor):
+    async def run():
+        await process_executor.start()
+        # Three 0.6s stages on one worker: the last one waits 1.2s before it starts
+        return await asyncio.gather(*(process_executor.run(nap, 0.6) for _ in range(3)))
+
+    assert len(set(asyncio.run(run()))) == 1
+
+
+def test_timed_out_stage_keeps_its_worker(process_executor):
+    async def run():
+        await process_executor.start()
+        pool = process_executor._get_pool()
+        first = await process_executor.run(nap, 0)
+        with pytest.raises(StageTimeoutError):
+            await process_executor.run(nap, 5)
+        second = await process_executor.run(nap, 0)
+        return pool is process_executor._pool, first, second
+
+    same_pool, first, second = asyncio.run(run())
+    assert same_pool
+    assert first == second
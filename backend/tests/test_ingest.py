@@ -0,0 +1,65 @@
+import io
+
+import pandas as pd
+import pytest
+
+from services import ingest, memory
+from services.ingest import UploadSource, _rows_to_frame, read_excel_frame
+from services.memory import MemoryBudgetExceededError
+from services.prophet_service import ProphetService
+
+
+def workbook(header_row: int = 0) -> bytes:
+    buffer = io.BytesIO()
+    data = pd.DataFrame({"date": pd.date_range("2024-01-01", periods=5, freq="D"),
+                         "region": list("abcde"), "sales": [1.0, 2.0, None, 4.0, 5.0]})
+    with pd.ExcelWriter(buffer) as writer:
+        pd.DataFrame({"x": [1]}).to_excel(writer, sheet_name="Notes", index=False)
+        data.to_excel(writer, sheet_name="Sales", index=False, startrow=header_row)
+    return buffer.getvalue()
+
+
+def test_rows_to_frame_projects_columns():
+    rows = iter([("date", "sales", None, "date"), ("d1", 1, "x", "dup"), ("d2", "", "y")])
+    df = _rows_to_frame(rows, ["date", "sales", "missing"])
+    assert list(df.columns) == ["date", "sales"]
+    assert df["date"].tolist() == ["d1", "d2"]
+    assert df["sales"].tolist()[0] == 1 and pd.isna(df["sales"].tolist()[1])
+
+
+def test_rows_to_frame_handles_empty_sheet():
+    assert _rows_to_frame(iter([]), None).empty
+
+
+@pytest.fixture(params=["calamine", "openpyxl"])
+def excel_reader(request, monkeypatch):
+    if request.param == "openpyxl":
+        def unavailable(*args):
+            raise ImportError("python_calamine")
+        monkeypatch.setattr(ingest, "_read_calamine", unavailable)
+    return request.param
+
+
+def test_read_excel_frame_selects_sheet_header_and_columns(excel_reader):
+    source = UploadSource("upload.xlsx", content=workbook(header_row=2))
+    df = read_excel_frame(source, ["date", "sales"], sheet="Sales", header_row=2)
+    assert list(df.columns) == ["date", "sales"]
+    assert len(df) == 5
+    assert pd.to_datetime(df["date"]).iloc[-1] == pd.Timestamp("2024-01-05")
+    assert pd.to_numeric(df["sales"]).isna().sum() == 1
+
+    by_index = read_excel_frame(source, ["date", "sales"], sheet="1", header_row=2)
+    assert by_index.shape == df.shape
+
+
+def test_read_excel_frame_reports_unknown_sheet(excel_reader):
+    source = UploadSource("upload.xlsx", content=workbook())
+    with pytest.raises(ValueError, match="Sheet 'Q4' not found; available sheets: Notes, Sales"):
+        read_excel_frame(source, ["date"], sheet="Q4")
+
+
+def test_read_excel_frame_checks_kept_cells_against_the_budget(excel_reader, monkeypatch):
+    monkeypatch.setattr(memory, "BYTES_PER_CELL", 1024 ** 3)
+    source = UploadSource("upload.xlsx", content=workbook())
+    with pytest.raises(MemoryBudgetExceededError):
+        ProphetService().read_file(source, "upload.xlsx", columns=["date", "sales"], sheet="Sales")
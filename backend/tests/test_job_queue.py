@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from models.schemas import ForecastRequest
+from services.executor import WorkerCrashedError
+from services.ingest import UploadSource
+from services.job_queue import ForecastJob, ForecastJobQueue
+from services.memory import MemoryBudgetExceededError
+
+
+class RaisingService:
+    def __init__(self, error: Exception):
+        self.error = error
+
+    async def generate_forecast(self, *args, **kwargs):
+        raise self.error
+
+
+@pytest.mark.parametrize("error, code", [
+    (MemoryBudgetExceededError("over budget"), 413),
+    (WorkerCrashedError("crashed"), 503),
+    (ValueError("bad data"), 400),
+])
+def test_job_failures_use_the_sync_status_codes(error, code):
+    queue = ForecastJobQueue(service=RaisingService(error))
+    request = ForecastRequest(industry="retail", country="US", freq="D", horizon=3,
+                              date_col="date", target_col="sales")
+    job = ForecastJob(UploadSource("upload.csv", content=b"date,sales\n"), "upload.csv", request)
+
+    asyncio.run(queue._run(job))
+
+    assert (job.status, job.error_code) == ("failed", code)
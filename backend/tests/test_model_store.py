@@ -0,0 +1,58 @@
+import os
+import time
+
+import pytest
+
+from services.model_store import (
+    MODEL_FILE_SUFFIX, STALE_TEMP_SECONDS, TEMP_FILE_SUFFIX, TUNING_FILE_PREFIX, ModelStore
+)
+
+
+def tuning_files(root: str):
+    return [name for name in os.listdir(root) if name.startswith(TUNING_FILE_PREFIX)]
+
+
+def test_limits_are_enforced_every_few_saves(tmp_path, monkeypatch):
+    store = ModelStore(str(tmp_path), max_bytes=1024 * 1024, max_models=4, enforce_every=3)
+    scans = []
+    original_scan = store._scan
+    monkeypatch.setattr(store, "_scan", lambda *args, **kwargs: scans.append(args) or original_scan(*args, **kwargs))
+
+    for index in range(12):
+        store.save_tuning(f"{index:032x}", {"params": {}, "holdout_rmse": 1.0})
+
+    assert len(scans) == 4
+    # Between checks the index may run over by fewer than enforce_every entries
+    assert len(tuning_files(str(tmp_path))) <= 4 + 2
+
+
+def test_default_check_interval_scales_with_max_models(tmp_path):
+    assert ModelStore(str(tmp_path), max_bytes=1, max_models=1000).enforce_every == 50
+    assert ModelStore(str(tmp_path), max_bytes=1, max_models=10).enforce_every == 1
+
+
+def test_failed_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    store = ModelStore(str(tmp_path), max_bytes=1024 * 1024)
+
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail_replace)
+    with pytest.raises(OSError):
+        store.save_tuning("0" * 32, {"params": {}})
+    assert os.listdir(tmp_path) == []
+
+
+def test_scan_sweeps_stale_temp_files(tmp_path):
+    store = ModelStore(str(tmp_path), max_bytes=1024 * 1024, enforce_every=1)
+    stale = tmp_path / f"{'1' * 32}{MODEL_FILE_SUFFIX}.123{TEMP_FILE_SUFFIX}"
+    fresh = tmp_path / f"{'2' * 32}{MODEL_FILE_SUFFIX}.456{TEMP_FILE_SUFFIX}"
+    for path in (stale, fresh):
+        path.write_bytes(b"partial")
+    old = time.time() - STALE_TEMP_SECONDS - 60
+    os.utime(stale, (old, old))
+
+    store.save_tuning("0" * 32, {"params": {}})
+
+    assert not stale.exists()
+    assert fresh.exists()
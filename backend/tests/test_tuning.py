@@ -0,0 +1,112 @@
+import asyncio
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.schemas import ForecastMeta, ForecastRequest
+from services.model_store import ModelStore
+from services.prophet_service import ProphetService
+from services.tuning import (
+    MIN_RUNG_ROWS, PARAM_GRID, halving_schedule, holdout_rmse, holdout_split, sample_candidates
+)
+
+DEFAULT = {'changepoint_prior_scale': 0.05, 'seasonality_prior_scale': 10.0,
+           'seasonality_mode': 'additive'}
+
+
+class FailingExecutor:
+    """Stands in for the forecast pool; every stage fails."""
+
+    max_workers = 2
+    busy = False
+
+    def __init__(self):
+        self.calls = 0
+
+    async def run(self, fn, *args):
+        self.calls += 1
+        raise RuntimeError("fit failed")
+
+
+def weekly_history(periods: int) -> pd.DataFrame:
+    # Labelled like _aggregate_to_frequency's weekly buckets (Tuesdays)
+    return pd.DataFrame({"ds": pd.date_range("2020-01-07", periods=periods, freq="7D"),
+                         "y": 100 + np.arange(periods, dtype=np.float64)})
+
+
+def test_sample_candidates_start_with_default_and_are_distinct():
+    candidates = sample_candidates(DEFAULT, with_holidays=False, n_candidates=8)
+    assert candidates[0] == DEFAULT
+    assert len(candidates) == 8
+    assert len({tuple(sorted(c.items())) for c in candidates}) == 8
+    assert all('holidays_prior_scale' not in c for c in candidates)
+    assert all(c[name] in PARAM_GRID[name] for c in candidates[1:] for name in c)
+
+
+def test_sample_candidates_search_holidays_prior_when_modelled():
+    candidates = sample_candidates(DEFAULT, with_holidays=True, n_candidates=8)
+    assert all('holidays_prior_scale' in c for c in candidates[1:])
+
+
+def test_halving_schedule_halves_candidates_and_grows_history():
+    schedule = halving_schedule(16, 400, eta=2)
+    assert [keep for keep, _ in schedule] == [16, 8, 4, 2]
+    assert [rows for _, rows in schedule] == [50, 100, 200, 400]
+    assert halving_schedule(1, 400) == [(1, 400)]
+    # Early rungs never train on fewer than MIN_RUNG_ROWS rows
+    assert halving_schedule(16, 60, eta=2)[0][1] == MIN_RUNG_ROWS
+
+
+def test_holdout_split_caps_holdout_at_a_quarter():
+    train, holdout = holdout_split(weekly_history(60), horizon=30)
+    assert (len(train), len(holdout)) == (45, 15)
+    with pytest.raises(ValueError, match="too short"):
+        holdout_split(weekly_history(24), horizon=6)
+
+
+def test_holdout_rmse_scores_weekly_forecasts_by_position():
+    # Regression: weekly history is labelled Tuesday, Prophet forecasts Monday
+    _, holdout = holdout_split(weekly_history(60), horizon=4)
+    forecast = pd.DataFrame({
+        "ds": pd.date_range(holdout['ds'].iloc[0] - pd.Timedelta(days=1), periods=4, freq="W-MON"),
+        "yhat": holdout['y'].to_numpy() + 2.0
+    })
+    assert holdout_rmse(holdout, forecast) == pytest.approx(2.0)
+    assert math.isinf(holdout_rmse(holdout, forecast.iloc[:0]))
+
+
+def test_tuning_that_scores_nothing_is_not_remembered(tmp_path):
+    executor = FailingExecutor()
+    store = ModelStore(str(tmp_path), max_bytes=1024 * 1024)
+    service = ProphetService(executor=executor, model_store=store)
+    df_clean = weekly_history(80)
+    request = ForecastRequest(industry="retail", country="US", freq="W", horizon=4,
+                              date_col="date", target_col="sales", tune=True,
+                              apply_holidays=False, apply_ai_adjustment=False)
+    meta = ForecastMeta(freq="W", train_start="", train_end="", horizon=4, holidays_used=[],
+                        original_rows=80, processed_rows=80, null_dates=0, null_targets=0)
+
+    params = asyncio.run(service._tuned_params(df_clean, request, meta))
+
+    assert params is None
+    assert meta.tuning == 'skipped'
+    assert executor.calls > 0
+    assert store.load_tuning(service._series_id(df_clean, request)) is None
+
+
+def test_short_series_skips_tuning_instead_of_failing(tmp_path):
+    executor = FailingExecutor()
+    service = ProphetService(executor=executor, model_store=ModelStore(str(tmp_path), max_bytes=1024 * 1024))
+    df_clean = pd.DataFrame({"ds": pd.date_range("2022-01-01", periods=24, freq="MS"),
+                             "y": np.arange(24, dtype=np.float64)})
+    request = ForecastRequest(industry="retail", country="US", freq="M", horizon=6,
+                              date_col="date", target_col="sales", tune=True,
+                              apply_holidays=False, apply_ai_adjustment=False)
+    meta = ForecastMeta(freq="M", train_start="", train_end="", horizon=6, holidays_used=[],
+                        original_rows=24, processed_rows=24, null_dates=0, null_targets=0)
+
+    assert asyncio.run(service._tuned_params(df_clean, request, meta)) is None
+    assert meta.tuning == 'skipped'
+    assert executor.calls == 0